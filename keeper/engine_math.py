@@ -0,0 +1,153 @@
+"""
+Integer mirror of the DSCEngine math.
+
+Every function rounds exactly like its counterpart in src/dsc_engine.vy so
+off-chain results can be compared with on-chain ones bit for bit.
+
+Prices are feed answers. The engine multiplies each one by the `PRICE_SCALES`
+entry of its feed, `price_scale(feed.decimals())`: `scale` and `scales`
+default to the one of 8 decimals feeds.
+"""
+
+from typing import Sequence
+
+# @dev keep in sync with the constants of src/dsc_engine.vy
+ADDITIONAL_FEED_PRECISION = 1 * (10**8)
+FEED_DECIMALS = 8
+PRECISION = 1 * (10**18)
+LIQUIDATION_THRESHOLD = 50
+LIQUIDATION_BONUS = 10
+LIQUIDATION_PRECISION = 100
+MIN_HEALTH_FACTOR = 1 * (10**18)
+MAX_UINT256 = 2**256 - 1
+
+
+def price_scale(feed_decimals: int) -> int:
+    """Multiplier turning an answer of a feed into an engine scaled price."""
+    return ADDITIONAL_FEED_PRECISION * 10**FEED_DECIMALS // 10**feed_decimals
+
+
+def get_usd_value(
+    price: int, amount: int, scale: int = ADDITIONAL_FEED_PRECISION
+) -> int:
+    """Mirror of `_usd_value_from_price`."""
+    return ((price * scale) * amount) // PRECISION
+
+
+def get_token_amount_from_usd(
+    price: int, usd_amount_in_wei: int, scale: int = ADDITIONAL_FEED_PRECISION
+) -> int:
+    """Mirror of `_token_amount_from_price`."""
+    return (usd_amount_in_wei * PRECISION) // (price * scale)
+
+
+def get_collateral_value(prices, amounts, scales: Sequence[int] | None = None) -> int:
+    """Mirror of `_get_collateral_value`, token values are floored one by one."""
+    return sum(
+        get_usd_value(price, amount, scale)
+        for price, amount, scale in zip(prices, amounts, _scales(scales, len(prices)))
+    )
+
+
+def collateral_adjusted_for_threshold(total_collateral_value_usd: int) -> int:
+    return (
+        total_collateral_value_usd * LIQUIDATION_THRESHOLD
+    ) // LIQUIDATION_PRECISION
+
+
+def calculate_health_factor(
+    total_dsc_minted: int, total_collateral_value_usd: int
+) -> int:
+    """Mirror of `_calculate_health_factor`."""
+    if total_dsc_minted == 0:
+        return MAX_UINT256
+    return (
+        collateral_adjusted_for_threshold(total_collateral_value_usd) * PRECISION
+    ) // total_dsc_minted
+
+
+def max_liquidatable(
+    dsc_minted: int, prices, amounts, index: int, scales: Sequence[int] | None = None
+) -> int:
+    """
+    Mirror of the `max_liquidatable` view: the largest `debt_to_cover` a
+    `liquidate` of collateral `index` takes, 0 if none.
+
+    @param prices Feed answers, in the order of `COLLATERAL_TOKENS`
+    @param amounts Deposits of the user, same order
+    @param scales Price scales of the feeds, same order
+    @dev the health factor improves for every debt_to_cover or for none,
+        while the collateral is worth more than the debt plus the bonus, so
+        the largest one is bounded by the debt and the deposit of `index` only.
+        Dust whose seized amount or bonus rounds down to nothing is not reported
+    """
+    scales = _scales(scales, len(prices))
+    scale = scales[index]
+    collateral_value = get_collateral_value(prices, amounts, scales)
+    starting_health_factor = calculate_health_factor(dsc_minted, collateral_value)
+    deposited = amounts[index]
+    if deposited == 0 or starting_health_factor >= MIN_HEALTH_FACTOR:
+        return 0
+
+    # @dev largest token amount t with t + t * BONUS // PRECISION <= deposited,
+    # then the largest debt whose token amount rounds down to t
+    token_amount = (deposited * LIQUIDATION_PRECISION + LIQUIDATION_PRECISION - 1) // (
+        LIQUIDATION_PRECISION + LIQUIDATION_BONUS
+    )
+    price = prices[index] * scale
+    debt_to_cover = min(dsc_minted, ((token_amount + 1) * price - 1) // PRECISION)
+    if debt_to_cover == 0:
+        return 0
+
+    token_amount = get_token_amount_from_usd(prices[index], debt_to_cover, scale)
+    collateral_to_seize = (
+        token_amount + (token_amount * LIQUIDATION_BONUS) // LIQUIDATION_PRECISION
+    )
+    ending_health_factor = calculate_health_factor(
+        dsc_minted - debt_to_cover,
+        collateral_value
+        - get_usd_value(prices[index], deposited, scale)
+        + get_usd_value(prices[index], deposited - collateral_to_seize, scale),
+    )
+    if ending_health_factor <= starting_health_factor:
+        return 0
+    return debt_to_cover
+
+
+def min_collateral_value(dsc_minted: int) -> int:
+    """
+    Smallest collateral value, in USD wei, for which `_calculate_health_factor`
+    is at least MIN_HEALTH_FACTOR.
+
+    @dev floor(x / d) < m <=> x < m * d, once for the health factor division
+        and once for the liquidation threshold
+    """
+    min_adjusted = -(-MIN_HEALTH_FACTOR * dsc_minted // PRECISION)
+    return -(-min_adjusted * LIQUIDATION_PRECISION // LIQUIDATION_THRESHOLD)
+
+
+def liquidation_price(
+    dsc_minted: int, prices, amounts, index: int, scales: Sequence[int] | None = None
+) -> int:
+    """
+    Feed answer of collateral `index` below which the health factor drops
+    under MIN_HEALTH_FACTOR, the other answers unchanged: the position is
+    liquidatable iff `prices[index] < liquidation_price(...)`.
+
+    @return 0 when no answer of that feed makes the position liquidatable,
+        or when the user has no debt or no deposit of `index`
+    """
+    deposited = amounts[index]
+    if dsc_minted == 0 or deposited == 0:
+        return 0
+    scales = _scales(scales, len(prices))
+    others = get_collateral_value(prices, amounts, scales) - get_usd_value(
+        prices[index], deposited, scales[index]
+    )
+    # @dev smallest price with get_usd_value(price, deposited) >= missing
+    missing = min_collateral_value(dsc_minted) - others
+    return max(0, -(-missing * PRECISION // (scales[index] * deposited)))
+
+
+def _scales(scales: Sequence[int] | None, count: int) -> Sequence[int]:
+    return [ADDITIONAL_FEED_PRECISION] * count if scales is None else scales
@@ -0,0 +1,570 @@
+"""
+Executable reference model of DSCEngine.
+
+Every external function of src/dsc_engine.vy has a counterpart here that takes
+the caller as its first argument, except `token_to_price_feed`: the model
+knows no feed addresses. State changes, return values and revert
+reasons match the contract bit for bit, including the checked uint256
+arithmetic, the uint112 collateral lanes and which feeds are read. A model and
+a deployment can therefore be driven in lockstep and compared only at
+checkpoints.
+
+Calls are atomic like transactions: a call that raises `EngineRevert` leaves
+the model untouched. Token transfers are assumed to succeed, so the driver is
+expected to fund and approve every account, as the fuzzer does. Feed answers
+are assumed fresh, the oracle_lib staleness checks are not modelled.
+"""
+
+from typing import Iterable, Sequence
+
+from keeper.engine_math import (
+    FEED_DECIMALS,
+    LIQUIDATION_BONUS,
+    LIQUIDATION_PRECISION,
+    LIQUIDATION_THRESHOLD,
+    MAX_UINT256,
+    MIN_HEALTH_FACTOR,
+    PRECISION,
+    price_scale,
+)
+
+# @dev keep in sync with the errors of src/dsc_engine.vy
+DSC_ENGINE_NEEDS_MORE_THAN_ZERO = "dsce_engine: needs more than zero"
+DSC_ENGINE_TOKEN_NOT_ALLOWED = "dsce_engine: token not allowed"
+DSC_ENGINE_HEALTH_FACTOR_BROKEN = "dsce_engine: health factor broken"
+DSC_ENGINE_HEALTH_FACTOR_GOOD = "dsce_engine: health factor good"
+DSC_ENGINE_DID_NOT_IMPROVE_HEALTH_FACTOR = "dsce_engine: did not improve health factor"
+ORACLE_LIB_INVALID_PRICE = "oracle_lib: invalid price"
+
+COLLATERAL_LANE_BITS = 112
+COLLATERAL_LANE_MASK = 2**112 - 1
+MAX_COLLATERAL_TOKENS = 32
+MAX_COLLATERAL_DEPOSITS = 8
+MAX_LIQUIDATIONS = 256
+
+
+class EngineRevert(Exception):
+    """
+    A call the contract would revert.
+
+    @param reason Revert string of the engine, None for a bare revert
+        (overflow, division by zero, negative price, ...)
+    """
+
+    def __init__(self, reason: str | None = None):
+        super().__init__(reason or "revert")
+        self.reason = reason
+
+
+class Position:
+    """
+    Mirror of a position, every collateral amount packed in one int with a
+    uint112 lane per token. The engine `held` bitmap is the set of non-zero lanes.
+    """
+
+    __slots__ = ("collateral", "dsc_minted")
+
+    def __init__(self, collateral: int = 0, dsc_minted: int = 0):
+        self.collateral = collateral
+        self.dsc_minted = dsc_minted
+
+
+class EngineModel:
+    def __init__(
+        self,
+        tokens: Sequence[str],
+        prices: Sequence[int],
+        feed_decimals: Sequence[int] | None = None,
+    ):
+        """
+        @param tokens Collateral tokens, in the order of `COLLATERAL_TOKENS`
+        @param prices Feed answers, in the order of `tokens`
+        @param feed_decimals Decimals of each feed, 8 for all by default
+        """
+        self.tokens = [str(token) for token in tokens]
+        self.prices = [int(price) for price in prices]
+        self.price_scales = [
+            price_scale(decimals)
+            for decimals in (feed_decimals or [FEED_DECIMALS] * len(self.tokens))
+        ]
+        self.positions: dict[str, Position] = {}
+        # @dev what the engine holds of each collateral and the DSC it minted
+        self.collateral_held = [0] * len(self.tokens)
+        self.dsc_total_supply = 0
+
+    def set_price(self, token: str, price: int):
+        """Mirror of an `updateAnswer` on the price feed of `token`."""
+        self.prices[self.tokens.index(str(token))] = int(price)
+
+    # ------------------------------------------------------------------
+    #                        EXTERNAL FUNCTIONS
+    # ------------------------------------------------------------------
+    def deposit_collateral(self, sender: str, token: str, amount: int):
+        position = self._position(sender)
+        collateral = self._add_collateral(position.collateral, token, amount)
+
+        position.collateral = collateral
+        self.collateral_held[self._collateral_index(token)] += amount
+        self._store(sender, position)
+
+    def mint_dsc(self, sender: str, amount: int):
+        position = self._position(sender)
+        self._mint_dsc(sender, position, amount)
+        self._store(sender, position)
+
+    def redeem_collateral(self, sender: str, token: str, amount: int):
+        position = self._position(sender)
+        self._redeem_collateral(position, token, amount)
+        self._revert_if_health_factor_broken(position)
+
+        self.collateral_held[self._collateral_index(token)] -= amount
+        self._store(sender, position)
+
+    def deposit_and_mint(
+        self, sender: str, token: str, amount_collateral: int, amount_dsc: int
+    ):
+        self.deposit_many_and_mint(sender, [(token, amount_collateral)], amount_dsc)
+
+    def deposit_many_and_mint(
+        self, sender: str, deposits: Iterable[tuple[str, int]], amount_dsc: int
+    ):
+        deposits = [(str(token), int(amount)) for token, amount in deposits]
+        if len(deposits) > MAX_COLLATERAL_DEPOSITS:
+            raise EngineRevert()
+        position = self._position(sender)
+        for token, amount in deposits:
+            position.collateral = self._add_collateral(
+                position.collateral, token, amount
+            )
+        self._mint_dsc(sender, position, amount_dsc)
+
+        for token, amount in deposits:
+            self.collateral_held[self._collateral_index(token)] += amount
+        self._store(sender, position)
+
+    def redeem_for_dsc(
+        self, sender: str, token: str, amount_collateral: int, amount_dsc: int
+    ):
+        position = self._position(sender)
+        position.dsc_minted = _sub(position.dsc_minted, amount_dsc)
+        self._redeem_collateral(position, token, amount_collateral)
+        self._revert_if_health_factor_broken(position)
+
+        self.dsc_total_supply -= amount_dsc
+        self.collateral_held[self._collateral_index(token)] -= amount_collateral
+        self._store(sender, position)
+
+    def burn_dsc(self, sender: str, amount: int):
+        position = self._position(sender)
+        position.dsc_minted = _sub(position.dsc_minted, amount)
+
+        self.dsc_total_supply -= amount
+        self._store(sender, position)
+
+    def liquidate(self, sender: str, collateral: str, user: str, debt_to_cover: int):
+        if debt_to_cover == 0:
+            raise EngineRevert(DSC_ENGINE_NEEDS_MORE_THAN_ZERO)
+        position = self._position(user)
+        held = _held(position.collateral) | self._checked_held(sender)
+        if str(collateral) in self.tokens:
+            held |= 1 << self.tokens.index(str(collateral))
+        prices = self._get_prices(held)
+        starting_health_factor = self._health_factor_at(position, prices)
+        if starting_health_factor >= MIN_HEALTH_FACTOR:
+            raise EngineRevert(DSC_ENGINE_HEALTH_FACTOR_GOOD)
+
+        index = self._collateral_index(collateral)
+        token_amount = _token_amount_from_price(prices[index], debt_to_cover)
+        bonus_collateral = _mul(token_amount, LIQUIDATION_BONUS) // LIQUIDATION_PRECISION
+        to_seize = _add(token_amount, bonus_collateral)
+
+        self._redeem_collateral(position, collateral, to_seize)
+        position.dsc_minted = _sub(position.dsc_minted, debt_to_cover)
+        ending_health_factor = self._health_factor_at(position, prices)
+        if ending_health_factor <= starting_health_factor:
+            raise EngineRevert(DSC_ENGINE_DID_NOT_IMPROVE_HEALTH_FACTOR)
+        liquidator = (
+            position if str(sender) == str(user) else self._position(sender)
+        )
+        self._revert_if_health_factor_broken_at(liquidator, prices)
+
+        self.dsc_total_supply -= debt_to_cover
+        self.collateral_held[index] -= to_seize
+        self._store(user, position)
+
+    def liquidate_many(
+        self, sender: str, liquidations: Iterable[tuple[str, str, int]]
+    ) -> int:
+        """@param liquidations (user, collateral, debt_to_cover) entries"""
+        liquidations = list(liquidations)
+        if len(liquidations) > MAX_LIQUIDATIONS:
+            raise EngineRevert()
+        held = self._checked_held(sender)
+        for user, collateral, _ in liquidations:
+            held |= _held(self._position(user).collateral)
+            if str(collateral) in self.tokens:
+                held |= 1 << self.tokens.index(str(collateral))
+        prices = self._get_prices(held)
+        updated: dict[str, Position] = {}
+        seized = [0] * len(self.tokens)
+        total_debt_covered = 0
+        liquidated = 0
+
+        for user, collateral, debt_to_cover in liquidations:
+            user, collateral = str(user), str(collateral)
+            if debt_to_cover == 0 or collateral not in self.tokens:
+                continue
+            index = self.tokens.index(collateral)
+            stored = updated.get(user) or self._position(user)
+            if debt_to_cover > stored.dsc_minted:
+                continue
+            starting_health_factor = self._health_factor_at(stored, prices)
+            if starting_health_factor >= MIN_HEALTH_FACTOR:
+                continue
+
+            token_amount = _token_amount_from_price(prices[index], debt_to_cover)
+            to_seize = _add(
+                token_amount,
+                _mul(token_amount, LIQUIDATION_BONUS) // LIQUIDATION_PRECISION,
+            )
+            deposited = _unpack_collateral(stored.collateral, index)
+            if to_seize > deposited:
+                continue
+
+            position = Position(
+                _pack_collateral(stored.collateral, index, deposited - to_seize),
+                stored.dsc_minted - debt_to_cover,
+            )
+            if self._health_factor_at(position, prices) <= starting_health_factor:
+                continue
+
+            updated[user] = position
+            seized[index] = _add(seized[index], to_seize)
+            total_debt_covered = _add(total_debt_covered, debt_to_cover)
+            liquidated += 1
+
+        liquidator = updated.get(str(sender)) or self._position(sender)
+        self._revert_if_health_factor_broken_at(liquidator, prices)
+
+        for user, position in updated.items():
+            self._store(user, position)
+        for index, amount in enumerate(seized):
+            self.collateral_held[index] -= amount
+        self.dsc_total_supply -= total_debt_covered
+        return liquidated
+
+    # @dev a failed permit does not revert and transfers are assumed to
+    # succeed, so a `*_with_permit` call is its plain variant. `permit` is the
+    # (deadline, v, r, s) signature, left unchecked
+    def deposit_collateral_with_permit(
+        self, sender: str, token: str, amount: int, permit: tuple
+    ):
+        self.deposit_collateral(sender, token, amount)
+
+    def deposit_and_mint_with_permit(
+        self,
+        sender: str,
+        token: str,
+        amount_collateral: int,
+        amount_dsc: int,
+        permit: tuple,
+    ):
+        self.deposit_and_mint(sender, token, amount_collateral, amount_dsc)
+
+    def redeem_for_dsc_with_permit(
+        self,
+        sender: str,
+        token: str,
+        amount_collateral: int,
+        amount_dsc: int,
+        permit: tuple,
+    ):
+        self.redeem_for_dsc(sender, token, amount_collateral, amount_dsc)
+
+    def burn_dsc_with_permit(self, sender: str, amount: int, permit: tuple):
+        self.burn_dsc(sender, amount)
+
+    def liquidate_with_permit(
+        self,
+        sender: str,
+        collateral: str,
+        user: str,
+        debt_to_cover: int,
+        permit: tuple,
+    ):
+        self.liquidate(sender, collateral, user, debt_to_cover)
+
+    # ------------------------------------------------------------------
+    #                          VIEW FUNCTIONS
+    # ------------------------------------------------------------------
+    def get_health_factor(self, user: str) -> int:
+        position = self._position(user)
+        if position.dsc_minted == 0:
+            return MAX_UINT256
+        return self._health_factor_at(
+            position, self._get_prices(_held(position.collateral))
+        )
+
+    def get_account_information(self, user: str) -> tuple[int, int]:
+        position = self._position(user)
+        return (
+            position.dsc_minted,
+            _get_collateral_value(
+                position.collateral, self._get_prices(_held(position.collateral))
+            ),
+        )
+
+    def get_collateral_tokens(self) -> list[str]:
+        return list(self.tokens)
+
+    def get_held_collateral(self, user: str) -> int:
+        return _held(self._position(user).collateral)
+
+    def get_collateral_balance_of_user(self, user: str, token: str) -> int:
+        if str(token) not in self.tokens:
+            return 0
+        return _unpack_collateral(
+            self._position(user).collateral, self.tokens.index(str(token))
+        )
+
+    def user_to_token_to_amount_deposited(self, user: str, token: str) -> int:
+        return self.get_collateral_balance_of_user(user, token)
+
+    def user_to_dsc_minted(self, user: str) -> int:
+        return self._position(user).dsc_minted
+
+    def total_dsc_minted(self) -> int:
+        return self.dsc_total_supply
+
+    def get_total_collateral(self, token: str) -> int:
+        if str(token) not in self.tokens:
+            return 0
+        return self.collateral_held[self.tokens.index(str(token))]
+
+    def get_collateralization_ratio(self) -> int:
+        if self.dsc_total_supply == 0:
+            return MAX_UINT256
+        held = sum(1 << i for i, amount in enumerate(self.collateral_held) if amount)
+        prices = self._get_prices(held)
+        total_collateral_value_usd = 0
+        for price, amount in zip(prices, self.collateral_held):
+            total_collateral_value_usd = _add(
+                total_collateral_value_usd, _usd_value_from_price(price, amount)
+            )
+        return _div(_mul(total_collateral_value_usd, PRECISION), self.dsc_total_supply)
+
+    def max_liquidatable(self, user: str, collateral: str) -> int:
+        if str(collateral) not in self.tokens:
+            return 0
+        index = self.tokens.index(str(collateral))
+        position = self._position(user)
+        held = _held(position.collateral)
+        if position.dsc_minted == 0 or not held >> index & 1:
+            return 0
+        prices = self._get_prices(held)
+        collateral_value = _get_collateral_value(position.collateral, prices)
+        starting_health_factor = _calculate_health_factor(
+            position.dsc_minted, collateral_value
+        )
+        if starting_health_factor >= MIN_HEALTH_FACTOR:
+            return 0
+
+        deposited = _unpack_collateral(position.collateral, index)
+        token_amount = (deposited * LIQUIDATION_PRECISION + LIQUIDATION_PRECISION - 1) // (
+            LIQUIDATION_PRECISION + LIQUIDATION_BONUS
+        )
+        debt_to_cover = min(
+            position.dsc_minted,
+            (_mul(token_amount + 1, prices[index]) - 1) // PRECISION,
+        )
+        if debt_to_cover == 0:
+            return 0
+
+        token_amount = _token_amount_from_price(prices[index], debt_to_cover)
+        to_seize = token_amount + token_amount * LIQUIDATION_BONUS // LIQUIDATION_PRECISION
+        ending_health_factor = _calculate_health_factor(
+            position.dsc_minted - debt_to_cover,
+            collateral_value
+            - _usd_value_from_price(prices[index], deposited)
+            + _usd_value_from_price(prices[index], deposited - to_seize),
+        )
+        if ending_health_factor <= starting_health_factor:
+            return 0
+        return debt_to_cover
+
+    def get_usd_value(self, token: str, amount: int) -> int:
+        return _usd_value_from_price(self._get_price(token), amount)
+
+    def get_token_amount_from_usd(self, token: str, usd_amount_in_wei: int) -> int:
+        return _token_amount_from_price(self._get_price(token), usd_amount_in_wei)
+
+    def calculate_health_factor(
+        self, total_dsc_minted: int, total_collateral_value_usd: int
+    ) -> int:
+        return _calculate_health_factor(total_dsc_minted, total_collateral_value_usd)
+
+    # ------------------------------------------------------------------
+    #                        INTERNAL FUNCTIONS
+    # ------------------------------------------------------------------
+    def _position(self, user: str) -> Position:
+        """Working copy of a position, written back by `_store`."""
+        stored = self.positions.get(str(user))
+        if stored is None:
+            return Position()
+        return Position(stored.collateral, stored.dsc_minted)
+
+    def _store(self, user: str, position: Position):
+        if position.collateral == 0 and position.dsc_minted == 0:
+            self.positions.pop(str(user), None)
+        else:
+            self.positions[str(user)] = position
+
+    def _add_collateral(self, packed: int, token: str, amount: int) -> int:
+        if amount == 0:
+            raise EngineRevert(DSC_ENGINE_NEEDS_MORE_THAN_ZERO)
+        index = self._collateral_index(token)
+        return _pack_collateral(
+            packed, index, _add(_unpack_collateral(packed, index), amount)
+        )
+
+    def _redeem_collateral(self, position: Position, token: str, amount: int):
+        index = self._collateral_index(token)
+        position.collateral = _pack_collateral(
+            position.collateral,
+            index,
+            _sub(_unpack_collateral(position.collateral, index), amount),
+        )
+
+    def _mint_dsc(self, sender: str, position: Position, amount: int):
+        if amount == 0:
+            raise EngineRevert(DSC_ENGINE_NEEDS_MORE_THAN_ZERO)
+        position.dsc_minted = _add(position.dsc_minted, amount)
+        self._revert_if_health_factor_broken(position)
+        self.dsc_total_supply = _add(self.dsc_total_supply, amount)
+
+    def _revert_if_health_factor_broken(self, position: Position):
+        """@dev no debt, no check: the feeds are not read"""
+        if position.dsc_minted == 0:
+            return
+        self._revert_if_health_factor_broken_at(
+            position, self._get_prices(_held(position.collateral))
+        )
+
+    def _revert_if_health_factor_broken_at(
+        self, position: Position, prices: Sequence[int]
+    ):
+        if self._health_factor_at(position, prices) < MIN_HEALTH_FACTOR:
+            raise EngineRevert(DSC_ENGINE_HEALTH_FACTOR_BROKEN)
+
+    def _checked_held(self, user: str) -> int:
+        """Tokens priced for a final health check of `user`, none without debt."""
+        position = self._position(user)
+        return _held(position.collateral) if position.dsc_minted else 0
+
+    def _health_factor_at(self, position: Position, prices: Sequence[int]) -> int:
+        if position.dsc_minted == 0:
+            return MAX_UINT256
+        return _calculate_health_factor(
+            position.dsc_minted, _get_collateral_value(position.collateral, prices)
+        )
+
+    def _collateral_index(self, token: str) -> int:
+        if str(token) not in self.tokens:
+            raise EngineRevert(DSC_ENGINE_TOKEN_NOT_ALLOWED)
+        return self.tokens.index(str(token))
+
+    def _get_prices(self, held: int) -> list[int]:
+        """@dev only the feeds of the tokens set in `held` are read, the rest is 0"""
+        return [
+            self._get_scaled_price(index) if held >> index & 1 else 0
+            for index in range(len(self.tokens))
+        ]
+
+    def _get_price(self, token: str) -> int:
+        return self._get_scaled_price(self._collateral_index(token))
+
+    def _get_scaled_price(self, index: int) -> int:
+        price = self.prices[index]
+        if price <= 0:
+            raise EngineRevert(ORACLE_LIB_INVALID_PRICE)
+        return _mul(price, self.price_scales[index])
+
+
+# ------------------------------------------------------------------
+#                          CHECKED MATH
+# ------------------------------------------------------------------
+def _add(a: int, b: int) -> int:
+    if a + b > MAX_UINT256:
+        raise EngineRevert()
+    return a + b
+
+
+def _sub(a: int, b: int) -> int:
+    if b > a:
+        raise EngineRevert()
+    return a - b
+
+
+def _mul(a: int, b: int) -> int:
+    if a * b > MAX_UINT256:
+        raise EngineRevert()
+    return a * b
+
+
+def _div(a: int, b: int) -> int:
+    if b == 0:
+        raise EngineRevert()
+    return a // b
+
+
+def _held(packed: int) -> int:
+    """Bitmap of the non-zero lanes of a packed collateral int."""
+    held = 0
+    index = 0
+    while packed:
+        if packed & COLLATERAL_LANE_MASK:
+            held |= 1 << index
+        packed >>= COLLATERAL_LANE_BITS
+        index += 1
+    return held
+
+
+def _unpack_collateral(packed: int, index: int) -> int:
+    return (packed >> (index * COLLATERAL_LANE_BITS)) & COLLATERAL_LANE_MASK
+
+
+def _pack_collateral(packed: int, index: int, amount: int) -> int:
+    """@dev reverts if `amount` does not fit in a uint112 lane"""
+    if amount > COLLATERAL_LANE_MASK:
+        raise EngineRevert()
+    offset = index * COLLATERAL_LANE_BITS
+    return (packed & ~(COLLATERAL_LANE_MASK << offset)) | (amount << offset)
+
+
+def _get_collateral_value(packed: int, prices: Sequence[int]) -> int:
+    total_collateral_value_usd = 0
+    for index, price in enumerate(prices):
+        total_collateral_value_usd = _add(
+            total_collateral_value_usd,
+            _usd_value_from_price(price, _unpack_collateral(packed, index)),
+        )
+    return total_collateral_value_usd
+
+
+def _usd_value_from_price(price: int, amount: int) -> int:
+    return _mul(price, amount) // PRECISION
+
+
+def _token_amount_from_price(price: int, usd_amount_in_wei: int) -> int:
+    return _div(_mul(usd_amount_in_wei, PRECISION), price)
+
+
+def _calculate_health_factor(
+    total_dsc_minted: int, total_collateral_value_usd: int
+) -> int:
+    if total_dsc_minted == 0:
+        return MAX_UINT256
+    collateral_adjusted_for_threshold_usd = (
+        _mul(total_collateral_value_usd, LIQUIDATION_THRESHOLD) // LIQUIDATION_PRECISION
+    )
+    return _mul(collateral_adjusted_for_threshold_usd, PRECISION) // total_dsc_minted
@@ -0,0 +1,197 @@
+"""
+Gas profile of engine calls, by internal function and by external call.
+
+Boa's own profiler sums gas per pc and per source line. Here the gas of every
+step is recorded in execution order instead, so the call stack of the internal
+functions can be rebuilt from the source map: a step belongs to the function
+its pc maps to, reaching a function not on the stack yet is a call, going back
+to one already on it a return. Calls to other contracts (feed staticcalls,
+token transfers) are profiled the same way and nest under the stack of the
+caller. Precompiles and contracts boa has no source for are leaves.
+
+Gas is execution gas, as tests/gas measures it, written as folded stacks: one
+`frame;frame;frame gas` line per stack, the input of flamegraph.pl,
+inferno-flamegraph and speedscope.
+"""
+
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+import boa
+from boa.contracts.vyper.ast_utils import get_fn_ancestor_from_node
+from boa.contracts.vyper.vyper_contract import VyperContract
+from eth.vm.gas_meter import GasMeter
+from eth_utils import to_checksum_address
+
+# @dev CALL, CALLCODE, DELEGATECALL, STATICCALL, the steps that run a child
+CALL_OPCODES = frozenset((0xF1, 0xF2, 0xF4, 0xFA))
+
+
+class StepGasMeter(GasMeter):
+    """Gas meter keeping the gas of every step, by index in the opcode trace."""
+
+    def __init__(self, start_gas, *args, **kwargs):
+        super().__init__(start_gas, *args, **kwargs)
+        self.step_gas: dict[int, int] = {}
+
+    def _set_code(self, code):
+        # @dev called by boa with its TracingCodeStream
+        self._code = code
+
+    def consume_gas(self, amount: int, reason: str) -> None:
+        super().consume_gas(amount, reason)
+        self._add(amount)
+
+    def return_gas(self, amount: int) -> None:
+        super().return_gas(amount)
+        self._add(-amount)
+
+    def _add(self, amount: int):
+        step = max(len(self._code._trace) - 1, 0)
+        self.step_gas[step] = self.step_gas.get(step, 0) + amount
+
+
+@contextmanager
+def gas_profiling() -> Iterator[None]:
+    """Calls made inside the block can be profiled, py-evm only."""
+    with boa.env.gas_meter_class(StepGasMeter):
+        yield
+
+
+# ------------------------------------------------------------------
+#                              PROFILE
+# ------------------------------------------------------------------
+@dataclass(frozen=True)
+class GasProfile:
+    # @dev call stack -> gas spent with exactly that stack, the self gas of
+    # its last frame
+    stacks: dict[tuple[str, ...], int]
+
+    @classmethod
+    def of(cls, computation) -> "GasProfile":
+        """@param computation A computation run inside `gas_profiling`"""
+        stacks: Counter = Counter()
+        _fold(computation, (), stacks)
+        return cls(dict(stacks))
+
+    @property
+    def total(self) -> int:
+        return sum(self.stacks.values())
+
+    def merge(self, other: "GasProfile") -> "GasProfile":
+        return GasProfile(dict(Counter(self.stacks) + Counter(other.stacks)))
+
+    def functions(self) -> dict[str, tuple[int, int]]:
+        """
+        @return Frame -> (self gas, inclusive gas), a frame being a function
+            of a contract, or a contract at the root of its calls
+        """
+        own: Counter = Counter()
+        inclusive: Counter = Counter()
+        for stack, gas in self.stacks.items():
+            own[stack[-1]] += gas
+            for frame in set(stack):
+                inclusive[frame] += gas
+        return {frame: (own[frame], inclusive[frame]) for frame in inclusive}
+
+    def folded(self) -> str:
+        return "".join(
+            f"{';'.join(stack)} {gas}\n"
+            for stack, gas in sorted(self.stacks.items())
+            if gas > 0
+        )
+
+    def write_folded(self, path: str | Path):
+        Path(path).write_text(self.folded())
+
+    def format(self, top: int = 20) -> str:
+        rows = sorted(self.functions().items(), key=lambda row: -row[1][1])[:top]
+        width = max((len(frame) for frame, _ in rows), default=0)
+        lines = [f"{'frame':<{width}}  {'self':>9}  {'inclusive':>9}  share"]
+        for frame, (own, inclusive) in rows:
+            lines.append(
+                f"{frame:<{width}}  {own:>9,}  {inclusive:>9,}  "
+                f"{inclusive / self.total:>5.1%}"
+            )
+        lines.append(f"{'total':<{width}}  {'':>9}  {self.total:>9,}")
+        return "\n".join(lines)
+
+
+def profile_call(contract, fn_name: str, *args, sender: str) -> GasProfile:
+    """`contract.fn_name(*args)` as its own transaction, cold, and its profile."""
+    _reset_access_lists()
+    with gas_profiling(), boa.env.prank(sender):
+        getattr(contract, fn_name)(*args)
+    return GasProfile.of(contract._computation)
+
+
+# ------------------------------------------------------------------
+#                            INTERNALS
+# ------------------------------------------------------------------
+def _fold(computation, prefix: tuple[str, ...], stacks: Counter):
+    contract = boa.env._lookup_contract_fast(computation.msg.code_address)
+    root = prefix + (_contract_label(contract, computation.msg.code_address),)
+    step_gas = getattr(computation._gas_meter, "step_gas", None)
+    if step_gas is None or not isinstance(contract, VyperContract):
+        stacks[root] += computation.get_gas_used()
+        return
+
+    functions = _functions(contract)
+    code = computation.code
+    children = iter(zip(computation._child_pcs, computation.children))
+    child = next(children, None)
+    frames: list[str] = []
+    for step, pc in enumerate(code._trace):
+        function = functions.get(pc)
+        if function is not None and (not frames or function != frames[-1]):
+            if function in frames:
+                del frames[frames.index(function) + 1 :]
+            else:
+                frames.append(function)
+        gas = step_gas.get(step, 0)
+        # @dev a child is added with the pc past its call opcode
+        if (
+            child is not None
+            and pc == child[0] - 1
+            and code._raw_code_bytes[pc] in CALL_OPCODES
+        ):
+            gas -= child[1].get_gas_used()
+            _fold(child[1], root + tuple(frames), stacks)
+            child = next(children, None)
+        if gas:
+            stacks[root + tuple(frames)] += gas
+
+
+_FUNCTIONS: dict[int, dict[int, str]] = {}
+
+
+def _functions(contract: VyperContract) -> dict[int, str]:
+    """@dev pc -> function it belongs to, `module.function` for modules"""
+    key = id(contract.compiler_data)
+    if key not in _FUNCTIONS:
+        main = Path(contract.compiler_data.contract_path).stem
+        functions = {}
+        for pc, node in contract.source_map["pc_raw_ast_map"].items():
+            function = get_fn_ancestor_from_node(node)
+            if function is None:
+                continue
+            module = Path(node.module_node.resolved_path).stem
+            functions[pc] = (
+                function.name if module == main else f"{module}.{function.name}"
+            )
+        _FUNCTIONS[key] = functions
+    return _FUNCTIONS[key]
+
+
+def _contract_label(contract, address: bytes) -> str:
+    if contract is not None:
+        return contract.contract_name
+    return to_checksum_address(address)
+
+
+def _reset_access_lists():
+    """@dev Cold accounts and slots, as for a fresh transaction, see tests/gas"""
+    boa.env.evm.vm.state._account_db._journal_accessed_state.clear()
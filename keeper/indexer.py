@@ -0,0 +1,400 @@
+"""
+Incremental DSCEngine event indexer.
+
+Pulls engine logs block range by block range and folds them into per-user,
+per-token collateral and per-user debt tables of a local SQLite database.
+The last indexed block is committed together with the positions, so an
+interrupted run resumes exactly where it stopped.
+
+`CollatoralDeposited` carries no token field: the token of a deposit is
+recovered from the collateral `Transfer(user -> engine, amount)` emitted by
+the same transaction, deposits and transfers being paired in log order.
+"""
+
+import bisect
+import json
+import sqlite3
+import urllib.request
+from dataclasses import dataclass
+from typing import Iterable, Protocol, Sequence
+
+from eth_utils import keccak
+
+COLLATERAL_DEPOSITED_TOPIC = int.from_bytes(
+    keccak(text="CollatoralDeposited(address,uint256)"), "big"
+)
+COLLATERAL_REDEEMED_TOPIC = int.from_bytes(
+    keccak(text="CollateralRedeemed(address,uint256,address,address)"), "big"
+)
+DSC_MINTED_TOPIC = int.from_bytes(keccak(text="DscMinted(address,uint256)"), "big")
+DSC_BURNED_TOPIC = int.from_bytes(
+    keccak(text="DscBurned(address,address,uint256)"), "big"
+)
+TRANSFER_TOPIC = int.from_bytes(
+    keccak(text="Transfer(address,address,uint256)"), "big"
+)
+
+DEFAULT_BLOCK_RANGE = 2_000
+
+
+@dataclass(frozen=True, slots=True)
+class Log:
+    block_number: int
+    tx_index: int
+    log_index: int
+    address: str
+    topics: tuple[int, ...]
+    data: bytes
+
+
+class LogSource(Protocol):
+    def latest_block(self) -> int: ...
+
+    def get_logs(
+        self,
+        from_block: int,
+        to_block: int,
+        addresses: Sequence[str],
+        topics: Sequence[int | list[int] | None],
+    ) -> list[Log]: ...
+
+
+# ------------------------------------------------------------------
+#                           LOG SOURCES
+# ------------------------------------------------------------------
+class JsonRpcLogSource:
+    """`eth_getLogs` over JSON-RPC, e.g. an anvil node."""
+
+    def __init__(self, rpc_url: str, timeout: float = 30):
+        self.rpc_url = rpc_url
+        self.timeout = timeout
+        self._id = 0
+
+    def latest_block(self) -> int:
+        return int(self._request("eth_blockNumber", []), 16)
+
+    def get_logs(self, from_block, to_block, addresses, topics) -> list[Log]:
+        params = {
+            "fromBlock": hex(from_block),
+            "toBlock": hex(to_block),
+            "address": [_normalize(address) for address in addresses],
+            "topics": [_topic_filter(topic) for topic in topics],
+        }
+        return [
+            Log(
+                block_number=int(raw["blockNumber"], 16),
+                tx_index=int(raw["transactionIndex"], 16),
+                log_index=int(raw["logIndex"], 16),
+                address=_normalize(raw["address"]),
+                topics=tuple(int(topic, 16) for topic in raw["topics"]),
+                data=bytes.fromhex(raw["data"][2:]),
+            )
+            for raw in self._request("eth_getLogs", [params])
+        ]
+
+    def _request(self, method: str, params: list):
+        self._id += 1
+        body = json.dumps(
+            {"jsonrpc": "2.0", "id": self._id, "method": method, "params": params}
+        ).encode()
+        request = urllib.request.Request(
+            self.rpc_url, body, {"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            reply = json.loads(response.read())
+        if "error" in reply:
+            raise RuntimeError(f"{method} failed: {reply['error']}")
+        return reply["result"]
+
+
+class RecordedLogSource:
+    """
+    In-memory log source for a boa (py-evm) chain, which has no `eth_getLogs`.
+
+    Call `record(contract)` after each transaction sent through a boa contract
+    to capture every log of its call tree at the current block number.
+    """
+
+    def __init__(self):
+        self.logs: list[Log] = []
+        self._block_numbers: list[int] = []
+        self._tx_index: dict[int, int] = {}
+
+    def record(self, contract):
+        import boa
+
+        block_number = boa.env.evm.patch.block_number
+        self.append(block_number, contract._computation.get_raw_log_entries())
+
+    def append(self, block_number: int, raw_log_entries: Iterable[tuple]):
+        """Append the logs of one transaction, blocks must not go backwards."""
+        if self._block_numbers and block_number < self._block_numbers[-1]:
+            raise ValueError("logs must be recorded in block order")
+        tx_index = self._tx_index.get(block_number, 0)
+        self._tx_index[block_number] = tx_index + 1
+        for log_index, (_, address, topics, data) in enumerate(raw_log_entries):
+            self.logs.append(
+                Log(
+                    block_number,
+                    tx_index,
+                    log_index,
+                    _normalize(address),
+                    tuple(topics),
+                    bytes(data),
+                )
+            )
+            self._block_numbers.append(block_number)
+
+    def latest_block(self) -> int:
+        return self._block_numbers[-1] if self._block_numbers else 0
+
+    def get_logs(self, from_block, to_block, addresses, topics) -> list[Log]:
+        addresses = {_normalize(address) for address in addresses}
+        start = bisect.bisect_left(self._block_numbers, from_block)
+        end = bisect.bisect_right(self._block_numbers, to_block)
+        return [
+            log
+            for log in self.logs[start:end]
+            if log.address in addresses and _match_topics(log.topics, topics)
+        ]
+
+
+# ------------------------------------------------------------------
+#                               STORE
+# ------------------------------------------------------------------
+class PositionStore:
+    """SQLite tables of collateral per (user, token), debt per user and the checkpoint."""
+
+    def __init__(self, path: str = ":memory:"):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS collateral (
+                user TEXT NOT NULL,
+                token TEXT NOT NULL,
+                amount TEXT NOT NULL,
+                PRIMARY KEY (user, token)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS debt (
+                user TEXT PRIMARY KEY,
+                dsc_minted TEXT NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS checkpoint (
+                engine TEXT PRIMARY KEY,
+                last_block INTEGER NOT NULL
+            );
+            """
+        )
+
+    def last_block(self, engine: str) -> int | None:
+        row = self.connection.execute(
+            "SELECT last_block FROM checkpoint WHERE engine = ?", (_normalize(engine),)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def collateral(self, user: str, token: str) -> int:
+        row = self.connection.execute(
+            "SELECT amount FROM collateral WHERE user = ? AND token = ?",
+            (_normalize(user), _normalize(token)),
+        ).fetchone()
+        return 0 if row is None else int(row[0])
+
+    def dsc_minted(self, user: str) -> int:
+        row = self.connection.execute(
+            "SELECT dsc_minted FROM debt WHERE user = ?", (_normalize(user),)
+        ).fetchone()
+        return 0 if row is None else int(row[0])
+
+    def positions(self) -> dict[str, dict[str, int]]:
+        """Every indexed position as {user: {token: amount}}."""
+        positions: dict[str, dict[str, int]] = {}
+        for user, token, amount in self.connection.execute(
+            "SELECT user, token, amount FROM collateral"
+        ):
+            positions.setdefault(user, {})[token] = int(amount)
+        return positions
+
+    def apply(
+        self,
+        engine: str,
+        last_block: int,
+        collateral_deltas: dict[tuple[str, str], int],
+        debt_deltas: dict[str, int],
+    ):
+        """Fold a batch of deltas and move the checkpoint, atomically."""
+        with self.connection:
+            self._apply_deltas(
+                "collateral", "amount", "user = ? AND token = ?", collateral_deltas
+            )
+            self._apply_deltas(
+                "debt",
+                "dsc_minted",
+                "user = ?",
+                {(user,): delta for user, delta in debt_deltas.items()},
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO checkpoint (engine, last_block) VALUES (?, ?)",
+                (_normalize(engine), last_block),
+            )
+
+    def _apply_deltas(self, table: str, column: str, where: str, deltas: dict):
+        if not deltas:
+            return
+        select = f"SELECT {column} FROM {table} WHERE {where}"
+        rows = []
+        for key, delta in deltas.items():
+            current = self.connection.execute(select, key).fetchone()
+            rows.append((*key, str((0 if current is None else int(current[0])) + delta)))
+        placeholders = ", ".join("?" * len(rows[0]))
+        self.connection.executemany(
+            f"INSERT OR REPLACE INTO {table} VALUES ({placeholders})", rows
+        )
+
+
+# ------------------------------------------------------------------
+#                              INDEXER
+# ------------------------------------------------------------------
+class EngineIndexer:
+    def __init__(
+        self,
+        source: LogSource,
+        store: PositionStore,
+        engine: str,
+        collateral_tokens: Sequence[str],
+        start_block: int = 0,
+        block_range: int = DEFAULT_BLOCK_RANGE,
+    ):
+        self.source = source
+        self.store = store
+        self.engine = _normalize(engine)
+        self.collateral_tokens = [_normalize(token) for token in collateral_tokens]
+        self.start_block = start_block
+        self.block_range = block_range
+
+    def sync(self, to_block: int | None = None) -> int:
+        """
+        Index every block from the checkpoint up to `to_block` (latest by default).
+
+        @return int Number of engine events processed
+        """
+        if to_block is None:
+            to_block = self.source.latest_block()
+        last_block = self.store.last_block(self.engine)
+        from_block = self.start_block if last_block is None else last_block + 1
+
+        processed = 0
+        while from_block <= to_block:
+            range_end = min(from_block + self.block_range - 1, to_block)
+            processed += self._index_range(from_block, range_end)
+            from_block = range_end + 1
+        return processed
+
+    def _index_range(self, from_block: int, to_block: int) -> int:
+        engine_logs = self.source.get_logs(
+            from_block,
+            to_block,
+            [self.engine],
+            [
+                [
+                    COLLATERAL_DEPOSITED_TOPIC,
+                    COLLATERAL_REDEEMED_TOPIC,
+                    DSC_MINTED_TOPIC,
+                    DSC_BURNED_TOPIC,
+                ]
+            ],
+        )
+        transfers_in = self.source.get_logs(
+            from_block,
+            to_block,
+            self.collateral_tokens,
+            [TRANSFER_TOPIC, None, _address_to_topic(self.engine)],
+        )
+
+        # @dev pending collateral transfers into the engine, per transaction
+        transfers_by_tx: dict[tuple[int, int], list[Log]] = {}
+        for transfer in sorted(transfers_in, key=_log_order):
+            key = (transfer.block_number, transfer.tx_index)
+            transfers_by_tx.setdefault(key, []).append(transfer)
+
+        collateral_deltas: dict[tuple[str, str], int] = {}
+        debt_deltas: dict[str, int] = {}
+        for log in sorted(engine_logs, key=_log_order):
+            event = log.topics[0]
+            if event == COLLATERAL_DEPOSITED_TOPIC:
+                user = _topic_to_address(log.topics[1])
+                amount = log.topics[2]
+                token = self._pop_deposit_token(
+                    transfers_by_tx.get((log.block_number, log.tx_index), []),
+                    user,
+                    amount,
+                )
+                _add(collateral_deltas, (user, token), amount)
+            elif event == COLLATERAL_REDEEMED_TOPIC:
+                token = _topic_to_address(log.topics[1])
+                _from = _topic_to_address(log.topics[2])
+                _add(collateral_deltas, (_from, token), -int.from_bytes(log.data, "big"))
+            elif event == DSC_MINTED_TOPIC:
+                user = _topic_to_address(log.topics[1])
+                _add(debt_deltas, user, int.from_bytes(log.data, "big"))
+            elif event == DSC_BURNED_TOPIC:
+                on_behalf_of = _topic_to_address(log.topics[1])
+                _add(debt_deltas, on_behalf_of, -int.from_bytes(log.data, "big"))
+
+        self.store.apply(self.engine, to_block, collateral_deltas, debt_deltas)
+        return len(engine_logs)
+
+    def _pop_deposit_token(self, transfers: list[Log], user: str, amount: int) -> str:
+        for i, transfer in enumerate(transfers):
+            if (
+                _topic_to_address(transfer.topics[1]) == user
+                and int.from_bytes(transfer.data, "big") == amount
+            ):
+                return transfers.pop(i).address
+        raise ValueError(f"no collateral transfer matches a deposit of {user}")
+
+
+# ------------------------------------------------------------------
+#                              HELPERS
+# ------------------------------------------------------------------
+def _log_order(log: Log) -> tuple[int, int, int]:
+    return (log.block_number, log.tx_index, log.log_index)
+
+
+def _add(deltas: dict, key, amount: int):
+    deltas[key] = deltas.get(key, 0) + amount
+
+
+def _normalize(address) -> str:
+    if isinstance(address, bytes):
+        return "0x" + address.hex()
+    return str(address).lower()
+
+
+def _address_to_topic(address: str) -> int:
+    return int(address, 16)
+
+
+def _topic_to_address(topic: int) -> str:
+    return "0x" + topic.to_bytes(32, "big")[12:].hex()
+
+
+def _topic_filter(topic):
+    if topic is None:
+        return None
+    if isinstance(topic, list):
+        return [f"0x{value:064x}" for value in topic]
+    return f"0x{topic:064x}"
+
+
+def _match_topics(topics: tuple[int, ...], filters) -> bool:
+    for position, expected in enumerate(filters):
+        if expected is None:
+            continue
+        if position >= len(topics):
+            return False
+        if isinstance(expected, list):
+            if topics[position] not in expected:
+                return False
+        elif topics[position] != expected:
+            return False
+    return True
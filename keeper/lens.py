@@ -0,0 +1,36 @@
+"""
+Python side of src/dsc_lens.vy.
+
+Decodes the `Account` structs returned by the lens and splits long user
+lists into `MAX_ACCOUNTS` sized eth_calls.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable
+
+
+@dataclass(frozen=True)
+class Account:
+    """Mirror of the lens `Account` struct, per-token lists in engine token order."""
+
+    user: str
+    deposits: list[int]
+    deposits_usd: list[int]
+    collateral_value_usd: int
+    dsc_minted: int
+    health_factor: int
+    max_mintable_dsc: int
+    max_redeemable: list[int]
+
+
+def get_accounts(lens, users: Iterable[str]) -> list[Account]:
+    """One lens eth_call per `MAX_ACCOUNTS` users (boa contract)."""
+    users = [str(user) for user in users]
+    chunk_size = lens.MAX_ACCOUNTS()
+    accounts = []
+    for start in range(0, len(users), chunk_size):
+        accounts.extend(
+            Account(str(account[0]), *account[1:])
+            for account in lens.get_accounts(users[start : start + chunk_size])
+        )
+    return accounts
@@ -0,0 +1,196 @@
+"""
+Liquidation-price index for event-driven keeper wakeups.
+
+For every position backed by a single collateral, the index stores the feed
+answer below which its health factor drops under MIN_HEALTH_FACTOR
+(`engine_math.liquidation_price`). Each collateral keeps those keys in a
+sorted list, so a feed update only has to bisect it: the users who crossed
+are exactly the keys between the new and the old answer, O(log n + k) for k
+crossings instead of re-scoring every account.
+
+The liquidation price of a position spread over several collaterals depends
+on the answers of all of them, so its key in one list would have to be
+re-computed on every update of another feed. Those positions are scored by
+a `HealthFactorScanner` of their own instead, one vectorized pass per
+update. Both paths are exact, results match the engine bit for bit.
+"""
+
+import bisect
+from typing import Sequence
+
+from keeper import engine_math
+from keeper.scanner import HealthFactorScanner
+
+
+class LiquidationPriceIndex:
+    def __init__(
+        self,
+        tokens: Sequence[str],
+        prices: Sequence[int],
+        feed_decimals: Sequence[int] | None = None,
+    ):
+        """
+        @param tokens Collateral tokens, in the order of `COLLATERAL_TOKENS`
+        @param prices Current feed answers, same order
+        @param feed_decimals Decimals of each feed, 8 for all by default
+        """
+        self.tokens = [str(token) for token in tokens]
+        self.prices = [int(price) for price in prices]
+        self._token_index = {token: i for i, token in enumerate(self.tokens)}
+        self._positions: dict[str, tuple[tuple[int, ...], int]] = {}
+        # @dev single collateral positions, user -> (token index, key)
+        self._keys: dict[str, tuple[int, int]] = {}
+        # @dev per collateral, (liquidation price, user) in ascending order
+        self._sorted: list[list[tuple[int, str]]] = [[] for _ in self.tokens]
+        # @dev positions over several collaterals, a removed one is left in
+        # the scanner with no debt
+        self._multi = HealthFactorScanner(self.tokens, feed_decimals=feed_decimals)
+        self.price_scales = self._multi.price_scales
+        self._multi_users: set[str] = set()
+        self._multi_underwater: set[str] = set()
+        # @dev debt and no collateral, liquidatable at any price
+        self._no_collateral: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    # ------------------------------------------------------------------
+    #                            POSITIONS
+    # ------------------------------------------------------------------
+    def set_position(self, user: str, amounts: Sequence[int], dsc_minted: int):
+        """Insert, overwrite or, with no debt and no collateral, drop a position."""
+        user = str(user)
+        self.remove(user)
+        amounts = tuple(int(amount) for amount in amounts)
+        if int(dsc_minted) == 0 and not any(amounts):
+            return
+        self._positions[user] = (amounts, int(dsc_minted))
+        key = self._index(user)
+        if key is not None:
+            bisect.insort(self._sorted[key[0]], (key[1], user))
+
+    def set_positions(
+        self,
+        users: Sequence[str],
+        amounts: Sequence[Sequence[int]],
+        dsc_minted: Sequence[int],
+    ):
+        """Bulk load of new users, one sort per collateral."""
+        added: list[list[tuple[int, str]]] = [[] for _ in self.tokens]
+        for user, user_amounts, debt in zip(users, amounts, dsc_minted):
+            user = str(user)
+            if user in self._positions:
+                raise ValueError(f"{user} is already tracked")
+            self._positions[user] = (tuple(int(a) for a in user_amounts), int(debt))
+            key = self._index(user)
+            if key is not None:
+                added[key[0]].append((key[1], user))
+        for i, keys in enumerate(added):
+            if keys:
+                self._sorted[i].extend(keys)
+                self._sorted[i].sort()
+
+    def remove(self, user: str):
+        user = str(user)
+        if self._positions.pop(user, None) is None:
+            return
+        key = self._keys.pop(user, None)
+        if key is not None:
+            keys = self._sorted[key[0]]
+            del keys[bisect.bisect_left(keys, (key[1], user))]
+        if user in self._multi_users:
+            self._multi.set_position(user, [0] * len(self.tokens), 0)
+            self._multi_users.discard(user)
+            self._multi_underwater.discard(user)
+        self._no_collateral.discard(user)
+
+    def get_position(self, user: str) -> tuple[list[int], int]:
+        amounts, dsc_minted = self._positions[str(user)]
+        return list(amounts), dsc_minted
+
+    def liquidation_price(self, user: str, token: str) -> int:
+        """
+        Feed answer of `token` below which `user` is liquidatable, the other
+        answers unchanged. 0 if no answer of that feed makes it liquidatable.
+        """
+        amounts, dsc_minted = self._positions[str(user)]
+        i = self._token_index[str(token)]
+        key = self._keys.get(str(user))
+        if key is not None:
+            return key[1] if key[0] == i else 0
+        return engine_math.liquidation_price(
+            dsc_minted, self.prices, amounts, i, self.price_scales
+        )
+
+    # ------------------------------------------------------------------
+    #                             QUERIES
+    # ------------------------------------------------------------------
+    def update_price(self, token: str, price: int) -> list[str]:
+        """
+        Applies a feed answer of `token`.
+
+        @return The users liquidatable at `price` that were not at the
+            previous answer: single collateral positions by ascending
+            liquidation price, then the others
+        """
+        i = self._token_index[str(token)]
+        price = int(price)
+        previous = self.prices[i]
+        if price == previous:
+            return []
+        self.prices[i] = price
+        crossed = []
+        if price < previous:
+            # @dev liquidatable iff price < key, keys in (price, previous]
+            keys = self._sorted[i]
+            start = bisect.bisect_left(keys, (price + 1,))
+            end = bisect.bisect_left(keys, (previous + 1,))
+            crossed = [user for _, user in keys[start:end]]
+        if self._multi_users:
+            underwater = {
+                self._multi.users[index]
+                for index in self._multi.underwater(self.prices)
+            }
+            crossed.extend(sorted(underwater - self._multi_underwater))
+            self._multi_underwater = underwater
+        return crossed
+
+    def underwater(self) -> list[str]:
+        """Every user liquidatable at the current answers."""
+        users = self._no_collateral | self._multi_underwater
+        for i, keys in enumerate(self._sorted):
+            start = bisect.bisect_left(keys, (self.prices[i] + 1,))
+            users.update(user for _, user in keys[start:])
+        return sorted(users)
+
+    # ------------------------------------------------------------------
+    #                             INTERNAL
+    # ------------------------------------------------------------------
+    def _index(self, user: str) -> tuple[int, int] | None:
+        """@return (token index, key) of a single collateral position"""
+        amounts, dsc_minted = self._positions[user]
+        held = [i for i, amount in enumerate(amounts) if amount]
+        if dsc_minted == 0:
+            return None
+        if not held:
+            self._no_collateral.add(user)
+            return None
+        if len(held) == 1:
+            key = (
+                held[0],
+                engine_math.liquidation_price(
+                    dsc_minted, self.prices, amounts, held[0], self.price_scales
+                ),
+            )
+            self._keys[user] = key
+            return key
+
+        self._multi.set_position(user, amounts, dsc_minted)
+        self._multi_users.add(user)
+        health_factor = engine_math.calculate_health_factor(
+            dsc_minted,
+            engine_math.get_collateral_value(self.prices, amounts, self.price_scales),
+        )
+        if health_factor < engine_math.MIN_HEALTH_FACTOR:
+            self._multi_underwater.add(user)
+        return None
@@ -0,0 +1,376 @@
+"""
+Load generator for the engine entry points.
+
+Thousands of users run a weighted mix of `deposit_and_mint`, `redeem_for_dsc`,
+`burn_dsc` and `liquidate` against the chain boa is connected to: the
+in-process py-evm chain, or anvil through `mox run --network anvil`. The mock
+feeds follow a random walk so positions drift underwater and the liquidation
+path stays busy.
+
+Boa sends one transaction at a time: users are interleaved, not parallel.
+Latency is the wall time of each call, gas the execution gas of the call when
+boa runs it locally. Positions are mirrored in Python with the exact engine
+math, so picking users and amounts costs no eth_call.
+"""
+
+import random
+import time
+from dataclasses import dataclass
+
+import boa
+import numpy as np
+from boa.network import NetworkEnv
+from eth_account import Account
+from eth_utils import keccak
+
+from keeper import engine_math
+
+OPERATIONS = ("deposit_and_mint", "redeem_for_dsc", "burn_dsc", "liquidate")
+DEFAULT_MIX = {
+    "deposit_and_mint": 0.4,
+    "redeem_for_dsc": 0.25,
+    "burn_dsc": 0.2,
+    "liquidate": 0.15,
+}
+PERCENTILES = (50, 90, 99)
+MAX_APPROVAL = 2**256 - 1
+# @dev attempts to find a user an operation applies to before skipping it
+USER_DRAWS = 8
+USER_BALANCE = 10**20
+USER_COLLATERAL = 10**6 * 10**18
+LIQUIDATOR_COLLATERAL = 10**9 * 10**18
+
+
+# ------------------------------------------------------------------
+#                              REPORT
+# ------------------------------------------------------------------
+@dataclass(frozen=True)
+class OperationStats:
+    sent: int
+    reverted: int
+    # @dev no user the operation applied to, nothing sent
+    skipped: int
+    latency_ms: dict[int, float]
+    gas: dict[int, float]
+
+
+@dataclass(frozen=True)
+class LoadReport:
+    transactions: int
+    elapsed: float
+    operations: dict[str, OperationStats]
+    # @dev non-zero engine and DSC storage slots of the users, before and after
+    live_slots: tuple[int, int]
+
+    @property
+    def tps(self) -> float:
+        return self.transactions / self.elapsed if self.elapsed else 0.0
+
+    def format(self) -> str:
+        lines = [
+            f"{self.transactions} transactions in {self.elapsed:.1f} s, "
+            f"{self.tps:,.1f} tx/s",
+            f"live storage slots: {self.live_slots[0]} -> {self.live_slots[1]} "
+            f"(+{(self.live_slots[1] - self.live_slots[0]) * 32:,} bytes)",
+        ]
+        for name, stats in self.operations.items():
+            latency = "  ".join(f"p{q}={v:.2f}" for q, v in stats.latency_ms.items())
+            gas = "  ".join(f"p{q}={v:,.0f}" for q, v in stats.gas.items())
+            lines.append(
+                f"{name:>16}: sent={stats.sent} reverted={stats.reverted} "
+                f"skipped={stats.skipped}  ms {latency}  gas {gas}"
+            )
+        return "\n".join(lines)
+
+
+# ------------------------------------------------------------------
+#                            GENERATOR
+# ------------------------------------------------------------------
+class LoadGenerator:
+    def __init__(
+        self,
+        dsce,
+        dsc,
+        tokens,
+        feeds,
+        users: int,
+        mix: dict[str, float] = DEFAULT_MIX,
+        price_volatility: float = 0.03,
+        price_drift: float = 0.0,
+        price_update_interval: int = 50,
+        seed: int = 0,
+    ):
+        """
+        @param tokens, feeds Mock collaterals and feeds (boa contracts), in the
+            order of `COLLATERAL_TOKENS`, prices are moved with `updateAnswer`
+        @param mix Relative weight of each operation of OPERATIONS
+        @param price_volatility Standard deviation of the log price moves
+        @param price_drift Mean of the log price moves, negative for a crash
+        @param price_update_interval Transactions between two price moves
+        """
+        self.dsce = dsce
+        self.dsc = dsc
+        self.tokens = list(tokens)
+        self.feeds = list(feeds)
+        self.mix = {name: mix.get(name, 0.0) for name in OPERATIONS}
+        self.price_volatility = price_volatility
+        self.price_drift = price_drift
+        self.price_update_interval = price_update_interval
+        self._rng = random.Random(seed)
+        self._accounts = [
+            Account.from_key(keccak(text=f"loadgen_user_{i}")) for i in range(users)
+        ]
+        self.users = [account.address for account in self._accounts]
+        self.liquidator = Account.from_key(keccak(text="loadgen_liquidator"))
+        self.prices = [feed.latestAnswer() for feed in self.feeds]
+        self.price_scales = [
+            engine_math.price_scale(feed.decimals()) for feed in self.feeds
+        ]
+        # @dev Python mirror of every position, exact engine math
+        self._deposits = {user: [0] * len(self.tokens) for user in self.users}
+        self._debt = {user: 0 for user in self.users}
+        self._underwater: list[str] = []
+
+    def setup(self):
+        """Funds every user and sets the engine allowances, not measured."""
+        for account in [*self._accounts, self.liquidator]:
+            self._fund(account)
+            with boa.env.prank(account.address):
+                for token in self.tokens:
+                    token.mint_amount(
+                        LIQUIDATOR_COLLATERAL
+                        if account is self.liquidator
+                        else USER_COLLATERAL
+                    )
+                    token.approve(self.dsce, MAX_APPROVAL)
+                self.dsc.approve(self.dsce, MAX_APPROVAL)
+
+        # @dev the liquidator DSC float, its collateral keeps it far from hf 1
+        with boa.env.prank(self.liquidator.address):
+            for token in self.tokens:
+                self.dsce.deposit_collateral(token, LIQUIDATOR_COLLATERAL)
+            self.dsce.mint_dsc(
+                engine_math.get_collateral_value(
+                    self.prices,
+                    [LIQUIDATOR_COLLATERAL] * len(self.tokens),
+                    self.price_scales,
+                )
+                // 10
+            )
+
+    def run(self, transactions: int) -> LoadReport:
+        live_slots_before = self.live_slots()
+        latencies = {name: [] for name in OPERATIONS}
+        gas = {name: [] for name in OPERATIONS}
+        reverted = dict.fromkeys(OPERATIONS, 0)
+        skipped = dict.fromkeys(OPERATIONS, 0)
+        names = list(self.mix)
+        weights = list(self.mix.values())
+
+        start = time.perf_counter()
+        for step in range(transactions):
+            if step % self.price_update_interval == 0:
+                self._move_prices()
+            name = self._rng.choices(names, weights)[0]
+            call = getattr(self, f"_{name}")()
+            if call is None:
+                skipped[name] += 1
+                continue
+            sender, fn_name, args, apply = call
+            _reset_access_lists()
+            call_start = time.perf_counter()
+            try:
+                with boa.env.prank(sender):
+                    getattr(self.dsce, fn_name)(*args)
+            except boa.BoaError:
+                reverted[name] += 1
+                continue
+            latencies[name].append(time.perf_counter() - call_start)
+            computation = getattr(self.dsce, "_computation", None)
+            if computation is not None:
+                gas[name].append(computation.get_gas_used())
+            apply()
+        elapsed = time.perf_counter() - start
+
+        sent = sum(len(latencies[name]) + reverted[name] for name in OPERATIONS)
+        return LoadReport(
+            transactions=sent,
+            elapsed=elapsed,
+            operations={
+                name: OperationStats(
+                    sent=len(latencies[name]) + reverted[name],
+                    reverted=reverted[name],
+                    skipped=skipped[name],
+                    latency_ms=_percentiles(latencies[name], 1000),
+                    gas=_percentiles(gas[name]),
+                )
+                for name in OPERATIONS
+            },
+            live_slots=(live_slots_before, self.live_slots()),
+        )
+
+    def live_slots(self) -> int:
+        """
+        @dev Non-zero slots of the users in the engine (first collateral slot,
+            debt) and DSC (balance), read through the public getters so it
+            also works against a node
+        """
+        slots = 0
+        for user in self.users:
+            slots += self.dsce.get_held_collateral(user) != 0
+            slots += self.dsce.user_to_dsc_minted(user) != 0
+            slots += self.dsc.balanceOf(user) != 0
+        return slots
+
+    # ------------------------------------------------------------------
+    #                           OPERATIONS
+    # ------------------------------------------------------------------
+    # @dev each returns (sender, engine function, args, mirror update) or
+    # None when no user can run it
+    def _deposit_and_mint(self):
+        user = self._rng.choice(self.users)
+        index = self._rng.randrange(len(self.tokens))
+        amount = self._rng.randrange(10**17, 10 * 10**18)
+        # @dev a new tranche at its own health factor, the rest of the
+        # position keeps drifting with the prices
+        target_health_factor = self._rng.uniform(1.2, 3.0)
+        adjusted = engine_math.collateral_adjusted_for_threshold(
+            engine_math.get_usd_value(
+                self.prices[index], amount, self.price_scales[index]
+            )
+        )
+        to_mint = max(int(adjusted / target_health_factor), 1)
+
+        def apply():
+            self._deposits[user][index] += amount
+            self._debt[user] += to_mint
+
+        return user, "deposit_and_mint", (self.tokens[index], amount, to_mint), apply
+
+    def _redeem_for_dsc(self):
+        user = self._draw(lambda user: self._debt[user] > 1)
+        if user is None:
+            return None
+        held = [i for i, amount in enumerate(self._deposits[user]) if amount > 0]
+        index = self._rng.choice(held)
+        # @dev the same share of debt and of one collateral, the health factor
+        # can only go up
+        share = self._rng.uniform(0.1, 0.5)
+        to_burn = max(int(self._debt[user] * share), 1)
+        to_redeem = int(self._deposits[user][index] * to_burn / self._debt[user])
+
+        def apply():
+            self._deposits[user][index] -= to_redeem
+            self._debt[user] -= to_burn
+
+        return (
+            user,
+            "redeem_for_dsc",
+            (self.tokens[index], to_redeem, to_burn),
+            apply,
+        )
+
+    def _burn_dsc(self):
+        user = self._draw(lambda user: self._debt[user] > 1)
+        if user is None:
+            return None
+        to_burn = max(int(self._debt[user] * self._rng.uniform(0.1, 0.5)), 1)
+
+        def apply():
+            self._debt[user] -= to_burn
+
+        return user, "burn_dsc", (to_burn,), apply
+
+    def _liquidate(self):
+        while self._underwater:
+            user = self._underwater.pop()
+            if self._health_factor(user) >= engine_math.MIN_HEALTH_FACTOR:
+                continue
+            # @dev the largest liquidation the engine takes, on any collateral
+            debt_to_cover, index = max(
+                (
+                    engine_math.max_liquidatable(
+                        self._debt[user],
+                        self.prices,
+                        self._deposits[user],
+                        i,
+                        self.price_scales,
+                    ),
+                    i,
+                )
+                for i in range(len(self.tokens))
+            )
+            if debt_to_cover == 0:
+                continue
+
+            def apply(user=user):
+                # @dev the seized amount is rounded by the engine, read it back
+                self._deposits[user] = [
+                    self.dsce.get_collateral_balance_of_user(user, token)
+                    for token in self.tokens
+                ]
+                self._debt[user] = self.dsce.user_to_dsc_minted(user)
+
+            return (
+                self.liquidator.address,
+                "liquidate",
+                (self.tokens[index], user, debt_to_cover),
+                apply,
+            )
+        return None
+
+    # ------------------------------------------------------------------
+    #                            INTERNALS
+    # ------------------------------------------------------------------
+    def _draw(self, applies) -> str | None:
+        for _ in range(USER_DRAWS):
+            user = self._rng.choice(self.users)
+            if applies(user):
+                return user
+        return None
+
+    def _health_factor(self, user: str) -> int:
+        return engine_math.calculate_health_factor(
+            self._debt[user],
+            engine_math.get_collateral_value(
+                self.prices, self._deposits[user], self.price_scales
+            ),
+        )
+
+    def _move_prices(self):
+        for i, feed in enumerate(self.feeds):
+            move = self._rng.gauss(self.price_drift, self.price_volatility)
+            self.prices[i] = max(int(self.prices[i] * np.exp(move)), 1)
+            feed.updateAnswer(self.prices[i])
+        self._underwater = [
+            user
+            for user in self.users
+            if self._debt[user] > 0
+            and self._health_factor(user) < engine_math.MIN_HEALTH_FACTOR
+        ]
+        self._rng.shuffle(self._underwater)
+
+    def _fund(self, account):
+        if isinstance(boa.env, NetworkEnv):
+            boa.env.add_account(account)
+            # @dev anvil only, live networks are no place for a load test
+            boa.env._rpc.fetch("anvil_setBalance", [account.address, hex(USER_BALANCE)])
+        else:
+            boa.env.set_balance(account.address, USER_BALANCE)
+
+
+def _reset_access_lists():
+    """@dev Cold accounts and slots, as for a fresh transaction, see tests/gas"""
+    if not isinstance(boa.env, NetworkEnv):
+        boa.env.evm.vm.state._account_db._journal_accessed_state.clear()
+
+
+def _percentiles(values: list[float], scale: float = 1) -> dict[int, float]:
+    if not values:
+        return {}
+    return dict(
+        zip(
+            PERCENTILES,
+            (float(v) * scale for v in np.percentile(values, PERCENTILES)),
+        )
+    )
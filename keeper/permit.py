@@ -0,0 +1,50 @@
+"""
+EIP-2612 signatures for the `*_with_permit` functions of src/dsc_engine.vy.
+
+The engine takes a `PermitSignature` struct, `(deadline, v, r, s)`, signed by
+the caller for the engine and the exact amount the call spends.
+"""
+
+from eth_account.signers.local import LocalAccount
+
+PERMIT_TYPES = {
+    "Permit": [
+        {"name": "owner", "type": "address"},
+        {"name": "spender", "type": "address"},
+        {"name": "value", "type": "uint256"},
+        {"name": "nonce", "type": "uint256"},
+        {"name": "deadline", "type": "uint256"},
+    ]
+}
+
+
+def sign_permit(
+    token, owner: LocalAccount, spender: str, amount: int, deadline: int
+) -> tuple[int, int, bytes, bytes]:
+    """
+    @param token Any snekmate erc20 (boa contract), DSC or a collateral
+    @return The `PermitSignature` tuple, for the current nonce of `owner`
+    """
+    _, name, version, chain_id, verifying_contract, _, _ = token.eip712Domain()
+    signed = owner.sign_typed_data(
+        domain_data={
+            "name": name,
+            "version": version,
+            "chainId": chain_id,
+            "verifyingContract": str(verifying_contract),
+        },
+        message_types=PERMIT_TYPES,
+        message_data={
+            "owner": owner.address,
+            "spender": str(spender),
+            "value": amount,
+            "nonce": token.nonces(owner.address),
+            "deadline": deadline,
+        },
+    )
+    return (
+        deadline,
+        signed.v,
+        signed.r.to_bytes(32, "big"),
+        signed.s.to_bytes(32, "big"),
+    )
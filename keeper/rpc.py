@@ -0,0 +1,460 @@
+"""
+Asyncio JSON-RPC client for keeper reads.
+
+A keeper scoring thousands of accounts spends most of each block waiting on
+sequential eth_calls. Here reads are awaited concurrently and coalesced:
+every request issued in the same event loop iteration goes out in one
+JSON-RPC batch (split at `max_batch_size`), over an aiohttp session whose
+keep-alive connections are capped at `max_connections` batches in flight.
+Transport failures (resets, timeouts, truncated bodies, HTTP 429 and 5xx) are
+retried with exponential backoff. Replies that are not JSON and JSON-RPC
+errors such as reverts are not.
+
+`EngineReader` pins every read to one block number, so its results can be
+cached until `refresh` sees a new block. Identical reads of that block share
+one request.
+
+`BoaRpcServer` serves the in-process boa chain over the same protocol with
+aiohttp.web, the stand-in for an anvil node in tests and benchmarks.
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+import aiohttp
+from aiohttp import web
+from eth_abi import decode, encode
+from eth_utils import keccak
+
+DEFAULT_MAX_CONNECTIONS = 8
+DEFAULT_MAX_BATCH_SIZE = 100
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.05
+DEFAULT_TIMEOUT = 10.0
+
+# @dev too many requests, then the gateway and overload statuses
+RETRYABLE_STATUSES = frozenset((429, 500, 502, 503, 504))
+JSON_HEADERS = {"Content-Type": "application/json"}
+# @dev IncompleteReadError is an EOFError, ClientPayloadError a truncated body
+TRANSPORT_ERRORS = (
+    OSError,
+    EOFError,
+    asyncio.TimeoutError,
+    aiohttp.ClientConnectionError,
+    aiohttp.ClientPayloadError,
+)
+
+
+class JsonRpcError(RuntimeError):
+    """A JSON-RPC error reply, e.g. a reverted eth_call."""
+
+    def __init__(self, method: str, error: Any):
+        super().__init__(f"{method} failed: {error}")
+        self.method = method
+        self.code = error.get("code") if isinstance(error, dict) else None
+        self.data = error.get("data") if isinstance(error, dict) else None
+
+
+class HttpStatusError(OSError):
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+@dataclass(frozen=True, slots=True)
+class RoundData:
+    """Decoded `latestRoundData` of an aggregator."""
+
+    round_id: int
+    answer: int
+    started_at: int
+    updated_at: int
+    answered_in_round: int
+
+
+# ------------------------------------------------------------------
+#                             CLIENT
+# ------------------------------------------------------------------
+class AsyncJsonRpcClient:
+    """
+    JSON-RPC over an aiohttp session, requests batched automatically.
+
+    `request` only queues the call: the queue is flushed once the tasks
+    ready in the current loop iteration have run, so
+    `asyncio.gather(*(client.request(...) for ...))` costs one batch per
+    `max_batch_size` calls.
+    """
+
+    def __init__(
+        self,
+        rpc_url: str,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        """
+        @param max_connections Maximum number of batches in flight
+        @param retries Attempts after the first one, on transport failures
+        @param backoff Delay before the first retry, doubled on each retry
+        @param timeout Seconds to connect, and to send and read one batch
+        """
+        self.rpc_url = rpc_url
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_batch_size = max_batch_size
+        self.retries = retries
+        self.backoff = backoff
+        self._id = 0
+        self._pending: list[tuple[str, list, asyncio.Future]] = []
+        self._flush_handle: asyncio.Handle | None = None
+        self._batches: set[asyncio.Task] = set()
+        # @dev opened on the first batch, a session needs a running loop
+        self._session: aiohttp.ClientSession | None = None
+
+    async def __aenter__(self) -> "AsyncJsonRpcClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def request(self, method: str, params: list) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((method, params, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        for start in range(0, len(pending), self.max_batch_size):
+            task = asyncio.ensure_future(
+                self._send(pending[start : start + self.max_batch_size])
+            )
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _send(self, calls: list[tuple[str, list, asyncio.Future]]):
+        ids = []
+        payload = []
+        for method, params, _ in calls:
+            self._id += 1
+            ids.append(self._id)
+            payload.append(
+                {"jsonrpc": "2.0", "id": self._id, "method": method, "params": params}
+            )
+        try:
+            replies = await self._post(json.dumps(payload).encode())
+        except Exception as error:
+            for _, _, future in calls:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        # @dev a batch the node rejects as a whole gets a single error object
+        if isinstance(replies, dict):
+            for method, _, future in calls:
+                if not future.done():
+                    future.set_exception(JsonRpcError(method, replies.get("error")))
+            return
+        by_id = {reply.get("id"): reply for reply in replies}
+        for request_id, (method, _, future) in zip(ids, calls):
+            if future.done():
+                continue
+            reply = by_id.get(request_id)
+            if reply is None:
+                future.set_exception(JsonRpcError(method, "no reply in batch"))
+            elif "error" in reply:
+                future.set_exception(JsonRpcError(method, reply["error"]))
+            else:
+                future.set_result(reply["result"])
+
+    async def _post(self, body: bytes) -> Any:
+        for attempt in range(self.retries + 1):
+            try:
+                reply = await self._post_once(body)
+            except TRANSPORT_ERRORS as error:
+                if not _is_retryable(error) or attempt == self.retries:
+                    raise
+                await asyncio.sleep(self.backoff * 2**attempt)
+                continue
+            # @dev a reply that is not JSON comes back the same on a retry
+            return json.loads(reply)
+
+    async def _post_once(self, body: bytes) -> bytes:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        async with self._session.post(
+            self.rpc_url, data=body, headers=JSON_HEADERS
+        ) as response:
+            if response.status != 200:
+                raise HttpStatusError(response.status)
+            return await response.read()
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, HttpStatusError):
+        return error.status in RETRYABLE_STATUSES
+    return isinstance(error, TRANSPORT_ERRORS)
+
+
+# ------------------------------------------------------------------
+#                          ENGINE READER
+# ------------------------------------------------------------------
+class EngineReader:
+    """
+    Engine and feed reads through an `AsyncJsonRpcClient`, all at the same
+    block and cached until `refresh` moves to a newer one.
+    """
+
+    def __init__(self, client: AsyncJsonRpcClient, engine: str):
+        self.client = client
+        self.engine = str(engine)
+        self.block_number: int | None = None
+        self._cache: dict[tuple[str, bytes], asyncio.Future] = {}
+
+    async def refresh(self) -> int:
+        """Pins the reads to the latest block, the cache is dropped if it moved."""
+        block_number = int(await self.client.request("eth_blockNumber", []), 16)
+        if block_number != self.block_number:
+            self.block_number = block_number
+            self._cache.clear()
+        return block_number
+
+    async def account_information(self, user: str) -> tuple[int, int]:
+        """@return (dsc_minted, collateral_value_in_usd)"""
+        return await self._call(
+            self.engine,
+            "get_account_information(address)",
+            ("uint256", "uint256"),
+            ("address",),
+            (str(user),),
+        )
+
+    async def collateral_balance(self, user: str, token: str) -> int:
+        (balance,) = await self._call(
+            self.engine,
+            "get_collateral_balance_of_user(address,address)",
+            ("uint256",),
+            ("address", "address"),
+            (str(user), str(token)),
+        )
+        return balance
+
+    async def collateral_tokens(self) -> list[str]:
+        (tokens,) = await self._call(
+            self.engine, "get_collateral_tokens()", ("address[]",)
+        )
+        return list(tokens)
+
+    async def price_feed(self, token: str) -> str:
+        (feed,) = await self._call(
+            self.engine,
+            "token_to_price_feed(address)",
+            ("address",),
+            ("address",),
+            (str(token),),
+        )
+        return feed
+
+    async def latest_round_data(self, feed: str) -> RoundData:
+        return RoundData(
+            *await self._call(
+                str(feed),
+                "latestRoundData()",
+                ("uint80", "int256", "uint256", "uint256", "uint80"),
+            )
+        )
+
+    async def prices(self) -> list[int]:
+        """Feed answers of every collateral, in engine token order."""
+        tokens = await self.collateral_tokens()
+        feeds = await asyncio.gather(*(self.price_feed(token) for token in tokens))
+        rounds = await asyncio.gather(*(self.latest_round_data(f) for f in feeds))
+        return [round_data.answer for round_data in rounds]
+
+    async def feed_decimals(self) -> list[int]:
+        """
+        Decimals of the feed of every collateral, in engine token order, the
+        `feed_decimals` of `HealthFactorScanner`.
+        """
+        tokens = await self.collateral_tokens()
+        feeds = await asyncio.gather(*(self.price_feed(token) for token in tokens))
+        decimals = await asyncio.gather(
+            *(self._call(feed, "decimals()", ("uint8",)) for feed in feeds)
+        )
+        return [value for (value,) in decimals]
+
+    async def positions(
+        self, users: Sequence[str]
+    ) -> tuple[list[list[int]], list[int]]:
+        """
+        @return Per-user collateral amounts in engine token order and debts,
+            the input of `HealthFactorScanner.set_positions`
+        """
+        tokens = await self.collateral_tokens()
+        amounts, accounts = await asyncio.gather(
+            asyncio.gather(
+                *(
+                    self.collateral_balance(user, token)
+                    for user in users
+                    for token in tokens
+                )
+            ),
+            asyncio.gather(*(self.account_information(user) for user in users)),
+        )
+        width = len(tokens)
+        return (
+            [amounts[i * width : (i + 1) * width] for i in range(len(users))],
+            [dsc_minted for dsc_minted, _ in accounts],
+        )
+
+    async def _call(
+        self,
+        to: str,
+        signature: str,
+        output_types: tuple[str, ...],
+        input_types: tuple[str, ...] = (),
+        args: tuple = (),
+    ) -> tuple:
+        if self.block_number is None:
+            await self.refresh()
+        data = keccak(text=signature)[:4] + encode(input_types, args)
+        key = (to.lower(), data)
+        future = self._cache.get(key)
+        if future is None:
+            future = asyncio.ensure_future(
+                self.client.request(
+                    "eth_call",
+                    [{"to": to, "data": "0x" + data.hex()}, hex(self.block_number)],
+                )
+            )
+            self._cache[key] = future
+            future.add_done_callback(lambda done: self._evict_failed(key, done))
+        # @dev shielded, cancelling one reader must not fail the others
+        output = await asyncio.shield(future)
+        return decode(output_types, bytes.fromhex(output[2:]))
+
+    def _evict_failed(self, key: tuple[str, bytes], future: asyncio.Future):
+        if self._cache.get(key) is future and (
+            future.cancelled() or future.exception() is not None
+        ):
+            del self._cache[key]
+
+
+# ------------------------------------------------------------------
+#                        IN-PROCESS NODE
+# ------------------------------------------------------------------
+class BoaRpcServer:
+    """
+    JSON-RPC endpoint over the in-process boa chain, single and batched
+    requests POSTed to `/`. Serves `eth_chainId`, `eth_blockNumber` and
+    `eth_call` at the current block.
+
+    `latency` seconds are slept before each HTTP reply, the round trip to a
+    remote node.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.http_requests = 0
+        self.calls = 0
+        self._runner: web.AppRunner | None = None
+        # @dev one transport per client connection that sent a request
+        self._transports: set[asyncio.BaseTransport] = set()
+
+    async def __aenter__(self) -> "BoaRpcServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @property
+    def url(self) -> str:
+        host, port = self._runner.addresses[0][:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def connections(self) -> int:
+        return len(self._transports)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        app = web.Application()
+        app.router.add_post("/", self._serve)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+    async def close(self):
+        await self._runner.cleanup()
+
+    def handle(self, payload: Any) -> Any:
+        if isinstance(payload, list):
+            return [self._handle_one(request) for request in payload]
+        return self._handle_one(payload)
+
+    async def _serve(self, request: web.Request) -> web.Response:
+        self._transports.add(request.transport)
+        self.http_requests += 1
+        reply = self.handle(json.loads(await request.read()))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.json_response(reply)
+
+    def _handle_one(self, request: dict) -> dict:
+        import boa
+
+        self.calls += 1
+        reply = {"jsonrpc": "2.0", "id": request.get("id")}
+        method, params = request.get("method"), request.get("params", [])
+        block_number = boa.env.evm.patch.block_number
+        if method == "eth_chainId":
+            reply["result"] = hex(boa.env.evm.patch.chain_id)
+        elif method == "eth_blockNumber":
+            reply["result"] = hex(block_number)
+        elif method != "eth_call":
+            reply["error"] = {"code": -32601, "message": f"{method} not supported"}
+        elif _block_tag(params, block_number) != block_number:
+            # @dev py-evm keeps no history, only the current block is served
+            reply["error"] = {"code": -32000, "message": "historical state unavailable"}
+        else:
+            computation = boa.env.execute_code(
+                to_address=params[0]["to"],
+                data=bytes.fromhex(params[0].get("data", "0x")[2:]),
+                is_modifying=False,
+            )
+            output = "0x" + computation.output.hex()
+            if computation.is_error:
+                reply["error"] = {
+                    "code": 3,
+                    "message": "execution reverted",
+                    "data": output,
+                }
+            else:
+                reply["result"] = output
+        return reply
+
+
+def _block_tag(params: list, block_number: int) -> int:
+    tag = params[1] if len(params) > 1 else "latest"
+    return block_number if tag in ("latest", "pending") else int(tag, 16)
@@ -0,0 +1,228 @@
+"""
+Vectorized health-factor scanner for liquidation keepers.
+
+Positions are kept in NumPy arrays so that a price tick re-scores every
+account at once instead of issuing one `get_health_factor` eth_call per user.
+
+Two copies of each position are stored:
+    - exact integers (object arrays), the source of truth
+    - float64 shadows, used for the vectorized pass
+
+The float pass can only be wrong for accounts whose collateral is within
+rounding distance of their debt. Those few accounts are re-scored with the
+exact integer math of `keeper.engine_math`, so results always match the
+engine bit for bit.
+"""
+
+from typing import Iterable, Sequence
+
+import boa
+import numpy as np
+
+from keeper import engine_math
+
+# @dev health factor < MIN_HEALTH_FACTOR <=> adjusted collateral < debt, the
+# float pass only has to be precise enough to compare those two values.
+FLOAT_RELATIVE_TOLERANCE = 1e-12
+# @dev each floor division in the engine loses less than 1 wei
+FLOAT_ABSOLUTE_TOLERANCE = 8.0
+
+
+class HealthFactorScanner:
+    def __init__(
+        self,
+        tokens: Sequence[str],
+        capacity: int = 1024,
+        feed_decimals: Sequence[int] | None = None,
+    ):
+        """
+        @param tokens Collateral tokens, in the order of `COLLATERAL_TOKENS`
+        @param capacity Number of positions to pre-allocate
+        @param feed_decimals Decimals of each feed, 8 for all by default
+        """
+        self.tokens = [str(token) for token in tokens]
+        self.price_scales = [
+            engine_math.price_scale(decimals)
+            for decimals in (
+                feed_decimals or [engine_math.FEED_DECIMALS] * len(self.tokens)
+            )
+        ]
+        self.users: list[str] = []
+        self._user_index: dict[str, int] = {}
+        self._collateral = np.zeros((capacity, len(self.tokens)), dtype=object)
+        self._dsc_minted = np.zeros(capacity, dtype=object)
+        self._collateral_f = np.zeros((capacity, len(self.tokens)), dtype=np.float64)
+        self._dsc_minted_f = np.zeros(capacity, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    # ------------------------------------------------------------------
+    #                            POSITIONS
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_engine(cls, dsce, users: Iterable[str]) -> "HealthFactorScanner":
+        """Load the positions of `users` from a deployed DSCEngine (boa contract)."""
+        users = [str(user) for user in users]
+        tokens = dsce.get_collateral_tokens()
+        scanner = cls(
+            tokens, capacity=max(len(users), 1), feed_decimals=get_feed_decimals(dsce)
+        )
+        for user in users:
+            scanner.set_position(
+                user,
+                [dsce.get_collateral_balance_of_user(user, token) for token in tokens],
+                dsce.user_to_dsc_minted(user),
+            )
+        return scanner
+
+    def set_position(self, user: str, amounts: Sequence[int], dsc_minted: int):
+        """Insert or overwrite the position of a single user."""
+        index = self._user_index.get(str(user))
+        if index is None:
+            index = self._append_user(str(user))
+        self._collateral[index] = [int(amount) for amount in amounts]
+        self._dsc_minted[index] = int(dsc_minted)
+        self._collateral_f[index] = [float(amount) for amount in amounts]
+        self._dsc_minted_f[index] = float(dsc_minted)
+
+    def set_positions(
+        self,
+        users: Sequence[str],
+        amounts: Sequence[Sequence[int]],
+        dsc_minted: Sequence[int],
+    ):
+        """Bulk load of new users, much faster than `set_position` in a loop."""
+        start = len(self.users)
+        self._reserve(start + len(users))
+        for offset, user in enumerate(users):
+            user = str(user)
+            if user in self._user_index:
+                raise ValueError(f"{user} is already tracked")
+            self._user_index[user] = start + offset
+            self.users.append(user)
+
+        end = len(self.users)
+        collateral = np.empty((end - start, len(self.tokens)), dtype=object)
+        collateral[:] = [[int(amount) for amount in row] for row in amounts]
+        self._collateral[start:end] = collateral
+        self._dsc_minted[start:end] = [int(debt) for debt in dsc_minted]
+        self._collateral_f[start:end] = collateral.astype(np.float64)
+        self._dsc_minted_f[start:end] = self._dsc_minted[start:end].astype(np.float64)
+
+    def get_position(self, user: str) -> tuple[list[int], int]:
+        index = self._user_index[str(user)]
+        return list(self._collateral[index]), self._dsc_minted[index]
+
+    # ------------------------------------------------------------------
+    #                             SCORING
+    # ------------------------------------------------------------------
+    def underwater(self, prices: Sequence[int]) -> np.ndarray:
+        """
+        Indices of the users whose health factor is below MIN_HEALTH_FACTOR.
+
+        @param prices Feed answers, in the order of `tokens`
+        """
+        n = len(self.users)
+        adjusted_f = self._adjusted_collateral_f(prices, n)
+        debt_f = self._dsc_minted_f[:n]
+        tolerance = (
+            np.maximum(adjusted_f, debt_f) * FLOAT_RELATIVE_TOLERANCE
+            + FLOAT_ABSOLUTE_TOLERANCE
+        )
+        has_debt = debt_f > 0
+        surely_underwater = has_debt & (adjusted_f < debt_f - tolerance)
+        ambiguous = np.flatnonzero(has_debt & (np.abs(adjusted_f - debt_f) <= tolerance))
+
+        exact = [
+            index
+            for index in ambiguous
+            if self._adjusted_collateral(prices, index) < self._dsc_minted[index]
+        ]
+        return np.union1d(
+            np.flatnonzero(surely_underwater), np.asarray(exact, dtype=np.int64)
+        )
+
+    def health_factors(
+        self, prices: Sequence[int], indices: Iterable[int] | None = None
+    ) -> list[int]:
+        """Exact health factors, as returned by `get_health_factor`."""
+        if indices is None:
+            indices = range(len(self.users))
+        return [
+            engine_math.calculate_health_factor(
+                self._dsc_minted[index],
+                engine_math.get_collateral_value(
+                    prices, self._collateral[index], self.price_scales
+                ),
+            )
+            for index in indices
+        ]
+
+    def health_factor(self, user: str, prices: Sequence[int]) -> int:
+        return self.health_factors(prices, [self._user_index[str(user)]])[0]
+
+    # ------------------------------------------------------------------
+    #                             INTERNAL
+    # ------------------------------------------------------------------
+    def _adjusted_collateral_f(self, prices: Sequence[int], n: int) -> np.ndarray:
+        token_prices = (
+            np.asarray([float(price) for price in prices])
+            * np.asarray([float(scale) for scale in self.price_scales])
+            / engine_math.PRECISION
+        )
+        collateral_value = self._collateral_f[:n] @ token_prices
+        return (
+            collateral_value
+            * engine_math.LIQUIDATION_THRESHOLD
+            / engine_math.LIQUIDATION_PRECISION
+        )
+
+    def _adjusted_collateral(self, prices: Sequence[int], index: int) -> int:
+        return engine_math.collateral_adjusted_for_threshold(
+            engine_math.get_collateral_value(
+                prices, self._collateral[index], self.price_scales
+            )
+        )
+
+    def _append_user(self, user: str) -> int:
+        index = len(self.users)
+        self._reserve(index + 1)
+        self._user_index[user] = index
+        self.users.append(user)
+        return index
+
+    def _reserve(self, size: int):
+        capacity = len(self._dsc_minted)
+        if size <= capacity:
+            return
+        new_capacity = max(size, capacity * 2)
+        self._collateral = _grow(self._collateral, new_capacity)
+        self._dsc_minted = _grow(self._dsc_minted, new_capacity)
+        self._collateral_f = _grow(self._collateral_f, new_capacity)
+        self._dsc_minted_f = _grow(self._dsc_minted_f, new_capacity)
+
+
+def get_feed_decimals(dsce) -> list[int]:
+    """Decimals of the feed of every collateral, in engine token order."""
+    aggregator = boa.load_vyi("src/interfaces/AggregatorV3Interface.vyi")
+    return [
+        aggregator.at(dsce.token_to_price_feed(token)).decimals()
+        for token in dsce.get_collateral_tokens()
+    ]
+
+
+def get_prices(dsce) -> list[int]:
+    """Current feed answers of every collateral, read through the engine."""
+    tokens = dsce.get_collateral_tokens()
+    return [
+        dsce.get_usd_value(token, engine_math.PRECISION)
+        // engine_math.price_scale(decimals)
+        for token, decimals in zip(tokens, get_feed_decimals(dsce))
+    ]
+
+
+def _grow(array: np.ndarray, capacity: int) -> np.ndarray:
+    grown = np.zeros((capacity, *array.shape[1:]), dtype=array.dtype)
+    grown[: len(array)] = array
+    return grown
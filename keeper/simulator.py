@@ -0,0 +1,269 @@
+"""
+Monte-Carlo price-shock and liquidation-cascade simulator.
+
+A population of ETH/BTC positions is replayed against thousands of correlated
+price paths at once. Each step prices every position of every path, liquidates
+the underwater ones the way a keeper calling `liquidate` would, and optionally
+pushes the seized collateral back into the price (cascades).
+
+The engine rules and constants are those of `keeper.engine_math`, but the
+batch math runs in float64 over (paths, positions) arrays: results are risk
+estimates, not wei-exact replays (use `keeper.engine_model` for those).
+"""
+
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+from keeper.engine_math import (
+    FEED_DECIMALS,
+    LIQUIDATION_BONUS,
+    LIQUIDATION_PRECISION,
+    LIQUIDATION_THRESHOLD,
+    PRECISION,
+    price_scale,
+)
+
+# @dev share of the collateral value that counts towards the health factor
+THRESHOLD_RATIO = LIQUIDATION_THRESHOLD / LIQUIDATION_PRECISION
+# @dev collateral seized per unit of debt covered
+BONUS_RATIO = 1 + LIQUIDATION_BONUS / LIQUIDATION_PRECISION
+
+
+# ------------------------------------------------------------------
+#                            POPULATION
+# ------------------------------------------------------------------
+@dataclass(frozen=True)
+class Population:
+    """
+    @param collateral (positions, 2) collateral amounts in wei, in the order
+        of `COLLATERAL_TOKENS`
+    @param debt (positions,) DSC minted, 18 decimals
+    """
+
+    collateral: np.ndarray
+    debt: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.debt)
+
+    @classmethod
+    def random(
+        cls,
+        size: int,
+        prices: Sequence[int],
+        rng: np.random.Generator,
+        min_health_factor: float = 1.0,
+        max_health_factor: float = 3.0,
+        median_collateral_usd: float = 10_000e18,
+        feed_decimals: Sequence[int] | None = None,
+    ) -> "Population":
+        """
+        Positions with a random collateral mix and health factors in the given range.
+
+        @param feed_decimals Decimals of each feed, 8 for both by default
+        """
+        collateral_usd = rng.lognormal(np.log(float(median_collateral_usd)), 1.0, size)
+        eth_share = rng.uniform(0.0, 1.0, size)
+        token_values = np.stack([eth_share, 1 - eth_share], axis=1) * collateral_usd[:, None]
+        collateral = token_values / (
+            np.asarray(prices, dtype=np.float64)
+            * _value_per_price_unit(feed_decimals)
+        )
+        health_factor = rng.uniform(min_health_factor, max_health_factor, size)
+        debt = collateral_usd * THRESHOLD_RATIO / health_factor
+        return cls(collateral, debt)
+
+    @classmethod
+    def from_scanner(cls, scanner) -> "Population":
+        """Snapshot of the positions tracked by a `HealthFactorScanner`."""
+        n = len(scanner)
+        return cls(
+            scanner._collateral[:n].astype(np.float64),
+            scanner._dsc_minted[:n].astype(np.float64),
+        )
+
+
+# ------------------------------------------------------------------
+#                           PRICE PATHS
+# ------------------------------------------------------------------
+def correlated_price_paths(
+    initial_prices: Sequence[int],
+    volatilities: Sequence[float],
+    correlation: float,
+    paths: int,
+    steps: int,
+    rng: np.random.Generator,
+    drifts: Sequence[float] = (0.0, 0.0),
+    dt: float = 1 / 365,
+) -> np.ndarray:
+    """
+    Correlated geometric Brownian motions.
+
+    @param volatilities Annualized volatility of each price
+    @param correlation Correlation of the two price shocks
+    @return (paths, steps + 1, 2) feed answers, the first step is `initial_prices`
+    """
+    cholesky = np.linalg.cholesky([[1.0, correlation], [correlation, 1.0]])
+    shocks = rng.standard_normal((paths, steps, 2)) @ cholesky.T
+    volatilities = np.asarray(volatilities, dtype=np.float64)
+    log_returns = (
+        np.asarray(drifts, dtype=np.float64) - volatilities**2 / 2
+    ) * dt + volatilities * np.sqrt(dt) * shocks
+    log_paths = np.concatenate(
+        [np.zeros((paths, 1, 2)), np.cumsum(log_returns, axis=1)], axis=1
+    )
+    return np.asarray(initial_prices, dtype=np.float64) * np.exp(log_paths)
+
+
+# ------------------------------------------------------------------
+#                            SIMULATION
+# ------------------------------------------------------------------
+@dataclass(frozen=True)
+class SimulationResult:
+    """Per-path outcomes, USD amounts with 18 decimals."""
+
+    bad_debt: np.ndarray
+    liquidation_volume: np.ndarray
+    liquidations: np.ndarray
+    collateralization: np.ndarray
+    min_collateralization: np.ndarray
+
+    def percentiles(
+        self, q: Sequence[float] = (50, 95, 99)
+    ) -> dict[str, dict[float, float]]:
+        return {
+            name: dict(zip(q, np.percentile(getattr(self, name), q)))
+            for name in (
+                "bad_debt",
+                "liquidation_volume",
+                "liquidations",
+                "collateralization",
+                "min_collateralization",
+            )
+        }
+
+
+class LiquidationSimulator:
+    def __init__(
+        self,
+        population: Population,
+        market_depth: Sequence[float] | None = None,
+        chunk_size: int = 256,
+        feed_decimals: Sequence[int] | None = None,
+    ):
+        """
+        @param market_depth USD value of each collateral that can be sold before
+            its price halves, None to ignore the price impact of liquidations
+        @param chunk_size Paths simulated together, bounds the memory used
+        @param feed_decimals Decimals of each feed, 8 for both by default
+        """
+        self.population = population
+        self.value_per_price_unit = _value_per_price_unit(feed_decimals)
+        self.market_depth = (
+            None if market_depth is None else np.asarray(market_depth, dtype=np.float64)
+        )
+        self.chunk_size = chunk_size
+
+    def run(self, price_paths: np.ndarray) -> SimulationResult:
+        """@param price_paths (paths, steps + 1, 2) feed answers"""
+        chunks = [
+            self._run_chunk(price_paths[start : start + self.chunk_size])
+            for start in range(0, len(price_paths), self.chunk_size)
+        ]
+        return SimulationResult(
+            *(np.concatenate(column) for column in zip(*chunks))
+        )
+
+    def _run_chunk(self, price_paths: np.ndarray) -> tuple[np.ndarray, ...]:
+        paths = len(price_paths)
+        # @dev one (paths, positions) array per collateral, every path starts
+        # from the same population
+        collateral = [
+            np.repeat(self.population.collateral[None, :, i], paths, axis=0)
+            for i in range(2)
+        ]
+        debt = np.repeat(self.population.debt[None, :], paths, axis=0)
+        positions = debt.shape[1]
+        adjusted = np.empty_like(debt)
+        total_debt = debt.sum(axis=1)
+        impact = np.ones((paths, 2))
+        liquidation_volume = np.zeros(paths)
+        liquidations = np.zeros(paths)
+        min_collateralization = np.full(paths, np.inf)
+
+        for step in range(price_paths.shape[1]):
+            token_value = price_paths[:, step] * impact * self.value_per_price_unit
+            collateral_value = collateral[0] * token_value[:, :1]
+            collateral_value += collateral[1] * token_value[:, 1:]
+            min_collateralization = np.minimum(
+                min_collateralization,
+                _collateralization(collateral_value.sum(axis=1), total_debt),
+            )
+
+            # @dev only the few underwater positions are touched from here on
+            np.multiply(collateral_value, THRESHOLD_RATIO, out=adjusted)
+            flat = np.flatnonzero(adjusted < debt)
+            value = collateral_value.flat[flat]
+            owed = debt.flat[flat]
+            # @dev `liquidate` only succeeds if it improves the health factor,
+            # i.e. while the collateral is worth more than the debt plus bonus
+            liquidatable = value > BONUS_RATIO * owed
+            flat, value, owed = flat[liquidatable], value[liquidatable], owed[liquidatable]
+            rows = flat // positions
+
+            # @dev debt to cover to bring the health factor back to exactly 1
+            covered = (owed - THRESHOLD_RATIO * value) / (
+                1 - THRESHOLD_RATIO * BONUS_RATIO
+            )
+            kept = 1 - BONUS_RATIO * covered / value
+            debt.flat[flat] = owed - covered
+            collateral_value.flat[flat] = value * kept
+            covered_per_path = np.bincount(rows, weights=covered, minlength=paths)
+            total_debt -= covered_per_path
+            liquidation_volume += covered_per_path
+            liquidations += np.bincount(rows, minlength=paths)
+
+            sold = np.zeros((paths, 2))
+            for i in range(2):
+                amount = collateral[i].flat[flat]
+                collateral[i].flat[flat] = amount * kept
+                sold[:, i] = np.bincount(
+                    rows,
+                    weights=amount * (1 - kept) * token_value[rows, i],
+                    minlength=paths,
+                )
+            if self.market_depth is not None:
+                impact *= np.exp(-np.log(2) * sold / self.market_depth)
+
+        bad_debt = np.maximum(debt - collateral_value, 0.0).sum(axis=1)
+        return (
+            bad_debt,
+            liquidation_volume,
+            liquidations,
+            _collateralization(collateral_value.sum(axis=1), total_debt),
+            min_collateralization,
+        )
+
+
+def _value_per_price_unit(feed_decimals: Sequence[int] | None) -> np.ndarray:
+    """USD value (18 decimals) of 1 wei of each collateral per unit of feed answer."""
+    return np.asarray(
+        [
+            price_scale(decimals) / PRECISION
+            for decimals in feed_decimals or [FEED_DECIMALS] * 2
+        ]
+    )
+
+
+def _collateralization(
+    total_collateral_value: np.ndarray, total_debt: np.ndarray
+) -> np.ndarray:
+    """Total collateral value over total debt, in percent."""
+    return np.divide(
+        total_collateral_value * 100,
+        total_debt,
+        out=np.full(len(total_debt), np.inf),
+        where=total_debt > 0,
+    )
@@ -0,0 +1,389 @@
+"""
+Binary snapshots of the engine state: every position, DSC balance and price.
+
+Replaying `deposit_and_mint` for 100k users takes hours under boa. A snapshot
+is written straight from storage, and restored by writing the engine, DSC and
+collateral storage slots of a fresh deployment, so a realistic state for a
+replay, a simulation or an incident reproduction loads in seconds.
+
+Layout, all integers big-endian except the header:
+
+    header     HEADER, 64 bytes
+    tokens     TOKEN records, one per COLLATERAL_TOKENS entry, in order
+    accounts   account records, `account_dtype(tokens)`: the user, its
+               uint112 collateral lanes, `dsc_minted` and DSC balance
+
+The account table is fixed-size records after a fixed offset, `Snapshot.open`
+maps it with `np.memmap` and decodes an account only when it is read.
+"""
+
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+import boa
+import numpy as np
+from eth_utils import keccak, to_checksum_address
+
+MAGIC = b"DSCESNAP"
+VERSION = 1
+HEADER = np.dtype(
+    [
+        ("magic", "S8"),
+        ("version", "<u4"),
+        ("tokens", "<u4"),
+        ("accounts", "<u8"),
+        ("block", "<u8"),
+        ("timestamp", "<u8"),
+        ("reserved", "u1", 24),
+    ]
+)
+TOKEN = np.dtype([("token", "u1", 20), ("feed", "u1", 20), ("price", "u1", 32)])
+# @dev a collateral lane of the engine is an uint112
+LANE_BYTES = 14
+# @dev mirror of the engine packing, see src/dsc_engine.vy
+COLLATERAL_LANE_BITS = 112
+COLLATERAL_LANE_MASK = 2**112 - 1
+COLLATERAL_LANES = 2
+HELD_OFFSET = 224
+DECODE_CHUNK = 4096
+
+
+def account_dtype(tokens: int) -> np.dtype:
+    return np.dtype(
+        [
+            ("user", "u1", 20),
+            ("deposits", "u1", (tokens, LANE_BYTES)),
+            ("dsc_minted", "u1", 32),
+            ("dsc_balance", "u1", 32),
+        ]
+    )
+
+
+# ------------------------------------------------------------------
+#                             SNAPSHOT
+# ------------------------------------------------------------------
+@dataclass(frozen=True)
+class Account:
+    user: str
+    # @dev in the order of COLLATERAL_TOKENS
+    deposits: tuple[int, ...]
+    dsc_minted: int
+    dsc_balance: int
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    block: int
+    timestamp: int
+    tokens: tuple[str, ...]
+    feeds: tuple[str, ...]
+    prices: tuple[int, ...]
+    # @dev `account_dtype` records, memory mapped by `open`
+    records: np.ndarray
+
+    @classmethod
+    def open(cls, path: str | Path) -> "Snapshot":
+        header = np.fromfile(path, HEADER, count=1)[0]
+        if header["magic"] != MAGIC or header["version"] != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} engine snapshot")
+        token_count = int(header["tokens"])
+        tokens = np.fromfile(path, TOKEN, count=token_count, offset=HEADER.itemsize)
+        account_count = int(header["accounts"])
+        records = (
+            np.memmap(
+                path,
+                account_dtype(token_count),
+                mode="r",
+                offset=HEADER.itemsize + TOKEN.itemsize * token_count,
+                shape=(account_count,),
+            )
+            if account_count
+            else np.zeros(0, account_dtype(token_count))
+        )
+        return cls(
+            block=int(header["block"]),
+            timestamp=int(header["timestamp"]),
+            tokens=tuple(_address(token["token"]) for token in tokens),
+            feeds=tuple(_address(token["feed"]) for token in tokens),
+            prices=tuple(
+                int.from_bytes(token["price"].tobytes(), "big", signed=True)
+                for token in tokens
+            ),
+            records=records,
+        )
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[Account]:
+        return (self.account(i) for i in range(len(self.records)))
+
+    def account(self, index: int) -> Account:
+        user, deposits, dsc_minted, dsc_balance = _decode(
+            self.records[index : index + 1].tobytes(), len(self.tokens)
+        )
+        return Account(to_checksum_address(user), deposits, dsc_minted, dsc_balance)
+
+    def _raw_accounts(self) -> Iterator[tuple[bytes, tuple[int, ...], int, int]]:
+        """@dev `account` without the checksum, read a chunk of the map at once"""
+        size = self.records.dtype.itemsize
+        for start in range(0, len(self.records), DECODE_CHUNK):
+            chunk = self.records[start : start + DECODE_CHUNK].tobytes()
+            for offset in range(0, len(chunk), size):
+                yield _decode(chunk[offset : offset + size], len(self.tokens))
+
+
+def write_snapshot(
+    path: str | Path,
+    tokens: list[str],
+    feeds: list[str],
+    prices: list[int],
+    accounts: Iterable[Account],
+    block: int = 0,
+    timestamp: int = 0,
+) -> int:
+    """
+    @return The number of accounts written
+    @dev accounts are streamed to the file, `export_snapshot` never holds
+        more than one in memory
+    """
+    path = Path(path)
+    token_table = np.frombuffer(
+        b"".join(
+            _address_bytes(token)
+            + _address_bytes(feed)
+            + price.to_bytes(32, "big", signed=True)
+            for token, feed, price in zip(tokens, feeds, prices, strict=True)
+        ),
+        TOKEN,
+    )
+    count = 0
+    with path.open("wb") as file:
+        # @dev rewritten with the account count once they are all out
+        file.write(bytes(HEADER.itemsize))
+        token_table.tofile(file)
+        for account in accounts:
+            if len(account.deposits) != len(tokens):
+                raise ValueError(f"{account.user}: one deposit per token expected")
+            file.write(
+                _address_bytes(account.user)
+                + b"".join(d.to_bytes(LANE_BYTES, "big") for d in account.deposits)
+                + account.dsc_minted.to_bytes(32, "big")
+                + account.dsc_balance.to_bytes(32, "big")
+            )
+            count += 1
+        header = np.zeros(1, HEADER)
+        header[0] = (MAGIC, VERSION, len(tokens), count, block, timestamp, 0)
+        file.seek(0)
+        header.tofile(file)
+    return count
+
+
+# ------------------------------------------------------------------
+#                          EXPORT / RESTORE
+# ------------------------------------------------------------------
+def export_snapshot(path: str | Path, dsce, dsc, feeds, users: Iterable[str]) -> int:
+    """
+    Snapshot of `users` on the chain boa is connected to.
+
+    @param feeds Feeds of the engine (boa contracts), in the order of
+        `COLLATERAL_TOKENS`, read through `latestRoundData`
+    @param users Accounts to save, e.g. the users of keeper.indexer; users
+        without position nor DSC are left out
+    @return The number of accounts written
+    @dev positions and balances are read from storage, one slot per word
+        instead of one eth_call per getter
+    """
+    tokens = list(dsce.get_collateral_tokens())
+    if [str(feed.address) for feed in feeds] != [
+        str(dsce.token_to_price_feed(token)) for token in tokens
+    ]:
+        raise ValueError("feeds do not match the engine price feeds")
+    engine = _EngineSlots(dsce, dsc)
+
+    def accounts() -> Iterator[Account]:
+        for user in dict.fromkeys(str(user) for user in users):
+            account = engine.read(user, len(tokens))
+            if any(account.deposits) or account.dsc_minted or account.dsc_balance:
+                yield account
+
+    return write_snapshot(
+        path,
+        tokens,
+        [str(feed.address) for feed in feeds],
+        [feed.latestRoundData()[1] for feed in feeds],
+        accounts(),
+        block=boa.env.evm.patch.block_number,
+        timestamp=boa.env.evm.patch.timestamp,
+    )
+
+
+def restore_snapshot(snapshot: Snapshot, dsce, dsc, tokens, feeds) -> int:
+    """
+    Loads a snapshot into a fresh deployment, the py-evm chain of boa only.
+
+    @param tokens, feeds Mock collaterals and feeds (boa contracts) of `dsce`,
+        in the order of `COLLATERAL_TOKENS`, they take the place of the
+        snapshot ones index by index
+    @return The number of accounts restored
+    @dev slots are written directly: the positions and the engine totals,
+        the DSC balances and supply, and the collateral balances and supplies,
+        for the engine to hold what its users deposited. The feeds get the snapshot prices
+        through `updateAnswer`, fresh for the staleness check. The snapshot
+        users must have no position nor DSC in the target yet.
+    """
+    if [str(token.address) for token in tokens] != list(dsce.get_collateral_tokens()):
+        raise ValueError("tokens do not match the engine collaterals")
+    if len(tokens) != len(snapshot.tokens):
+        raise ValueError(
+            f"snapshot of {len(snapshot.tokens)} collaterals, engine of {len(tokens)}"
+        )
+    engine = _EngineSlots(dsce, dsc)
+    deposited = [0] * len(tokens)
+    dsc_supply = 0
+    total_dsc_minted = 0
+    for user, deposits, dsc_minted, dsc_balance in snapshot._raw_accounts():
+        engine.write(user, deposits, dsc_minted, dsc_balance)
+        deposited = [total + d for total, d in zip(deposited, deposits)]
+        dsc_supply += dsc_balance
+        total_dsc_minted += dsc_minted
+
+    engine.add_totals(deposited, total_dsc_minted)
+    _add_supply(dsc, None, dsc_supply)
+    for token, amount in zip(tokens, deposited):
+        _add_supply(token, dsce.address, amount)
+    for feed, price in zip(feeds, snapshot.prices):
+        feed.updateAnswer(price)
+    return len(snapshot)
+
+
+# ------------------------------------------------------------------
+#                            INTERNALS
+# ------------------------------------------------------------------
+class _EngineSlots:
+    """Storage slots of a user in the engine and DSC, per their layouts."""
+
+    def __init__(self, dsce, dsc):
+        self.dsce = dsce.address
+        self.dsc = dsc.address
+        engine_layout = _storage_layout(dsce)
+        self.position_slot = engine_layout["user_to_position"]["slot"]
+        self.collateral_slot = engine_layout["user_to_collateral"]["slot"]
+        self.total_collateral_slot = engine_layout["total_collateral"]["slot"]
+        self.total_dsc_minted_slot = engine_layout["total_dsc_minted"]["slot"]
+        self.balance_slot = _storage_layout(dsc)["erc20"]["balanceOf"]["slot"]
+
+    def read(self, user: str, tokens: int) -> Account:
+        user = _address_bytes(user)
+        position = _mapping_slot(self.position_slot, user)
+        first_slot = boa.env.get_storage(self.dsce, position)
+        held = first_slot >> HELD_OFFSET
+        deposits = [0] * tokens
+        for index in range(tokens):
+            if not (held >> index) & 1:
+                continue
+            slot, lane = divmod(index, COLLATERAL_LANES)
+            packed = (
+                first_slot
+                if slot == 0
+                else boa.env.get_storage(
+                    self.dsce,
+                    _mapping_slot(_mapping_slot(self.collateral_slot, user), slot),
+                )
+            )
+            deposits[index] = _unpack(packed, lane)
+        return Account(
+            user=to_checksum_address(user),
+            deposits=tuple(deposits),
+            dsc_minted=boa.env.get_storage(self.dsce, position + 1),
+            dsc_balance=boa.env.get_storage(
+                self.dsc, _mapping_slot(self.balance_slot, user)
+            ),
+        )
+
+    def write(
+        self, user: bytes, deposits: tuple[int, ...], dsc_minted: int, dsc_balance: int
+    ):
+        """@dev py-evm only, straight to the state: 100k users, 300k slots"""
+        state = boa.env.evm.vm.state
+        dsce = _address_bytes(self.dsce)
+        packed = {}
+        held = 0
+        for index, amount in enumerate(deposits):
+            if amount == 0:
+                continue
+            slot, lane = divmod(index, COLLATERAL_LANES)
+            packed[slot] = packed.get(slot, 0) | amount << (lane * COLLATERAL_LANE_BITS)
+            held |= 1 << index
+        position = _mapping_slot(self.position_slot, user)
+        state.set_storage(dsce, position, packed.pop(0, 0) | held << HELD_OFFSET)
+        state.set_storage(dsce, position + 1, dsc_minted)
+        collateral = _mapping_slot(self.collateral_slot, user)
+        for slot, value in packed.items():
+            state.set_storage(dsce, _mapping_slot(collateral, slot), value)
+        dsc = _address_bytes(self.dsc)
+        state.set_storage(dsc, _mapping_slot(self.balance_slot, user), dsc_balance)
+
+    def add_totals(self, deposited: list[int], dsc_minted: int):
+        """@dev Protocol-wide counters, `total_collateral[i]` and `total_dsc_minted`"""
+        slots = [self.total_collateral_slot + i for i in range(len(deposited))]
+        for slot, amount in zip(
+            slots + [self.total_dsc_minted_slot], deposited + [dsc_minted]
+        ):
+            if amount:
+                total = boa.env.get_storage(self.dsce, slot)
+                boa.env.set_storage(self.dsce, slot, total + amount)
+
+
+def _add_supply(token, holder: str | None, amount: int):
+    """@dev `amount` more `token`, credited to `holder` if any"""
+    if amount == 0:
+        return
+    layout = _storage_layout(token)["erc20"]
+    supply_slot = layout["totalSupply"]["slot"]
+    supply = boa.env.get_storage(token.address, supply_slot)
+    boa.env.set_storage(token.address, supply_slot, supply + amount)
+    if holder is not None:
+        slot = _mapping_slot(layout["balanceOf"]["slot"], _address_bytes(holder))
+        boa.env.set_storage(
+            token.address, slot, boa.env.get_storage(token.address, slot) + amount
+        )
+
+
+def _storage_layout(contract) -> dict:
+    return contract.compiler_data.storage_layout["storage_layout"]
+
+
+def _mapping_slot(slot: int, key: bytes | int) -> int:
+    """@dev Vyper HashMap slot: keccak256(slot ++ key), an address or an uint256"""
+    key_word = (
+        key.rjust(32, b"\x00") if isinstance(key, bytes) else key.to_bytes(32, "big")
+    )
+    return int.from_bytes(keccak(slot.to_bytes(32, "big") + key_word), "big")
+
+
+def _decode(record: bytes, tokens: int) -> tuple[bytes, tuple[int, ...], int, int]:
+    """@dev One `account_dtype(tokens)` record: user, deposits, debt, balance"""
+    end = 20 + tokens * LANE_BYTES
+    return (
+        record[:20],
+        tuple(
+            int.from_bytes(record[i : i + LANE_BYTES], "big")
+            for i in range(20, end, LANE_BYTES)
+        ),
+        int.from_bytes(record[end : end + 32], "big"),
+        int.from_bytes(record[end + 32 : end + 64], "big"),
+    )
+
+
+def _unpack(packed: int, lane: int) -> int:
+    return (packed >> (lane * COLLATERAL_LANE_BITS)) & COLLATERAL_LANE_MASK
+
+
+def _address(raw: np.ndarray) -> str:
+    return to_checksum_address(raw.tobytes())
+
+
+def _address_bytes(address: str) -> bytes:
+    return bytes.fromhex(str(address)[2:])
@@ -0,0 +1,116 @@
+"""
+Compiled contracts cached on disk, keyed by the hash of their sources.
+
+Boa caches compiler output too, but it parses and type-checks a contract and
+every module it imports before it can compute its cache key, which is most of
+the time a warm load takes. Here the key is computed from the source bytes
+alone: the contract, the files it imports, recursively, and the compiler
+version. A hit unpickles the compiler data and skips vyper entirely.
+"""
+
+import hashlib
+import os
+import pickle
+import re
+import sys
+import threading
+from functools import cache
+from pathlib import Path
+
+import boa
+import vyper
+from boa.contracts.vyper.vyper_contract import VyperDeployer
+from boa.interpret import _get_default_deployer_class, compiler_data
+from vyper.compiler.settings import anchor_settings
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+ARTIFACTS_DIR = Path(os.environ.get("ARTIFACTS_DIR", PROJECT_ROOT / ".artifacts"))
+# @dev roots of the absolute imports, after the importer directory and before
+# the python path
+SEARCH_PATHS = (PROJECT_ROOT / "src", PROJECT_ROOT / "lib" / "pypi", PROJECT_ROOT)
+
+_IMPORT = re.compile(
+    r"^\s*(?:from\s+(\.*)([\w.]*)\s+import\s+(\([^)]*\)|[^#\n]+)|import\s+([\w.]+))",
+    re.MULTILINE,
+)
+
+
+@cache
+def load_deployer(path: str) -> VyperDeployer:
+    """
+    @param path Contract source, relative to the project root
+    @return The deployer boa would return for `from src... import ...`
+    """
+    source_path = PROJECT_ROOT / path
+    deployer_class = _get_default_deployer_class()
+    if deployer_class is not VyperDeployer:
+        # @dev other deployers (zksync) do not compile with vyper, no cache
+        return boa.load_partial(str(source_path))
+
+    artifact = ARTIFACTS_DIR / f"{source_path.stem}-{source_key(source_path)}.pickle"
+    try:
+        data = pickle.loads(artifact.read_bytes())
+    except OSError:
+        data = _compile(source_path)
+        artifact.parent.mkdir(parents=True, exist_ok=True)
+        # @dev the rename is atomic, concurrent workers never read half a file
+        tmp = artifact.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(pickle.dumps(data))
+        tmp.rename(artifact)
+    return VyperDeployer(data, filename=str(source_path))
+
+
+def source_key(source_path: Path) -> str:
+    """sha256 of the compiler version and of every source the contract depends on."""
+    source_path = source_path.resolve()
+    digest = hashlib.sha256(f"{vyper.__version__}.{vyper.__commit__}".encode())
+    # @dev the path ends up in the source maps and error messages
+    digest.update(str(source_path).encode())
+    for dependency in sorted(_dependencies(source_path)):
+        digest.update(hashlib.sha256(dependency.read_bytes()).digest())
+    return digest.hexdigest()[:32]
+
+
+def _dependencies(source_path: Path, seen: set[Path] | None = None) -> set[Path]:
+    seen = set() if seen is None else seen
+    if source_path in seen:
+        return seen
+    seen.add(source_path)
+    for level, module, names, plain_module in _IMPORT.findall(source_path.read_text()):
+        if plain_module:
+            candidates = [plain_module]
+        else:
+            names = [
+                name.split()[0] for name in names.strip("()").split(",") if name.strip()
+            ]
+            candidates = [f"{module}.{name}" if module else name for name in names]
+        for candidate in candidates:
+            resolved = _resolve(candidate, source_path, len(level))
+            # @dev unresolved imports are compiler builtins, covered by its version
+            if resolved is not None:
+                _dependencies(resolved, seen)
+    return seen
+
+
+def _resolve(module: str, importer: Path, level: int) -> Path | None:
+    relative = Path(*module.split("."))
+    if level:
+        roots = [importer.parents[level - 1]]
+    else:
+        # @dev like vyper, the directory of the importer comes first
+        roots = [importer.parent, *SEARCH_PATHS, *(Path(p) for p in sys.path if p)]
+    for root in roots:
+        for suffix in (".vy", ".vyi"):
+            candidate = (root / relative).with_suffix(suffix)
+            if candidate.is_file():
+                return candidate.resolve()
+    return None
+
+
+def _compile(source_path: Path):
+    data = compiler_data(
+        source_path.read_text(), str(source_path), str(source_path), VyperDeployer
+    )
+    with anchor_settings(data.settings):
+        _ = data.bytecode, data.bytecode_runtime
+    return data
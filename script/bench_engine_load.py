@@ -0,0 +1,28 @@
+from moccasin.config import Network, get_active_network
+
+from keeper.loadgen import LoadGenerator, LoadReport
+
+USERS = 2_000
+TRANSACTIONS = 10_000
+
+
+def bench_engine_load(users: int = USERS, transactions: int = TRANSACTIONS) -> LoadReport:
+    active_network: Network = get_active_network()
+    generator = LoadGenerator(
+        active_network.manifest_named("dsc_engine"),
+        active_network.manifest_named("decentralized_stable_coin"),
+        [active_network.manifest_named(name) for name in ("weth", "wbtc")],
+        [
+            active_network.manifest_named(name)
+            for name in ("eth_usd_price_feed", "btc_usd_price_feed")
+        ],
+        users,
+    )
+    generator.setup()
+    report = generator.run(transactions)
+    print(report.format())
+    return report
+
+
+def moccasin_main() -> LoadReport:
+    return bench_engine_load()
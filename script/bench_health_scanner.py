@@ -0,0 +1,39 @@
+import time
+
+import numpy as np
+
+from keeper.scanner import HealthFactorScanner
+
+POSITIONS = 1_000_000
+TICKS = 20
+ETH_PRICE = 2_000 * 10**8
+BTC_PRICE = 30_000 * 10**8
+
+
+def bench_health_scanner(positions: int = POSITIONS, ticks: int = TICKS) -> float:
+    rng = np.random.default_rng(0)
+    weth = rng.integers(0, 10**6, positions, dtype=np.int64)
+    wbtc = rng.integers(0, 10**5, positions, dtype=np.int64)
+    debt = rng.integers(1, 10**8, positions, dtype=np.int64)
+    scanner = HealthFactorScanner(["weth", "wbtc"], capacity=positions)
+    scanner.set_positions(
+        [f"user_{i}" for i in range(positions)],
+        [(int(a) * 10**15, int(b) * 10**13) for a, b in zip(weth, wbtc)],
+        [int(d) * 10**12 for d in debt],
+    )
+
+    timings = []
+    for tick in range(ticks):
+        prices = [ETH_PRICE - tick * 10**9, BTC_PRICE - tick * 10**10]
+        start = time.perf_counter()
+        underwater = scanner.underwater(prices)
+        timings.append(time.perf_counter() - start)
+        print(f"tick {tick}: {len(underwater)} underwater")
+
+    median_ms = float(np.median(timings)) * 1000
+    print(f"re-scored {positions} positions in {median_ms:.1f} ms (median)")
+    return median_ms
+
+
+def moccasin_main() -> float:
+    return bench_health_scanner()
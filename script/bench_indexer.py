@@ -0,0 +1,102 @@
+import os
+import random
+import tempfile
+import time
+
+from keeper.indexer import (
+    COLLATERAL_DEPOSITED_TOPIC,
+    COLLATERAL_REDEEMED_TOPIC,
+    DSC_BURNED_TOPIC,
+    DSC_MINTED_TOPIC,
+    TRANSFER_TOPIC,
+    EngineIndexer,
+    PositionStore,
+    RecordedLogSource,
+)
+
+EVENTS = 1_000_000
+USERS = 10_000
+TXS_PER_BLOCK = 50
+ENGINE = "0x" + "ee" * 20
+TOKENS = ["0x" + "aa" * 20, "0x" + "bb" * 20]
+
+
+def bench_indexer(events: int = EVENTS, users: int = USERS) -> float:
+    source = _synthesize_logs(events, users)
+    with tempfile.TemporaryDirectory() as directory:
+        store = PositionStore(os.path.join(directory, "positions.db"))
+        indexer = EngineIndexer(source, store, ENGINE, TOKENS)
+
+        start = time.perf_counter()
+        processed = indexer.sync()
+        elapsed = time.perf_counter() - start
+        store.connection.close()
+
+    print(f"backfilled {processed} events in {elapsed:.1f} s")
+    print(f"{processed / elapsed:,.0f} events/s")
+    return elapsed
+
+
+def _synthesize_logs(events: int, users: int) -> RecordedLogSource:
+    """deposit_and_mint, redeem_collateral and burn_dsc traffic, engine log shapes"""
+    rng = random.Random(0)
+    user_topics = [rng.getrandbits(160) for _ in range(users)]
+    engine_topic = int(ENGINE, 16)
+    deposited = [[0, 0] for _ in range(users)]
+    minted = [0] * users
+    source = RecordedLogSource()
+
+    produced = 0
+    block = 0
+    while produced < events:
+        block += 1
+        for _ in range(TXS_PER_BLOCK):
+            user = rng.randrange(users)
+            token = rng.randrange(2)
+            amount = rng.randrange(1, 10**20)
+            action = rng.random()
+            user_topic = user_topics[user]
+            if action < 0.5 or deposited[user][token] == 0:
+                deposited[user][token] += amount
+                minted[user] += amount // 4
+                logs = [
+                    (0, ENGINE, (COLLATERAL_DEPOSITED_TOPIC, user_topic, amount), b""),
+                    (
+                        1,
+                        TOKENS[token],
+                        (TRANSFER_TOPIC, user_topic, engine_topic),
+                        _word(amount),
+                    ),
+                    (2, ENGINE, (DSC_MINTED_TOPIC, user_topic), _word(amount // 4)),
+                ]
+                produced += 2
+            elif action < 0.75:
+                amount = rng.randrange(1, deposited[user][token] + 1)
+                deposited[user][token] -= amount
+                token_topic = int(TOKENS[token], 16)
+                logs = [
+                    (
+                        0,
+                        ENGINE,
+                        (COLLATERAL_REDEEMED_TOPIC, token_topic, user_topic, user_topic),
+                        _word(amount),
+                    )
+                ]
+                produced += 1
+            else:
+                amount = minted[user] // 2
+                minted[user] -= amount
+                logs = [
+                    (0, ENGINE, (DSC_BURNED_TOPIC, user_topic, user_topic), _word(amount))
+                ]
+                produced += 1
+            source.append(block, logs)
+    return source
+
+
+def _word(value: int) -> bytes:
+    return value.to_bytes(32, "big")
+
+
+def moccasin_main() -> float:
+    return bench_indexer()
@@ -0,0 +1,64 @@
+import time
+
+import numpy as np
+
+from keeper.liquidation_index import LiquidationPriceIndex
+from keeper.scanner import HealthFactorScanner
+
+POSITIONS = 200_000
+TICKS = 20
+# @dev share of the positions holding both collaterals, re-keyed on every tick
+MULTI_COLLATERAL_SHARE = 0.1
+ETH_PRICE = 2_000 * 10**8
+BTC_PRICE = 30_000 * 10**8
+
+
+def bench_liquidation_index(
+    positions: int = POSITIONS, ticks: int = TICKS
+) -> dict[str, float]:
+    rng = np.random.default_rng(0)
+    weth = rng.integers(1, 10**6, positions, dtype=np.int64)
+    wbtc = rng.integers(1, 10**5, positions, dtype=np.int64)
+    kind = rng.random(positions)
+    # @dev weth only, wbtc only, or both
+    weth[(kind >= MULTI_COLLATERAL_SHARE) & (kind < 0.55)] = 0
+    wbtc[kind >= 0.55] = 0
+    users = [f"user_{i}" for i in range(positions)]
+    amounts = [(int(a) * 10**15, int(b) * 10**13) for a, b in zip(weth, wbtc)]
+    # @dev health factors between 1.05 and 3
+    debts = [
+        int((a * ETH_PRICE + b * BTC_PRICE) * 10**8 // 10**18 / 2 / h)
+        for (a, b), h in zip(amounts, rng.uniform(1.05, 3.0, positions))
+    ]
+
+    start = time.perf_counter()
+    index = LiquidationPriceIndex(["weth", "wbtc"], [ETH_PRICE, BTC_PRICE])
+    index.set_positions(users, amounts, debts)
+    print(f"indexed {positions} positions in {time.perf_counter() - start:.1f} s")
+    scanner = HealthFactorScanner(["weth", "wbtc"], capacity=positions)
+    scanner.set_positions(users, amounts, debts)
+
+    index_timings = []
+    scanner_timings = []
+    for tick in range(1, ticks + 1):
+        prices = [ETH_PRICE - tick * 2 * 10**9, BTC_PRICE]
+        start = time.perf_counter()
+        crossed = index.update_price("weth", prices[0])
+        index_timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        underwater = scanner.underwater(prices)
+        scanner_timings.append(time.perf_counter() - start)
+        print(f"tick {tick}: {len(crossed)} crossed, {len(underwater)} underwater")
+
+    timings = {
+        "index": float(np.median(index_timings)) * 1000,
+        "scanner": float(np.median(scanner_timings)) * 1000,
+    }
+    print(f"  index: {timings['index']:.1f} ms per tick (median)")
+    print(f"scanner: {timings['scanner']:.1f} ms per tick (median)")
+    return timings
+
+
+def moccasin_main() -> dict[str, float]:
+    return bench_liquidation_index()
@@ -0,0 +1,86 @@
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from moccasin.config import Network, get_active_network
+
+from keeper.rpc import AsyncJsonRpcClient, BoaRpcServer, EngineReader
+from keeper.snapshot import Snapshot, restore_snapshot, write_snapshot
+from script.bench_snapshot import _synthetic_accounts
+
+USERS = 500
+# @dev round trip to a hosted endpoint
+LATENCY = 0.01
+
+
+async def _read_positions(url: str, engine: str, users: list[str], batched: bool):
+    # @dev one read at a time and one call per request, as the keepers do now
+    options = {} if batched else {"max_connections": 1, "max_batch_size": 1}
+    async with AsyncJsonRpcClient(url, **options) as client:
+        reader = EngineReader(client, engine)
+        await reader.refresh()
+        if batched:
+            return await reader.positions(users)
+        tokens = await reader.collateral_tokens()
+        amounts = []
+        dsc_minted = []
+        for user in users:
+            amounts.append(
+                [await reader.collateral_balance(user, token) for token in tokens]
+            )
+            dsc_minted.append((await reader.account_information(user))[0])
+        return amounts, dsc_minted
+
+
+async def _bench(engine: str, users: list[str], latency: float) -> dict[str, float]:
+    timings = {}
+    results = {}
+    async with BoaRpcServer(latency) as server:
+        for mode in ("sequential", "batched"):
+            requests = server.http_requests
+            start = time.perf_counter()
+            results[mode] = await _read_positions(
+                server.url, engine, users, mode == "batched"
+            )
+            timings[mode] = time.perf_counter() - start
+            print(
+                f"{mode:>10}: {timings[mode]:.2f} s, "
+                f"{server.http_requests - requests:,} HTTP requests"
+            )
+    assert results["sequential"] == results["batched"]
+    return timings
+
+
+def bench_rpc_reads(users: int = USERS, latency: float = LATENCY) -> dict[str, float]:
+    active_network: Network = get_active_network()
+    dsce = active_network.manifest_named("dsc_engine")
+    dsc = active_network.manifest_named("decentralized_stable_coin")
+    tokens = [active_network.manifest_named(name) for name in ("weth", "wbtc")]
+    feeds = [
+        active_network.manifest_named(name)
+        for name in ("eth_usd_price_feed", "btc_usd_price_feed")
+    ]
+    prices = [feed.latestAnswer() for feed in feeds]
+    accounts = _synthetic_accounts(users, prices)
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "positions.snapshot"
+        write_snapshot(
+            path,
+            [str(token.address) for token in tokens],
+            [str(feed.address) for feed in feeds],
+            prices,
+            accounts,
+        )
+        restore_snapshot(Snapshot.open(path), dsce, dsc, tokens, feeds)
+
+    print(f"{users} positions, {latency * 1000:.0f} ms per round trip")
+    timings = asyncio.run(
+        _bench(str(dsce.address), [account.user for account in accounts], latency)
+    )
+    print(f"speedup: {timings['sequential'] / timings['batched']:.0f}x")
+    return timings
+
+
+def moccasin_main() -> dict[str, float]:
+    return bench_rpc_reads()
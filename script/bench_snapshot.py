@@ -0,0 +1,83 @@
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from eth_utils import to_checksum_address
+from moccasin.config import Network, get_active_network
+
+from keeper import engine_math
+from keeper.snapshot import (
+    Account,
+    Snapshot,
+    export_snapshot,
+    restore_snapshot,
+    write_snapshot,
+)
+
+USERS = 100_000
+SEED = 0
+
+
+def _synthetic_accounts(users: int, prices: list[int]) -> list[Account]:
+    """@dev positions between hf 1.2 and 3, the DSC still in the minter wallet"""
+    rng = random.Random(SEED)
+    accounts = []
+    for _ in range(users):
+        deposits = tuple(rng.randrange(10**17, 100 * 10**18) for _ in prices)
+        adjusted = engine_math.collateral_adjusted_for_threshold(
+            engine_math.get_collateral_value(prices, deposits)
+        )
+        dsc_minted = int(adjusted / rng.uniform(1.2, 3.0))
+        user = to_checksum_address(rng.randbytes(20))
+        accounts.append(Account(user, deposits, dsc_minted, dsc_minted))
+    return accounts
+
+
+def bench_snapshot(users: int = USERS) -> dict[str, float]:
+    active_network: Network = get_active_network()
+    dsce = active_network.manifest_named("dsc_engine")
+    dsc = active_network.manifest_named("decentralized_stable_coin")
+    tokens = [active_network.manifest_named(name) for name in ("weth", "wbtc")]
+    feeds = [
+        active_network.manifest_named(name)
+        for name in ("eth_usd_price_feed", "btc_usd_price_feed")
+    ]
+    prices = [feed.latestAnswer() for feed in feeds]
+    accounts = _synthetic_accounts(users, prices)
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = Path(directory) / "synthetic.snapshot"
+        write_snapshot(
+            source,
+            [str(token.address) for token in tokens],
+            [str(feed.address) for feed in feeds],
+            prices,
+            accounts,
+        )
+
+        start = time.perf_counter()
+        restore_snapshot(Snapshot.open(source), dsce, dsc, tokens, feeds)
+        restore = time.perf_counter() - start
+
+        start = time.perf_counter()
+        export_snapshot(
+            Path(directory) / "export.snapshot",
+            dsce,
+            dsc,
+            feeds,
+            (account.user for account in accounts),
+        )
+        export = time.perf_counter() - start
+        size = source.stat().st_size
+
+    sample = accounts[-1]
+    assert dsce.get_account_information(sample.user)[0] == sample.dsc_minted
+    print(f"{users} accounts, {size:,} bytes ({size / users:.0f} bytes/account)")
+    print(f"restore: {restore:.1f} s, {users / restore:,.0f} accounts/s")
+    print(f" export: {export:.1f} s, {users / export:,.0f} accounts/s")
+    return {"restore": restore, "export": export}
+
+
+def moccasin_main() -> dict[str, float]:
+    return bench_snapshot()
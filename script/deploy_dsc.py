@@ -1,9 +1,12 @@
-from src import decentralized_stable_coin as dsc
+from script.artifacts import load_deployer
 from moccasin.boa_tools import VyperContract
 
+# @dev most DSC flash-minted in a single transaction, fixed at deployment
+FLASH_MINT_CEILING = 1_000_000 * 10**18
 
-def deploy_dsc() -> VyperContract:
-    return dsc.deploy()
+
+def deploy_dsc(flash_mint_ceiling: int = FLASH_MINT_CEILING) -> VyperContract:
+    return load_deployer("src/decentralized_stable_coin.vy").deploy(flash_mint_ceiling)
 
 
 def moccasin_main() -> VyperContract:
@@ -1,4 +1,4 @@
-from src import dsc_engine
+from script.artifacts import load_deployer
 from moccasin.boa_tools import VyperContract
 from moccasin.config import Network, get_active_network
 
@@ -11,7 +11,7 @@ def deploy_dsc_engine(dsc: VyperContract) -> VyperContract:
     wbtc = active_network.manifest_named("wbtc")
     weth = active_network.manifest_named("weth")
 
-    dsc_engine_contract = dsc_engine.deploy(
+    dsc_engine_contract = load_deployer("src/dsc_engine.vy").deploy(
         [weth.address, wbtc.address],
         [eth_usd.address, btc_usd.address],
         dsc.address,
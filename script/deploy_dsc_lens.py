@@ -0,0 +1,13 @@
+from script.artifacts import load_deployer
+from moccasin.boa_tools import VyperContract
+from moccasin.config import Network, get_active_network
+
+
+def deploy_dsc_lens(dsce: VyperContract) -> VyperContract:
+    return load_deployer("src/dsc_lens.vy").deploy(dsce.address)
+
+
+def moccasin_main() -> VyperContract:
+    active_network: Network = get_active_network()
+    dsce: VyperContract = active_network.manifest_named("dsc_engine")
+    return deploy_dsc_lens(dsce)
@@ -0,0 +1,14 @@
+from script.artifacts import load_deployer
+from moccasin.boa_tools import VyperContract
+from moccasin.config import Network, get_active_network
+
+
+def deploy_flash_liquidator(dsce: VyperContract) -> VyperContract:
+    """The deployer owns it and receives the profits."""
+    return load_deployer("src/flash_liquidator.vy").deploy(dsce.address)
+
+
+def moccasin_main() -> VyperContract:
+    active_network: Network = get_active_network()
+    dsce: VyperContract = active_network.manifest_named("dsc_engine")
+    return deploy_flash_liquidator(dsce)
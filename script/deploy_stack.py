@@ -0,0 +1,82 @@
+from dataclasses import dataclass
+
+from eth_abi import encode
+from eth_utils import keccak, to_checksum_address
+from moccasin.boa_tools import VyperContract
+from moccasin.config import Network, get_active_network
+
+from script.artifacts import load_deployer
+from script.deploy_dsc import FLASH_MINT_CEILING
+
+DEFAULT_SALT = keccak(text="decentralized_stable_coin")
+
+
+@dataclass(frozen=True)
+class Stack:
+    factory: VyperContract
+    dsc: VyperContract
+    dsce: VyperContract
+
+
+def deploy_stack(salt: bytes = DEFAULT_SALT) -> Stack:
+    """
+    DSC and engine, wired, in one factory transaction.
+
+    @dev the collaterals and feeds come from the manifest: the mocks on local
+        networks, the addresses of moccasin.toml elsewhere
+    """
+    tokens, feeds = _collaterals()
+    dsc_deployer = load_deployer("src/decentralized_stable_coin.vy")
+    dsce_deployer = load_deployer("src/dsc_engine.vy")
+    factory = load_deployer("src/dsc_factory.vy").deploy(
+        dsc_deployer.deploy_as_blueprint().address,
+        dsce_deployer.deploy_as_blueprint().address,
+    )
+    dsc_address, dsce_address = factory.deploy_stack(
+        tokens, feeds, FLASH_MINT_CEILING, salt
+    )
+    return Stack(factory, dsc_deployer.at(dsc_address), dsce_deployer.at(dsce_address))
+
+
+def predict_stack_addresses(
+    factory: str,
+    deployer: str,
+    tokens: list[str],
+    feeds: list[str],
+    salt: bytes = DEFAULT_SALT,
+    flash_mint_ceiling: int = FLASH_MINT_CEILING,
+) -> tuple[str, str]:
+    """Addresses `deploy_stack` of `factory` gives to DSC and the engine."""
+    create2_salt = keccak(encode(["address", "bytes32"], [deployer, salt]))
+    dsc = _create2_address(
+        factory,
+        create2_salt,
+        load_deployer("src/decentralized_stable_coin.vy").compiler_data.bytecode
+        + encode(["uint256"], [flash_mint_ceiling]),
+    )
+    dsce = _create2_address(
+        factory,
+        create2_salt,
+        load_deployer("src/dsc_engine.vy").compiler_data.bytecode
+        + encode(["address[]", "address[]", "address"], [tokens, feeds, dsc]),
+    )
+    return dsc, dsce
+
+
+def _create2_address(deployer: str, salt: bytes, initcode: bytes) -> str:
+    preimage = b"\xff" + bytes.fromhex(deployer[2:]) + salt + keccak(initcode)
+    return to_checksum_address(keccak(preimage)[12:])
+
+
+def _collaterals() -> tuple[list[str], list[str]]:
+    active_network: Network = get_active_network()
+    tokens = [active_network.manifest_named(name).address for name in ("weth", "wbtc")]
+    feeds = [
+        active_network.manifest_named(name).address
+        for name in ("eth_usd_price_feed", "btc_usd_price_feed")
+    ]
+    return tokens, feeds
+
+
+def moccasin_main() -> Stack:
+    return deploy_stack()
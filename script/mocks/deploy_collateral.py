@@ -1,10 +1,10 @@
-from src.mocks import mock_token
+from script.artifacts import load_deployer
 from moccasin.boa_tools import VyperContract
 
 
 def deploy_collateral() -> VyperContract:
     print("Deploying token collateral...")
-    return mock_token.deploy()
+    return load_deployer("src/mocks/mock_token.vy").deploy()
 
 
 def moccasin_main() -> VyperContract:
@@ -1,11 +1,13 @@
-from src.mocks import MockV3Aggregator
+from script.artifacts import load_deployer
 
 DECIMALS = 8
 INITIAL_VALUE = 200_000_000_000  # $2,000
 
 
 def deploy_price_feed():
-    return MockV3Aggregator.deploy(DECIMALS, INITIAL_VALUE)
+    return load_deployer("src/mocks/MockV3Aggregator.vy").deploy(
+        DECIMALS, INITIAL_VALUE
+    )
 
 
 def moccasin_main():
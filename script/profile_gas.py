@@ -0,0 +1,83 @@
+import os
+from pathlib import Path
+
+import boa
+from moccasin.config import Network, get_active_network
+
+from keeper.gas_profile import GasProfile, profile_call
+
+PROFILE_DIR = Path(os.environ.get("GAS_PROFILE_DIR", "gas-profiles"))
+COLLATERAL = 10 * 10**18
+MAX_APPROVAL = 2**256 - 1
+# @dev $2000 then $1500 feed answers, 8 decimals
+PRICE = 2_000 * 10**8
+CRASH_PRICE = 1_500 * 10**8
+
+
+def profile_gas(profile_dir: Path = PROFILE_DIR) -> dict[str, GasProfile]:
+    """
+    Profiles `redeem_for_dsc` and `liquidate` on the local mocks and writes
+    the folded stacks to `profile_dir`, e.g. for
+    `flamegraph.pl gas-profiles/liquidate.folded > liquidate.svg`.
+    """
+    active_network: Network = get_active_network()
+    dsce = active_network.manifest_named("dsc_engine")
+    dsc = active_network.manifest_named("decentralized_stable_coin")
+    weth = active_network.manifest_named("weth")
+    wbtc = active_network.manifest_named("wbtc")
+    eth_usd = active_network.manifest_named("eth_usd_price_feed")
+    btc_usd = active_network.manifest_named("btc_usd_price_feed")
+    eth_usd.updateAnswer(PRICE)
+    btc_usd.updateAnswer(PRICE)
+
+    # @dev 2 collaterals each, the health factor reads both feeds
+    user = _user("profiled_user", dsce, dsc, [weth, wbtc])
+    liquidator = _user("profiled_liquidator", dsce, dsc, [weth, wbtc])
+    with boa.env.prank(user):
+        dsce.deposit_many_and_mint(
+            [(weth.address, COLLATERAL), (wbtc.address, COLLATERAL)],
+            dsce.get_usd_value(weth, 2 * COLLATERAL) // 2 * 9 // 10,
+        )
+    with boa.env.prank(liquidator):
+        dsce.deposit_many_and_mint(
+            [(weth.address, COLLATERAL), (wbtc.address, COLLATERAL)],
+            dsce.get_usd_value(weth, 2 * COLLATERAL) // 4,
+        )
+
+    profiles = {
+        "redeem_for_dsc": profile_call(
+            dsce, "redeem_for_dsc", weth, 10**17, 10**18, sender=user
+        )
+    }
+    eth_usd.updateAnswer(CRASH_PRICE)
+    btc_usd.updateAnswer(CRASH_PRICE)
+    profiles["liquidate"] = profile_call(
+        dsce,
+        "liquidate",
+        weth,
+        user,
+        dsce.user_to_dsc_minted(user) // 4,
+        sender=liquidator,
+    )
+
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    for name, profile in profiles.items():
+        profile.write_folded(profile_dir / f"{name}.folded")
+        print(f"\n{name}: {profile.total:,} gas")
+        print(profile.format())
+    print(f"\nfolded stacks in {profile_dir}/")
+    return profiles
+
+
+def _user(alias: str, dsce, dsc, tokens) -> str:
+    user = boa.env.generate_address(alias)
+    with boa.env.prank(user):
+        for token in tokens:
+            token.mint_amount(COLLATERAL)
+            token.approve(dsce, MAX_APPROVAL)
+        dsc.approve(dsce, MAX_APPROVAL)
+    return user
+
+
+def moccasin_main() -> dict[str, GasProfile]:
+    return profile_gas()
@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+
+from keeper.simulator import (
+    LiquidationSimulator,
+    Population,
+    correlated_price_paths,
+)
+
+POSITIONS = 10_000
+PATHS = 1_000
+STEPS = 30  # days
+ETH_PRICE = 2_000 * 10**8
+BTC_PRICE = 30_000 * 10**8
+VOLATILITIES = (0.8, 0.6)
+CORRELATION = 0.7
+# @dev USD sold before the price halves, the cascade strength
+MARKET_DEPTH = (50_000_000e18, 50_000_000e18)
+# @dev low percentiles are the tail of the collateralization, high ones of the losses
+PERCENTILES = (1, 5, 50, 95, 99)
+
+
+def simulate_price_shocks(
+    positions: int = POSITIONS, paths: int = PATHS, steps: int = STEPS, seed: int = 0
+) -> dict[str, dict[float, float]]:
+    rng = np.random.default_rng(seed)
+    prices = [ETH_PRICE, BTC_PRICE]
+    population = Population.random(positions, prices, rng, min_health_factor=1.05)
+
+    start = time.perf_counter()
+    price_paths = correlated_price_paths(
+        prices, VOLATILITIES, CORRELATION, paths, steps, rng
+    )
+    result = LiquidationSimulator(population, market_depth=MARKET_DEPTH).run(
+        price_paths
+    )
+    elapsed = time.perf_counter() - start
+
+    report = result.percentiles(PERCENTILES)
+    print(f"{positions} positions x {paths} paths x {steps} steps in {elapsed:.1f} s")
+    for name, values in report.items():
+        scale = 1e18 if name in ("bad_debt", "liquidation_volume") else 1
+        columns = "  ".join(f"p{q}={value / scale:,.2f}" for q, value in values.items())
+        print(f"{name:>22}: {columns}")
+    return report
+
+
+def moccasin_main() -> dict[str, dict[float, float]]:
+    return simulate_price_shocks()
@@ -3,12 +3,17 @@
 @license MIT
 @author s3bc40
 @title Decentralized Stable Coin
-@dev Follow the ERC20 standard
+@dev Follow the ERC20 standard. DSC is also an ERC-3156 flash lender of
+    itself: up to FLASH_MINT_CEILING, set once at deployment, can be
+    flash-minted for free, as long as it is burnt back before the end of the
+    call.
 """
 # ------------------------------------------------------------------
 #                             IMPORTS
 # ------------------------------------------------------------------
 from interfaces import i_decentralized_stable_coin
+from interfaces import i_erc3156_flash_borrower
+from interfaces import i_erc3156_flash_lender
 from snekmate.tokens import erc20
 from snekmate.auth import ownable as ow
 
@@ -16,6 +21,7 @@ from snekmate.auth import ownable as ow
 #                          INIT & EXPORTS
 # ------------------------------------------------------------------
 implements: i_decentralized_stable_coin
+implements: i_erc3156_flash_lender
 initializes: ow
 initializes: erc20[ownable := ow]
 
@@ -25,6 +31,10 @@ exports: (
     erc20.mint,
     erc20.set_minter,
     erc20.is_minter,
+    erc20.permit,
+    erc20.nonces,
+    erc20.DOMAIN_SEPARATOR,
+    erc20.eip712Domain,
     ow.owner,
     ow.transfer_ownership,
 )
@@ -36,12 +46,89 @@ NAME: public(constant(String[25])) = "Decentralized Stable Coin"
 SYMBOL: public(constant(String[5])) = "DSC"
 DECIMALS: constant(uint8) = 18
 EIP_712_VERSION: constant(String[20]) = "1"
+# @dev return value of a borrower accepting the loan, per ERC-3156
+FLASH_LOAN_CALLBACK_SUCCESS: constant(bytes32) = keccak256(
+    "ERC3156FlashBorrower.onFlashLoan"
+)
+MAX_FLASH_LOAN_DATA: public(constant(uint256)) = 4096
+DSC_UNSUPPORTED_FLASH_LOAN_TOKEN: public(constant(String[34])) = (
+    "dsc: unsupported flash loan token"
+)
+DSC_FLASH_LOAN_CALLBACK_FAILED: public(constant(String[32])) = (
+    "dsc: flash loan callback failed"
+)
+DSC_FLASH_LOAN_EXCEEDS_CEILING: public(constant(String[32])) = (
+    "dsc: flash loan exceeds ceiling"
+)
+
+# @dev most DSC flash-minted at once in a transaction, nested loans included.
+# Immutable: the engine takes the ownership and has no admin entry point
+FLASH_MINT_CEILING: public(immutable(uint256))
+# @dev DSC flash-minted and not burnt back yet, back to 0 once the outermost
+# loan returns. Not transient storage, DSC also deploys on zkSync
+flash_minted: uint256
 
 
 # ------------------------------------------------------------------
 #                            FUNCTIONS
 # ------------------------------------------------------------------
 @deploy
-def __init__():
+def __init__(flash_mint_ceiling: uint256):
+    """@param flash_mint_ceiling uint256 FLASH_MINT_CEILING, 0 disables flash mints"""
     ow.__init__()
     erc20.__init__(NAME, SYMBOL, DECIMALS, NAME, EIP_712_VERSION)
+    FLASH_MINT_CEILING = flash_mint_ceiling
+
+
+# ------------------------------------------------------------------
+#                            FLASH MINT
+# ------------------------------------------------------------------
+@view
+@external
+def maxFlashLoan(token: address) -> uint256:
+    if token != self:
+        return 0
+    return self._max_flash_loan()
+
+
+@view
+@external
+def flashFee(token: address, amount: uint256) -> uint256:
+    """@dev Flash mints are free"""
+    assert token == self, DSC_UNSUPPORTED_FLASH_LOAN_TOKEN
+    return 0
+
+
+@external
+def flashLoan(
+    receiver: i_erc3156_flash_borrower,
+    token: address,
+    amount: uint256,
+    data: Bytes[MAX_FLASH_LOAN_DATA],
+) -> bool:
+    """
+    @dev Mints `amount` DSC to `receiver`, calls its `onFlashLoan`, then
+        burns `amount` back from it, out of the allowance it gave this
+        contract. Reverts if the receiver cannot pay it back.
+    """
+    assert token == self, DSC_UNSUPPORTED_FLASH_LOAN_TOKEN
+    assert amount <= self._max_flash_loan(), DSC_FLASH_LOAN_EXCEEDS_CEILING
+    self.flash_minted += amount
+    erc20._mint(receiver.address, amount)
+    callback: bytes32 = extcall receiver.onFlashLoan(
+        msg.sender, token, amount, 0, data
+    )
+    assert callback == FLASH_LOAN_CALLBACK_SUCCESS, DSC_FLASH_LOAN_CALLBACK_FAILED
+    erc20._spend_allowance(receiver.address, self, amount)
+    erc20._burn(receiver.address, amount)
+    self.flash_minted -= amount
+    return True
+
+
+@view
+@internal
+def _max_flash_loan() -> uint256:
+    return min(
+        FLASH_MINT_CEILING - self.flash_minted,
+        max_value(uint256) - erc20.totalSupply,
+    )
@@ -0,0 +1,15 @@
+# pragma version 0.4.0
+"""
+@license MIT
+@author s3bc40
+@title DSC Constants
+@notice
+    Array bounds of the engine ABI. The engine and its interface both import
+    them, so callers decode the engine arrays without importing the engine.
+"""
+# ------------------------------------------------------------------
+#                            CONSTANTS
+# ------------------------------------------------------------------
+MAX_COLLATERAL_TOKENS: constant(uint256) = 32
+MAX_COLLATERAL_DEPOSITS: constant(uint256) = 8
+MAX_LIQUIDATIONS: constant(uint256) = 256
@@ -14,7 +14,8 @@
 # ------------------------------------------------------------------
 from ethereum.ercs import IERC20
 from interfaces import i_decentralized_stable_coin
-from interfaces import AggregatorV3Interface
+import dsc_constants
+import oracle_lib
 
 # ------------------------------------------------------------------
 #                              ERRORS
@@ -37,26 +38,92 @@ DSC_ENGINE_HEALTH_FACTOR_GOOD: public(
 DSC_ENGINE_DID_NOT_IMPROVE_HEALTH_FACTOR: public(
     constant(String[42])
 ) = "dsce_engine: did not improve health factor"
+DSC_ENGINE_TOKEN_ADDRESSES_AND_PRICE_FEEDS_LENGTH_MISMATCH: public(
+    constant(String[45])
+) = "dsce_engine: tokens and feeds length mismatch"
+DSC_ENGINE_UNSUPPORTED_FEED_DECIMALS: public(
+    constant(String[38])
+) = "dsce_engine: unsupported feed decimals"
+
+# ------------------------------------------------------------------
+#                             STRUCTS
+# ------------------------------------------------------------------
+struct Position:
+    # @dev first collateral slot: COLLATERAL_TOKENS[0] and [1] in two uint112
+    # lanes, and in the top 32 bits the held bitmap, bit i set while the user
+    # has some COLLATERAL_TOKENS[i] deposited
+    collateral: uint256
+    dsc_minted: uint256
+
+
+struct CollateralDeposit:
+    token: address
+    amount: uint256
+
+
+struct Liquidation:
+    user: address
+    collateral: address
+    debt_to_cover: uint256
+
+
+struct PermitSignature:
+    # @dev EIP-2612 signature of msg.sender, for the engine and the exact
+    # amount the call spends
+    deadline: uint256
+    v: uint8
+    r: bytes32
+    s: bytes32
+
 
 # ------------------------------------------------------------------
 #                         STATE VARIABLES
 # ------------------------------------------------------------------
 # Constants & Immutables
 DSC: public(immutable(i_decentralized_stable_coin))
-COLLATERAL_TOKENS: public(immutable(address[2]))
+MAX_COLLATERAL_TOKENS: public(constant(uint256)) = (
+    dsc_constants.MAX_COLLATERAL_TOKENS
+)
+COLLATERAL_TOKENS: public(
+    immutable(DynArray[address, MAX_COLLATERAL_TOKENS])
+)
+PRICE_FEEDS: immutable(DynArray[address, MAX_COLLATERAL_TOKENS])
+# @dev feed answer -> scaled price multiplier, computed from the feed decimals
+PRICE_SCALES: immutable(DynArray[uint256, MAX_COLLATERAL_TOKENS])
 ADDITIONAL_FEED_PRECISION: public(constant(uint256)) = 1 * (10**8)
+# @dev decimals of the feeds ADDITIONAL_FEED_PRECISION was chosen for
+FEED_DECIMALS: constant(uint256) = 8
 PRECISION: public(constant(uint256)) = 1 * (10**18)
 LIQUIDATION_THRESHOLD: public(constant(uint256)) = 50  # need a 2/1 ratio
 LIQUIDATION_BONUS: public(constant(uint256)) = 10
 LIQUIDATION_PRECISION: public(constant(uint256)) = 100
 MIN_HEALTH_FACTOR: public(constant(uint256)) = 1 * (10**18)
+COLLATERAL_LANE_BITS: constant(uint256) = 112
+COLLATERAL_LANE_MASK: constant(uint256) = 2**112 - 1
+COLLATERAL_LANES: constant(uint256) = 2
+HELD_OFFSET: constant(uint256) = 224
+MAX_COLLATERAL_DEPOSITS: public(constant(uint256)) = (
+    dsc_constants.MAX_COLLATERAL_DEPOSITS
+)
+MAX_LIQUIDATIONS: public(constant(uint256)) = dsc_constants.MAX_LIQUIDATIONS
+PERMIT_SELECTOR: constant(bytes4) = method_id(
+    "permit(address,address,uint256,uint256,uint8,bytes32,bytes32)",
+    output_type=bytes4,
+)
 
 # Storage
-token_to_price_feed: public(HashMap[address, address])
-user_to_token_to_amount_deposited: public(
-    HashMap[address, HashMap[address, uint256]]
-)
-user_to_dsc_minted: public(HashMap[address, uint256])
+# @dev index in COLLATERAL_TOKENS plus one, 0 for tokens that are not allowed
+token_to_collateral_id: HashMap[address, uint256]
+# @dev a user of the first two collaterals only ever touches these 2 slots
+user_to_position: HashMap[address, Position]
+# @dev the other collateral slots, k >= 1: COLLATERAL_TOKENS[2k] in the low
+# uint112 lane of slot k and COLLATERAL_TOKENS[2k + 1] in the high one
+user_to_collateral: HashMap[address, HashMap[uint256, uint256]]
+# @dev protocol totals, kept up to date by every deposit, redeem, mint, burn
+# and liquidation, so the global views cost O(tokens) and not O(users).
+# total_collateral is indexed like COLLATERAL_TOKENS
+total_collateral: uint256[MAX_COLLATERAL_TOKENS]
+total_dsc_minted: public(uint256)
 
 # ------------------------------------------------------------------
 #                              EVENTS
@@ -73,25 +140,49 @@ event CollateralRedeemed:
     _to: indexed(address)
 
 
+event DscMinted:
+    user: indexed(address)
+    amount: uint256
+
+
+event DscBurned:
+    on_behalf_of: indexed(address)
+    dsc_from: indexed(address)
+    amount: uint256
+
+
 # ------------------------------------------------------------------
 #                        EXTERNAL FUNCTIONS
 # ------------------------------------------------------------------
 @deploy
 def __init__(
-    token_addresses: address[2],
-    price_feeds_addresses: address[2],
+    token_addresses: DynArray[address, MAX_COLLATERAL_TOKENS],
+    price_feeds_addresses: DynArray[address, MAX_COLLATERAL_TOKENS],
     dsc_address: address,
 ):
     """
-    @notice we have two collateral types: WETH and WBTC
+    @notice any number of collateral types up to MAX_COLLATERAL_TOKENS,
+        e.g. WETH and WBTC
 
-    @param token_address address[2] memory token_address
+    @param token_addresses DynArray[address] Allowed collateral tokens
+    @param price_feeds_addresses DynArray[address] USD price feed of each token
     """
+    assert len(token_addresses) == len(price_feeds_addresses), DSC_ENGINE_TOKEN_ADDRESSES_AND_PRICE_FEEDS_LENGTH_MISMATCH
     DSC = i_decentralized_stable_coin(dsc_address)
     COLLATERAL_TOKENS = token_addresses
-    # @dev Easy to look up but not gas efficient
-    self.token_to_price_feed[token_addresses[0]] = price_feeds_addresses[0]
-    self.token_to_price_feed[token_addresses[1]] = price_feeds_addresses[1]
+    PRICE_FEEDS = price_feeds_addresses
+    scales: DynArray[uint256, MAX_COLLATERAL_TOKENS] = []
+    for i: uint256 in range(len(token_addresses), bound=MAX_COLLATERAL_TOKENS):
+        self.token_to_collateral_id[token_addresses[i]] = i + 1
+        feed_decimals: uint256 = oracle_lib._feed_decimals(
+            price_feeds_addresses[i]
+        )
+        assert feed_decimals <= FEED_DECIMALS + 8, DSC_ENGINE_UNSUPPORTED_FEED_DECIMALS
+        # @dev any feed is priced as an 8 decimals one would be
+        scales.append(
+            ADDITIONAL_FEED_PRECISION * 10**FEED_DECIMALS // 10**feed_decimals
+        )
+    PRICE_SCALES = scales
 
 
 @external
@@ -130,6 +221,25 @@ def deposit_and_mint(
     self._mint_dsc(amount_dsc_to_mint)
 
 
+@external
+def deposit_many_and_mint(
+    deposits: DynArray[CollateralDeposit, MAX_COLLATERAL_DEPOSITS],
+    amount_dsc_to_mint: uint256,
+):
+    """
+    @dev Deposits several collaterals and mints with a single health check
+
+    @param deposits DynArray[CollateralDeposit] (token, amount) pairs to deposit
+    @param amount_dsc_to_mint uint256 Amount of DSC to mint after the deposits
+    """
+    for deposit: CollateralDeposit in deposits:
+        self._add_collateral(deposit.token, deposit.amount)
+
+    for deposit: CollateralDeposit in deposits:
+        self._transfer_collateral_in(deposit.token, deposit.amount)
+    self._mint_dsc(amount_dsc_to_mint)
+
+
 @external
 def redeem_for_dsc(
     token_collateral: address, amount_collateral: uint256, amount_dsc: uint256
@@ -155,36 +265,178 @@ def liquidate(collateral: address, user: address, debt_to_cover: uint256):
     2. Cover their debt, by US burning OUR DSC, but reducing THEIR DSC minted
     3. We take their collateral
     """
-    assert debt_to_cover > 0, DSC_ENGINE_NEEDS_MORE_THAN_ZERO
-    starting_health_factor: uint256 = self._health_factor(user)
-    assert (
-        starting_health_factor < MIN_HEALTH_FACTOR
-    ), DSC_ENGINE_HEALTH_FACTOR_GOOD
+    self._liquidate(collateral, user, debt_to_cover)
+
 
-    token_amount_from_debt_covered: uint256 = self._get_token_amount_from_usd(
-        collateral, debt_to_cover
+@external
+def liquidate_many(
+    liquidations: DynArray[Liquidation, MAX_LIQUIDATIONS]
+) -> uint256:
+    """
+    @dev Batch version of `liquidate`. Prices are read once, the seized
+        collateral and the covered debt are settled once per token, and the
+        liquidator health factor is checked once at the end. Entries that
+        `liquidate` would revert on (healthy user, not enough collateral,
+        health factor not improved, ...) are skipped instead.
+
+    @param liquidations DynArray[Liquidation] (user, collateral, debt_to_cover) entries
+    @return uint256 Number of entries liquidated
+    """
+    # @dev price every token held by the users, the liquidator or seized
+    held: uint256 = 0
+    if self.user_to_position[msg.sender].dsc_minted != 0:
+        held = self._held(msg.sender)
+    for liquidation: Liquidation in liquidations:
+        held |= self._held(liquidation.user)
+        collateral_id: uint256 = self.token_to_collateral_id[
+            liquidation.collateral
+        ]
+        if collateral_id != 0:
+            held |= 1 << (collateral_id - 1)
+    prices: uint256[MAX_COLLATERAL_TOKENS] = self._get_prices(held)
+    seized: uint256[MAX_COLLATERAL_TOKENS] = empty(
+        uint256[MAX_COLLATERAL_TOKENS]
     )
-    bonus_collateral: uint256 = (
-        token_amount_from_debt_covered * LIQUIDATION_BONUS
-    ) // LIQUIDATION_PRECISION
+    seized_held: uint256 = 0
+    total_debt_covered: uint256 = 0
+    liquidated: uint256 = 0
+
+    for liquidation: Liquidation in liquidations:
+        collateral_id: uint256 = self.token_to_collateral_id[
+            liquidation.collateral
+        ]
+        if liquidation.debt_to_cover == 0 or collateral_id == 0:
+            continue
+        index: uint256 = collateral_id - 1
+        position: Position = self.user_to_position[liquidation.user]
+        if liquidation.debt_to_cover > position.dsc_minted:
+            continue
+        collateral_value: uint256 = self._get_collateral_value(
+            liquidation.user, position.collateral, prices
+        )
+        starting_health_factor: uint256 = self._calculate_health_factor(
+            position.dsc_minted, collateral_value
+        )
+        if starting_health_factor >= MIN_HEALTH_FACTOR:
+            continue
+
+        token_amount_from_debt_covered: uint256 = self._token_amount_from_price(
+            prices[index], liquidation.debt_to_cover
+        )
+        collateral_to_seize: uint256 = token_amount_from_debt_covered + (
+            token_amount_from_debt_covered * LIQUIDATION_BONUS
+        ) // LIQUIDATION_PRECISION
+        deposited: uint256 = self._get_collateral_amount(liquidation.user, index)
+        if collateral_to_seize > deposited:
+            continue
+
+        # @dev only the seized token changes, re-price that term alone
+        collateral_value = (
+            collateral_value
+            - self._usd_value_from_price(prices[index], deposited)
+            + self._usd_value_from_price(
+                prices[index], deposited - collateral_to_seize
+            )
+        )
+        ending_health_factor: uint256 = self._calculate_health_factor(
+            position.dsc_minted - liquidation.debt_to_cover, collateral_value
+        )
+        if ending_health_factor <= starting_health_factor:
+            continue
+
+        self._set_collateral_amount(
+            liquidation.user, index, deposited - collateral_to_seize
+        )
+        self.user_to_position[liquidation.user].dsc_minted = (
+            position.dsc_minted - liquidation.debt_to_cover
+        )
+        log CollateralRedeemed(
+            liquidation.collateral,
+            collateral_to_seize,
+            liquidation.user,
+            msg.sender,
+        )
+        log DscBurned(liquidation.user, msg.sender, liquidation.debt_to_cover)
+        seized[index] += collateral_to_seize
+        seized_held |= 1 << index
+        total_debt_covered += liquidation.debt_to_cover
+        liquidated += 1
+
+    for i: uint256 in range(MAX_COLLATERAL_TOKENS):
+        if seized_held >> i == 0:
+            break
+        if seized[i] > 0:
+            self.total_collateral[i] -= seized[i]
+            success: bool = extcall IERC20(COLLATERAL_TOKENS[i]).transfer(
+                msg.sender, seized[i]
+            )
+            assert success, DSC_ENGINE_TRANSFER_FAILED
+    if total_debt_covered > 0:
+        self.total_dsc_minted -= total_debt_covered
+        extcall DSC.burn_from(msg.sender, total_debt_covered)
+
+    self._revert_if_health_factor_broken_at(msg.sender, prices)
+    return liquidated
+
+
+# @dev `*_with_permit` variants: the approve of the token spent is signed
+# instead of sent, each action is a single transaction
+@external
+def deposit_collateral_with_permit(
+    token_collateral_address: address,
+    amount_collateral: uint256,
+    permit: PermitSignature,
+):
+    self._permit(token_collateral_address, amount_collateral, permit)
+    self._deposit_collateral(token_collateral_address, amount_collateral)
 
-    # Redeem collateral to the liquidator with bonus and cover their debt with liquidator DSC
+
+@external
+def deposit_and_mint_with_permit(
+    token_collateral: address,
+    amount_collateral: uint256,
+    amount_dsc_to_mint: uint256,
+    permit: PermitSignature,
+):
+    self._permit(token_collateral, amount_collateral, permit)
+    self._deposit_collateral(token_collateral, amount_collateral)
+    self._mint_dsc(amount_dsc_to_mint)
+
+
+@external
+def redeem_for_dsc_with_permit(
+    token_collateral: address,
+    amount_collateral: uint256,
+    amount_dsc: uint256,
+    permit: PermitSignature,
+):
+    """@param permit PermitSignature Signed DSC approve of `amount_dsc`"""
+    self._permit(DSC.address, amount_dsc, permit)
+    self._burn_dsc(amount_dsc, msg.sender, msg.sender)
     self._redeem_collateral(
-        collateral,
-        token_amount_from_debt_covered + bonus_collateral,
-        user,
-        msg.sender,
+        token_collateral, amount_collateral, msg.sender, msg.sender
     )
-    self._burn_dsc(debt_to_cover, user, msg.sender)
-
-    # Check health factor for user after liquidation and liquidator
-    ending_health_factor: uint256 = self._health_factor(user)
-    assert (
-        ending_health_factor > starting_health_factor
-    ), DSC_ENGINE_DID_NOT_IMPROVE_HEALTH_FACTOR
     self._revert_if_health_factor_broken(msg.sender)
 
 
+@external
+def burn_dsc_with_permit(amount: uint256, permit: PermitSignature):
+    self._permit(DSC.address, amount, permit)
+    self._burn_dsc(amount, msg.sender, msg.sender)
+
+
+@external
+def liquidate_with_permit(
+    collateral: address,
+    user: address,
+    debt_to_cover: uint256,
+    permit: PermitSignature,
+):
+    """@param permit PermitSignature Signed DSC approve of `debt_to_cover`"""
+    self._permit(DSC.address, debt_to_cover, permit)
+    self._liquidate(collateral, user, debt_to_cover)
+
+
 @external
 def get_health_factor(user: address) -> uint256:
     return self._health_factor(user)
@@ -205,6 +457,81 @@ def get_account_information(user: address) -> (uint256, uint256):
 # ------------------------------------------------------------------
 #                        INTERNAL FUNCTIONS
 # ------------------------------------------------------------------
+@internal
+def _liquidate(collateral: address, user: address, debt_to_cover: uint256):
+    assert debt_to_cover > 0, DSC_ENGINE_NEEDS_MORE_THAN_ZERO
+    # @dev every feed needed is read once and reused for the whole liquidation,
+    # a liquidator without debt is never checked so their tokens are not priced
+    position: Position = self.user_to_position[user]
+    held: uint256 = position.collateral >> HELD_OFFSET
+    if self.user_to_position[msg.sender].dsc_minted != 0:
+        held |= self._held(msg.sender)
+    collateral_id: uint256 = self.token_to_collateral_id[collateral]
+    if collateral_id != 0:
+        held |= 1 << (collateral_id - 1)
+    prices: uint256[MAX_COLLATERAL_TOKENS] = self._get_prices(held)
+    collateral_value: uint256 = self._get_collateral_value(
+        user, position.collateral, prices
+    )
+    starting_health_factor: uint256 = self._calculate_health_factor(
+        position.dsc_minted, collateral_value
+    )
+    assert starting_health_factor < MIN_HEALTH_FACTOR, DSC_ENGINE_HEALTH_FACTOR_GOOD
+
+    index: uint256 = self._collateral_index(collateral)
+    token_amount_from_debt_covered: uint256 = self._token_amount_from_price(
+        prices[index], debt_to_cover
+    )
+    bonus_collateral: uint256 = (
+        token_amount_from_debt_covered * LIQUIDATION_BONUS
+    ) // LIQUIDATION_PRECISION
+    collateral_to_seize: uint256 = (
+        token_amount_from_debt_covered + bonus_collateral
+    )
+    deposited: uint256 = self._get_collateral_amount(user, index)
+
+    # Redeem collateral to the liquidator with bonus and cover their debt with liquidator DSC
+    self._redeem_collateral(collateral, collateral_to_seize, user, msg.sender)
+    self._burn_dsc(debt_to_cover, user, msg.sender)
+
+    # Check health factor for user after liquidation and liquidator
+    # @dev only the seized token and the debt changed, re-price those alone
+    ending_health_factor: uint256 = self._calculate_health_factor(
+        position.dsc_minted - debt_to_cover,
+        collateral_value
+        - self._usd_value_from_price(prices[index], deposited)
+        + self._usd_value_from_price(
+            prices[index], deposited - collateral_to_seize
+        ),
+    )
+    assert ending_health_factor > starting_health_factor, DSC_ENGINE_DID_NOT_IMPROVE_HEALTH_FACTOR
+    self._revert_if_health_factor_broken_at(msg.sender, prices)
+
+
+@internal
+def _permit(token: address, amount: uint256, permit: PermitSignature):
+    """
+    @dev Lets the engine spend `amount` of msg.sender `token` with an EIP-2612
+        signature. A failed permit does not revert: a signature submitted
+        first by someone else has already set the allowance, and without an
+        allowance the transfer that follows reverts anyway.
+    """
+    success: bool = raw_call(
+        token,
+        abi_encode(
+            msg.sender,
+            self,
+            amount,
+            permit.deadline,
+            permit.v,
+            permit.r,
+            permit.s,
+            method_id=PERMIT_SELECTOR,
+        ),
+        revert_on_failure=False,
+    )
+
+
 @internal
 def _deposit_collateral(
     token_collateral_address: address, amount_collateral: uint256
@@ -215,19 +542,33 @@ def _deposit_collateral(
     @param token_collateral_address address Address of the collateral token
     @param amount_collateral uint256 Amount of the collateral token to deposit
     """
-    # Checks
+    # Checks & Effects
+    self._add_collateral(token_collateral_address, amount_collateral)
+
+    # Interactions
+    self._transfer_collateral_in(token_collateral_address, amount_collateral)
+
+
+@internal
+def _add_collateral(
+    token_collateral_address: address, amount_collateral: uint256
+):
+    """@dev Credits a deposit of msg.sender"""
     assert amount_collateral > 0, DSC_ENGINE_NEEDS_MORE_THAN_ZERO
-    assert self.token_to_price_feed[token_collateral_address] != empty(
-        address
-    ), DSC_ENGINE_TOKEN_NOT_ALLOWED
-
-    # Effects
-    self.user_to_token_to_amount_deposited[msg.sender][
-        token_collateral_address
-    ] += amount_collateral
+    index: uint256 = self._collateral_index(token_collateral_address)
     log CollatoralDeposited(msg.sender, amount_collateral)
+    self._set_collateral_amount(
+        msg.sender,
+        index,
+        self._get_collateral_amount(msg.sender, index) + amount_collateral,
+    )
+    self.total_collateral[index] += amount_collateral
 
-    # Interactions
+
+@internal
+def _transfer_collateral_in(
+    token_collateral_address: address, amount_collateral: uint256
+):
     success: bool = extcall IERC20(token_collateral_address).transferFrom(
         msg.sender, self, amount_collateral
     )
@@ -241,9 +582,11 @@ def _redeem_collateral(
     _from: address,
     _to: address,
 ):
-    self.user_to_token_to_amount_deposited[_from][
-        token_collateral_address
-    ] -= amount
+    index: uint256 = self._collateral_index(token_collateral_address)
+    self._set_collateral_amount(
+        _from, index, self._get_collateral_amount(_from, index) - amount
+    )
+    self.total_collateral[index] -= amount
     log CollateralRedeemed(token_collateral_address, amount, _from, _to)
 
     success: bool = extcall IERC20(token_collateral_address).transfer(
@@ -255,28 +598,60 @@ def _redeem_collateral(
 @internal
 def _mint_dsc(amount_dsc_to_mint: uint256):
     assert amount_dsc_to_mint > 0, DSC_ENGINE_NEEDS_MORE_THAN_ZERO
-    self.user_to_dsc_minted[msg.sender] += amount_dsc_to_mint
+    self.user_to_position[msg.sender].dsc_minted += amount_dsc_to_mint
+    self.total_dsc_minted += amount_dsc_to_mint
+    log DscMinted(msg.sender, amount_dsc_to_mint)
     self._revert_if_health_factor_broken(msg.sender)
     extcall DSC.mint(msg.sender, amount_dsc_to_mint)
 
 
 @internal
 def _revert_if_health_factor_broken(user: address):
-    health_factor: uint256 = self._health_factor(user)
+    position: Position = self.user_to_position[user]
+    # @dev without debt the health factor is max_value(uint256), skip the feeds
+    if position.dsc_minted == 0:
+        return
+    health_factor: uint256 = self._calculate_health_factor(
+        position.dsc_minted,
+        self._get_collateral_value(
+            user,
+            position.collateral,
+            self._get_prices(position.collateral >> HELD_OFFSET),
+        ),
+    )
+    assert health_factor >= MIN_HEALTH_FACTOR, DSC_ENGINE_HEALTH_FACTOR_BROKEN
+
+
+@internal
+def _revert_if_health_factor_broken_at(
+    user: address, prices: uint256[MAX_COLLATERAL_TOKENS]
+):
+    health_factor: uint256 = self._health_factor_at(user, prices)
     assert health_factor >= MIN_HEALTH_FACTOR, DSC_ENGINE_HEALTH_FACTOR_BROKEN
 
 
 @internal
 def _health_factor(user: address) -> uint256:
     """@dev Internal function to calculate the health factor of a user"""
-    total_dsc_minted: uint256 = 0
-    total_collateral_value_usd: uint256 = 0
+    if self.user_to_position[user].dsc_minted == 0:
+        return max_value(uint256)
+    return self._health_factor_at(user, self._get_prices(self._held(user)))
 
-    (
-        total_dsc_minted, total_collateral_value_usd
-    ) = self._get_account_information(user)
+
+@internal
+def _health_factor_at(
+    user: address, prices: uint256[MAX_COLLATERAL_TOKENS]
+) -> uint256:
+    """
+    @dev Health factor of a user against a snapshot of the prices they hold.
+        Users without debt need no price at all.
+    """
+    position: Position = self.user_to_position[user]
+    if position.dsc_minted == 0:
+        return max_value(uint256)
     return self._calculate_health_factor(
-        total_dsc_minted, total_collateral_value_usd
+        position.dsc_minted,
+        self._get_collateral_value(user, position.collateral, prices),
     )
 
 
@@ -284,26 +659,140 @@ def _health_factor(user: address) -> uint256:
 def _get_account_information(user: address) -> (uint256, uint256):
     """@dev return the total DSC minted and the total amount of collateral deposited by the user
     """
-    total_dsc_minted: uint256 = self.user_to_dsc_minted[user]
-    collateral_value_in_usd: uint256 = self._get_account_collateral_value(user)
-    return (total_dsc_minted, collateral_value_in_usd)
+    return self._get_account_information_at(
+        user, self._get_prices(self._held(user))
+    )
+
+
+@view
+@internal
+def _get_account_information_at(
+    user: address, prices: uint256[MAX_COLLATERAL_TOKENS]
+) -> (uint256, uint256):
+    position: Position = self.user_to_position[user]
+    collateral_value_in_usd: uint256 = self._get_collateral_value(
+        user, position.collateral, prices
+    )
+    return (position.dsc_minted, collateral_value_in_usd)
 
 
 @internal
 def _get_account_collateral_value(user: address) -> uint256:
     """@dev Internal function to get the value of the collateral of a user"""
+    first_slot: uint256 = self.user_to_position[user].collateral
+    return self._get_collateral_value(
+        user, first_slot, self._get_prices(first_slot >> HELD_OFFSET)
+    )
+
+
+@view
+@internal
+def _get_collateral_value(
+    user: address, first_slot: uint256, prices: uint256[MAX_COLLATERAL_TOKENS]
+) -> uint256:
+    """
+    @dev USD value of the collateral of a user against a price snapshot.
+        Only the tokens set in the held bitmap of `first_slot` are read, so
+        the cost grows with the number of tokens the user holds, not with the
+        number allowed.
+    """
+    held: uint256 = first_slot >> HELD_OFFSET
     total_collateral_value_usd: uint256 = 0
-    for token: address in COLLATERAL_TOKENS:
-        amount: uint256 = self.user_to_token_to_amount_deposited[user][token]
-        total_collateral_value_usd += self._get_usd_value(token, amount)
+    packed: uint256 = first_slot
+    for i: uint256 in range(MAX_COLLATERAL_TOKENS):
+        if held >> i == 0:
+            break
+        if (held >> i) & 1 == 0:
+            continue
+        lane: uint256 = i % COLLATERAL_LANES
+        # @dev the second lane of a slot reuses the slot already read
+        if i >= COLLATERAL_LANES and (
+            lane == 0 or (held >> (i - 1)) & 1 == 0
+        ):
+            packed = self.user_to_collateral[user][i // COLLATERAL_LANES]
+        total_collateral_value_usd += self._usd_value_from_price(
+            prices[i], self._unpack_collateral(packed, lane)
+        )
     return total_collateral_value_usd
 
 
+@view
+@internal
+def _collateral_index(token: address) -> uint256:
+    """@dev Index of `token` in COLLATERAL_TOKENS, reverts if not allowed"""
+    collateral_id: uint256 = self.token_to_collateral_id[token]
+    assert collateral_id != 0, DSC_ENGINE_TOKEN_NOT_ALLOWED
+    return collateral_id - 1
+
+
+@view
+@internal
+def _held(user: address) -> uint256:
+    return self.user_to_position[user].collateral >> HELD_OFFSET
+
+
+@view
+@internal
+def _get_collateral_amount(user: address, index: uint256) -> uint256:
+    slot: uint256 = index // COLLATERAL_LANES
+    packed: uint256 = 0
+    if slot == 0:
+        packed = self.user_to_position[user].collateral
+    else:
+        packed = self.user_to_collateral[user][slot]
+    return self._unpack_collateral(packed, index % COLLATERAL_LANES)
+
+
+@internal
+def _set_collateral_amount(user: address, index: uint256, amount: uint256):
+    """@dev Writes a collateral lane and keeps the held bitmap in sync"""
+    slot: uint256 = index // COLLATERAL_LANES
+    lane: uint256 = index % COLLATERAL_LANES
+    first_slot: uint256 = self.user_to_position[user].collateral
+    updated: uint256 = first_slot
+    if slot == 0:
+        updated = self._pack_collateral(first_slot, lane, amount)
+    else:
+        self.user_to_collateral[user][slot] = self._pack_collateral(
+            self.user_to_collateral[user][slot], lane, amount
+        )
+    held_bit: uint256 = 1 << (HELD_OFFSET + index)
+    if amount == 0:
+        updated &= ~held_bit
+    else:
+        updated |= held_bit
+    if updated != first_slot:
+        self.user_to_position[user].collateral = updated
+
+
+@pure
+@internal
+def _unpack_collateral(packed_collateral: uint256, lane: uint256) -> uint256:
+    return (
+        packed_collateral >> (lane * COLLATERAL_LANE_BITS)
+    ) & COLLATERAL_LANE_MASK
+
+
+@pure
+@internal
+def _pack_collateral(
+    packed_collateral: uint256, lane: uint256, amount: uint256
+) -> uint256:
+    """@dev Reverts if `amount` does not fit in a uint112 lane"""
+    offset: uint256 = lane * COLLATERAL_LANE_BITS
+    checked_amount: uint256 = convert(convert(amount, uint112), uint256)
+    return (packed_collateral & ~(COLLATERAL_LANE_MASK << offset)) | (
+        checked_amount << offset
+    )
+
+
 @internal
 def _burn_dsc(
     amount_dsc_to_burn: uint256, on_behalf_of: address, dsc_from: address
 ):
-    self.user_to_dsc_minted[on_behalf_of] -= amount_dsc_to_burn
+    self.user_to_position[on_behalf_of].dsc_minted -= amount_dsc_to_burn
+    self.total_dsc_minted -= amount_dsc_to_burn
+    log DscBurned(on_behalf_of, dsc_from, amount_dsc_to_burn)
     # Note, we are not checking success here
     extcall DSC.burn_from(dsc_from, amount_dsc_to_burn)
 
@@ -328,7 +817,150 @@ def get_usd_value(token: address, amount: uint256) -> uint256:
 @view
 @external
 def get_collateral_balance_of_user(user: address, token_collateral: address) -> uint256:
-    return self.user_to_token_to_amount_deposited[user][token_collateral]
+    return self._get_collateral_balance(user, token_collateral)
+
+
+@view
+@external
+def user_to_token_to_amount_deposited(user: address, token: address) -> uint256:
+    return self._get_collateral_balance(user, token)
+
+
+@view
+@external
+def user_to_dsc_minted(user: address) -> uint256:
+    return self.user_to_position[user].dsc_minted
+
+
+@view
+@external
+def token_to_price_feed(token: address) -> address:
+    collateral_id: uint256 = self.token_to_collateral_id[token]
+    if collateral_id == 0:
+        return empty(address)
+    return PRICE_FEEDS[collateral_id - 1]
+
+
+@view
+@external
+def get_collateral_tokens() -> DynArray[address, MAX_COLLATERAL_TOKENS]:
+    return COLLATERAL_TOKENS
+
+
+@view
+@external
+def get_held_collateral(user: address) -> uint256:
+    """@dev Bitmap of the COLLATERAL_TOKENS indexes the user has deposited"""
+    return self._held(user)
+
+
+@view
+@external
+def get_total_collateral(token: address) -> uint256:
+    """@dev Sum of the deposits of every user, 0 for tokens not allowed"""
+    collateral_id: uint256 = self.token_to_collateral_id[token]
+    if collateral_id == 0:
+        return 0
+    return self.total_collateral[collateral_id - 1]
+
+
+@view
+@external
+def get_collateralization_ratio() -> uint256:
+    """
+    @dev USD value of all the collateral deposited over all the DSC minted,
+        PRECISION based (2 * PRECISION is 200%), max_value(uint256) without
+        debt. One feed read per collateral token held, whatever the number
+        of users.
+    """
+    if self.total_dsc_minted == 0:
+        return max_value(uint256)
+    held: uint256 = 0
+    for i: uint256 in range(len(COLLATERAL_TOKENS), bound=MAX_COLLATERAL_TOKENS):
+        if self.total_collateral[i] != 0:
+            held |= 1 << i
+    prices: uint256[MAX_COLLATERAL_TOKENS] = self._get_prices(held)
+    total_collateral_value_usd: uint256 = 0
+    for i: uint256 in range(MAX_COLLATERAL_TOKENS):
+        if held >> i == 0:
+            break
+        total_collateral_value_usd += self._usd_value_from_price(
+            prices[i], self.total_collateral[i]
+        )
+    return (total_collateral_value_usd * PRECISION) // self.total_dsc_minted
+
+
+@view
+@external
+def max_liquidatable(user: address, collateral: address) -> uint256:
+    """
+    @dev Largest `debt_to_cover` that `liquidate(collateral, user, ...)` takes,
+        0 if it takes none. Seizing d of debt removes d plus the bonus of
+        collateral value, so the health factor of the user improves for
+        every d or for none: it does as long as their collateral is worth
+        more than their debt plus the bonus. The largest d is then bounded
+        by the debt and by the deposit of `collateral` alone. Past that point
+        only dust goes through, a few wei whose seized amount or bonus rounds
+        down to nothing, and it is not reported.
+        The liquidator side is not checked: liquidating does not change the
+        liquidator health factor, it only has to be unbroken already, and
+        the liquidator has to hold and approve the DSC.
+    """
+    collateral_id: uint256 = self.token_to_collateral_id[collateral]
+    if collateral_id == 0:
+        return 0
+    index: uint256 = collateral_id - 1
+    position: Position = self.user_to_position[user]
+    held: uint256 = position.collateral >> HELD_OFFSET
+    if position.dsc_minted == 0 or (held >> index) & 1 == 0:
+        return 0
+    prices: uint256[MAX_COLLATERAL_TOKENS] = self._get_prices(held)
+    collateral_value: uint256 = self._get_collateral_value(
+        user, position.collateral, prices
+    )
+    starting_health_factor: uint256 = self._calculate_health_factor(
+        position.dsc_minted, collateral_value
+    )
+    if starting_health_factor >= MIN_HEALTH_FACTOR:
+        return 0
+
+    # @dev largest token amount t with t + t * BONUS // PRECISION <= deposited,
+    # then the largest debt whose token amount rounds down to t
+    deposited: uint256 = self._get_collateral_amount(user, index)
+    token_amount: uint256 = (
+        deposited * LIQUIDATION_PRECISION + LIQUIDATION_PRECISION - 1
+    ) // (LIQUIDATION_PRECISION + LIQUIDATION_BONUS)
+    debt_to_cover: uint256 = min(
+        position.dsc_minted,
+        ((token_amount + 1) * prices[index] - 1) // PRECISION,
+    )
+    if debt_to_cover == 0:
+        return 0
+
+    token_amount = self._token_amount_from_price(prices[index], debt_to_cover)
+    collateral_to_seize: uint256 = token_amount + (
+        token_amount * LIQUIDATION_BONUS
+    ) // LIQUIDATION_PRECISION
+    ending_health_factor: uint256 = self._calculate_health_factor(
+        position.dsc_minted - debt_to_cover,
+        collateral_value
+        - self._usd_value_from_price(prices[index], deposited)
+        + self._usd_value_from_price(
+            prices[index], deposited - collateral_to_seize
+        ),
+    )
+    if ending_health_factor <= starting_health_factor:
+        return 0
+    return debt_to_cover
+
+
+@view
+@internal
+def _get_collateral_balance(user: address, token: address) -> uint256:
+    collateral_id: uint256 = self.token_to_collateral_id[token]
+    if collateral_id == 0:
+        return 0
+    return self._get_collateral_amount(user, collateral_id - 1)
 
 @pure
 @external
@@ -365,15 +997,7 @@ def _calculate_health_factor(
 @view
 @internal
 def _get_usd_value(token: address, amount: uint256) -> uint256:
-    price_feed: AggregatorV3Interface = AggregatorV3Interface(
-        self.token_to_price_feed[token]
-    )
-    # @notice we do not use an oracle lib here but for prod we should
-    # See: https://github.com/Cyfrin/mox-stablecoin-cu/blob/main/src/oracle_lib.vy
-    price: int256 = staticcall price_feed.latestAnswer()
-    return (
-        (convert(price, uint256) * ADDITIONAL_FEED_PRECISION) * amount
-    ) // PRECISION
+    return self._usd_value_from_price(self._get_price(token), amount)
 
 
 @view
@@ -381,10 +1005,57 @@ def _get_usd_value(token: address, amount: uint256) -> uint256:
 def _get_token_amount_from_usd(
     token: address, usd_amount_in_wei: uint256
 ) -> uint256:
-    price_feed: AggregatorV3Interface = AggregatorV3Interface(
-        self.token_to_price_feed[token]
+    return self._token_amount_from_price(
+        self._get_price(token), usd_amount_in_wei
     )
-    price: int256 = staticcall price_feed.latestAnswer()
-    return (usd_amount_in_wei * PRECISION) // (
-        convert(price, uint256) * ADDITIONAL_FEED_PRECISION
+
+
+@view
+@internal
+def _get_prices(held: uint256) -> uint256[MAX_COLLATERAL_TOKENS]:
+    """
+    @dev Snapshot of the scaled prices of the tokens set in `held`, indexed
+        like COLLATERAL_TOKENS. The other entries are left at 0.
+    """
+    prices: uint256[MAX_COLLATERAL_TOKENS] = empty(
+        uint256[MAX_COLLATERAL_TOKENS]
+    )
+    for i: uint256 in range(MAX_COLLATERAL_TOKENS):
+        if held >> i == 0:
+            break
+        if (held >> i) & 1 != 0:
+            prices[i] = self._get_scaled_price(i)
+    return prices
+
+
+@view
+@internal
+def _get_price(token: address) -> uint256:
+    return self._get_scaled_price(self._collateral_index(token))
+
+
+@view
+@internal
+def _get_scaled_price(index: uint256) -> uint256:
+    """
+    @dev Checked answer of the feed of COLLATERAL_TOKENS[index] times its
+        scale: the USD value, 18 decimals, of PRECISION wei of the token
+    """
+    return (
+        oracle_lib._stale_check_latest_round_data(PRICE_FEEDS[index])
+        * PRICE_SCALES[index]
     )
+
+
+@pure
+@internal
+def _usd_value_from_price(price: uint256, amount: uint256) -> uint256:
+    return (price * amount) // PRECISION
+
+
+@pure
+@internal
+def _token_amount_from_price(
+    price: uint256, usd_amount_in_wei: uint256
+) -> uint256:
+    return (usd_amount_in_wei * PRECISION) // price
@@ -0,0 +1,78 @@
+# pragma version 0.4.0
+"""
+@license MIT
+@author s3bc40
+@title DSC Factory
+@notice
+    Deploys DSC and its engine from blueprints and wires them together in a
+    single transaction. Both land at CREATE2 addresses that only depend on
+    the blueprints, the constructor arguments, the caller and a salt, so a
+    deployment can be predicted and replayed on every chain.
+"""
+# ------------------------------------------------------------------
+#                             IMPORTS
+# ------------------------------------------------------------------
+from interfaces import i_decentralized_stable_coin
+import dsc_engine
+
+# ------------------------------------------------------------------
+#                         STATE VARIABLES
+# ------------------------------------------------------------------
+DSC_BLUEPRINT: public(immutable(address))
+DSC_ENGINE_BLUEPRINT: public(immutable(address))
+
+# ------------------------------------------------------------------
+#                              EVENTS
+# ------------------------------------------------------------------
+event StackDeployed:
+    dsc: indexed(address)
+    dsc_engine: indexed(address)
+    deployer: indexed(address)
+
+
+# ------------------------------------------------------------------
+#                        EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------
+@deploy
+def __init__(dsc_blueprint: address, dsc_engine_blueprint: address):
+    """
+    @param dsc_blueprint address ERC-5202 blueprint of decentralized_stable_coin
+    @param dsc_engine_blueprint address ERC-5202 blueprint of dsc_engine
+    """
+    DSC_BLUEPRINT = dsc_blueprint
+    DSC_ENGINE_BLUEPRINT = dsc_engine_blueprint
+
+
+@external
+def deploy_stack(
+    token_addresses: DynArray[address, dsc_engine.MAX_COLLATERAL_TOKENS],
+    price_feeds_addresses: DynArray[address, dsc_engine.MAX_COLLATERAL_TOKENS],
+    flash_mint_ceiling: uint256,
+    salt: bytes32,
+) -> (address, address):
+    """
+    @dev The engine gets the DSC minter role and ownership, as with
+        script/deploy_dsc_engine.py. The factory keeps the minter role of
+        the DSC deployer, it has no way to use it.
+
+    @param flash_mint_ceiling uint256 FLASH_MINT_CEILING of the DSC
+    @param salt bytes32 Mixed with msg.sender, nobody can take the addresses
+        of another deployer
+    @return (address, address) DSC and engine
+    """
+    create2_salt: bytes32 = keccak256(abi_encode(msg.sender, salt))
+    dsc: address = create_from_blueprint(
+        DSC_BLUEPRINT, flash_mint_ceiling, salt=create2_salt
+    )
+    engine: address = create_from_blueprint(
+        DSC_ENGINE_BLUEPRINT,
+        token_addresses,
+        price_feeds_addresses,
+        dsc,
+        salt=create2_salt,
+    )
+
+    extcall i_decentralized_stable_coin(dsc).set_minter(engine, True)
+    extcall i_decentralized_stable_coin(dsc).transfer_ownership(engine)
+    log StackDeployed(dsc, engine, msg.sender)
+    return dsc, engine
@@ -0,0 +1,188 @@
+# pragma version 0.4.0
+"""
+@license MIT
+@author s3bc40
+@title DSC Engine Lens
+@notice
+    Read-only dashboard of many accounts in a single eth_call.
+    Every feed is read once per call, for the tokens held by the users
+    asked for only. Results match what the engine would compute: same
+    rounding, same health factor.
+"""
+# ------------------------------------------------------------------
+#                             IMPORTS
+# ------------------------------------------------------------------
+from interfaces import i_dsc_engine
+import dsc_engine
+
+# ------------------------------------------------------------------
+#                             STRUCTS
+# ------------------------------------------------------------------
+struct Account:
+    user: address
+    # @dev indexed like the engine COLLATERAL_TOKENS
+    deposits: DynArray[uint256, dsc_engine.MAX_COLLATERAL_TOKENS]
+    deposits_usd: DynArray[uint256, dsc_engine.MAX_COLLATERAL_TOKENS]
+    collateral_value_usd: uint256
+    dsc_minted: uint256
+    health_factor: uint256
+    # @dev DSC that `mint_dsc` still accepts
+    max_mintable_dsc: uint256
+    # @dev collateral that `redeem_collateral` still accepts, token by token
+    max_redeemable: DynArray[uint256, dsc_engine.MAX_COLLATERAL_TOKENS]
+
+
+# ------------------------------------------------------------------
+#                         STATE VARIABLES
+# ------------------------------------------------------------------
+ENGINE: public(immutable(i_dsc_engine))
+MAX_ACCOUNTS: public(constant(uint256)) = 64
+
+
+# ------------------------------------------------------------------
+#                        EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------
+@deploy
+def __init__(engine_address: address):
+    ENGINE = i_dsc_engine(engine_address)
+
+
+@view
+@external
+def get_accounts(
+    users: DynArray[address, MAX_ACCOUNTS]
+) -> DynArray[Account, MAX_ACCOUNTS]:
+    """
+    @param users DynArray[address] Accounts to report on
+    @return DynArray[Account] One entry per user, in the same order
+    """
+    tokens: DynArray[address, dsc_engine.MAX_COLLATERAL_TOKENS] = (
+        staticcall ENGINE.get_collateral_tokens()
+    )
+    helds: DynArray[uint256, MAX_ACCOUNTS] = []
+    held_by_any: uint256 = 0
+    for user: address in users:
+        held: uint256 = staticcall ENGINE.get_held_collateral(user)
+        helds.append(held)
+        held_by_any |= held
+    prices: DynArray[uint256, dsc_engine.MAX_COLLATERAL_TOKENS] = (
+        self._get_prices(tokens, held_by_any)
+    )
+
+    accounts: DynArray[Account, MAX_ACCOUNTS] = []
+    for i: uint256 in range(len(users), bound=MAX_ACCOUNTS):
+        accounts.append(self._get_account(users[i], helds[i], tokens, prices))
+    return accounts
+
+
+@view
+@external
+def get_prices() -> DynArray[uint256, dsc_engine.MAX_COLLATERAL_TOKENS]:
+    """@dev USD value, 18 decimals, of PRECISION wei of each collateral"""
+    tokens: DynArray[address, dsc_engine.MAX_COLLATERAL_TOKENS] = (
+        staticcall ENGINE.get_collateral_tokens()
+    )
+    return self._get_prices(tokens, max_value(uint256))
+
+
+# ------------------------------------------------------------------
+#                        INTERNAL FUNCTIONS
+# ------------------------------------------------------------------
+@view
+@internal
+def _get_account(
+    user: address,
+    held: uint256,
+    tokens: DynArray[address, dsc_engine.MAX_COLLATERAL_TOKENS],
+    prices: DynArray[uint256, dsc_engine.MAX_COLLATERAL_TOKENS],
+) -> Account:
+    account: Account = Account(
+        user=user,
+        deposits=[],
+        deposits_usd=[],
+        collateral_value_usd=0,
+        dsc_minted=staticcall ENGINE.user_to_dsc_minted(user),
+        health_factor=0,
+        max_mintable_dsc=0,
+        max_redeemable=[],
+    )
+    for i: uint256 in range(len(tokens), bound=dsc_engine.MAX_COLLATERAL_TOKENS):
+        amount: uint256 = 0
+        if (held >> i) & 1 != 0:
+            amount = staticcall ENGINE.get_collateral_balance_of_user(
+                user, tokens[i]
+            )
+        amount_usd: uint256 = dsc_engine._usd_value_from_price(prices[i], amount)
+        account.deposits.append(amount)
+        account.deposits_usd.append(amount_usd)
+        account.collateral_value_usd += amount_usd
+
+    account.health_factor = dsc_engine._calculate_health_factor(
+        account.dsc_minted, account.collateral_value_usd
+    )
+    # @dev the health factor holds while the adjusted collateral covers the debt
+    adjusted_collateral_usd: uint256 = (
+        account.collateral_value_usd * dsc_engine.LIQUIDATION_THRESHOLD
+    ) // dsc_engine.LIQUIDATION_PRECISION
+    if adjusted_collateral_usd > account.dsc_minted:
+        account.max_mintable_dsc = adjusted_collateral_usd - account.dsc_minted
+
+    # @dev smallest collateral value that still covers the debt
+    min_collateral_value_usd: uint256 = (
+        account.dsc_minted * dsc_engine.LIQUIDATION_PRECISION
+        + dsc_engine.LIQUIDATION_THRESHOLD
+        - 1
+    ) // dsc_engine.LIQUIDATION_THRESHOLD
+    for i: uint256 in range(len(tokens), bound=dsc_engine.MAX_COLLATERAL_TOKENS):
+        account.max_redeemable.append(
+            self._max_redeemable(
+                account.deposits[i],
+                account.collateral_value_usd - account.deposits_usd[i],
+                min_collateral_value_usd,
+                prices[i],
+            )
+        )
+    return account
+
+
+@pure
+@internal
+def _max_redeemable(
+    deposited: uint256,
+    other_collateral_usd: uint256,
+    min_collateral_value_usd: uint256,
+    price: uint256,
+) -> uint256:
+    """
+    @dev Largest amount of one collateral that can be redeemed while the
+        position stays at a health factor of at least 1
+
+    @param other_collateral_usd uint256 Value of the other collaterals
+    """
+    if deposited == 0 or other_collateral_usd >= min_collateral_value_usd:
+        return deposited
+    missing_usd: uint256 = min_collateral_value_usd - other_collateral_usd
+    # @dev the engine floors the value, round the amount to keep up
+    to_keep: uint256 = (
+        missing_usd * dsc_engine.PRECISION + price - 1
+    ) // price
+    if to_keep >= deposited:
+        return 0
+    return deposited - to_keep
+
+
+@view
+@internal
+def _get_prices(
+    tokens: DynArray[address, dsc_engine.MAX_COLLATERAL_TOKENS], held: uint256
+) -> DynArray[uint256, dsc_engine.MAX_COLLATERAL_TOKENS]:
+    """@dev Scaled prices of the tokens set in `held`, 0 for the others"""
+    prices: DynArray[uint256, dsc_engine.MAX_COLLATERAL_TOKENS] = []
+    for i: uint256 in range(len(tokens), bound=dsc_engine.MAX_COLLATERAL_TOKENS):
+        price: uint256 = 0
+        if (held >> i) & 1 != 0:
+            price = staticcall ENGINE.get_usd_value(
+                tokens[i], dsc_engine.PRECISION
+            )
+        prices.append(price)
+    return prices
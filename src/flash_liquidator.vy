@@ -0,0 +1,166 @@
+# pragma version 0.4.0
+"""
+@license MIT
+@author s3bc40
+@title Flash Liquidator
+@notice
+    Liquidates engine positions without holding any DSC or collateral. In a
+    single transaction it flash-mints the DSC to cover, liquidates through
+    `liquidate_many`, sells the seized collateral for DSC on a swap router
+    and burns the loan back. The DSC left, the liquidation bonus net of the
+    swap, goes to the owner. Each swap must return at least the engine value
+    of the collateral sold, less `max_slippage_bps`.
+"""
+# ------------------------------------------------------------------
+#                             IMPORTS
+# ------------------------------------------------------------------
+from ethereum.ercs import IERC20
+from interfaces import i_erc3156_flash_borrower
+from interfaces import i_erc3156_flash_lender
+from interfaces import i_dsc_engine
+from interfaces import i_swap_router
+from snekmate.auth import ownable as ow
+import dsc_engine
+
+# ------------------------------------------------------------------
+#                          INIT & EXPORTS
+# ------------------------------------------------------------------
+implements: i_erc3156_flash_borrower
+initializes: ow
+
+exports: (ow.owner, ow.transfer_ownership)
+
+# ------------------------------------------------------------------
+#                              ERRORS
+# ------------------------------------------------------------------
+FLASH_LIQUIDATOR_UNTRUSTED_LOAN: public(constant(String[38])) = (
+    "flash_liquidator: untrusted flash loan"
+)
+FLASH_LIQUIDATOR_NOT_PROFITABLE: public(constant(String[32])) = (
+    "flash_liquidator: not profitable"
+)
+FLASH_LIQUIDATOR_TRANSFER_FAILED: public(constant(String[33])) = (
+    "flash_liquidator: transfer failed"
+)
+FLASH_LIQUIDATOR_APPROVE_FAILED: public(constant(String[32])) = (
+    "flash_liquidator: approve failed"
+)
+FLASH_LIQUIDATOR_INVALID_SLIPPAGE: public(constant(String[34])) = (
+    "flash_liquidator: invalid slippage"
+)
+FLASH_LIQUIDATOR_SLIPPAGE: public(constant(String[34])) = (
+    "flash_liquidator: swap below bound"
+)
+
+# ------------------------------------------------------------------
+#                         STATE VARIABLES
+# ------------------------------------------------------------------
+ENGINE: public(immutable(i_dsc_engine))
+DSC: public(immutable(IERC20))
+FLASH_LOAN_CALLBACK_SUCCESS: constant(bytes32) = keccak256(
+    "ERC3156FlashBorrower.onFlashLoan"
+)
+MAX_BPS: public(constant(uint256)) = 10_000
+
+# @dev the batch being liquidated, handed from `liquidate` to `onFlashLoan`
+# and reset before `liquidate` returns. Not transient storage, which the
+# zkSync networks of moccasin.toml do not support
+pending_liquidations: DynArray[i_dsc_engine.Liquidation, dsc_engine.MAX_LIQUIDATIONS]
+pending_router: i_swap_router
+pending_max_slippage_bps: uint256
+
+
+# ------------------------------------------------------------------
+#                        EXTERNAL FUNCTIONS
+# ------------------------------------------------------------------
+@deploy
+def __init__(engine: address):
+    ow.__init__()
+    ENGINE = i_dsc_engine(engine)
+    DSC = IERC20(staticcall ENGINE.DSC())
+    # @dev the engine burns the DSC covered out of its allowance and DSC the
+    # loan out of its own. Snekmate never decreases an unlimited allowance, so
+    # liquidations do not write them again
+    success: bool = extcall DSC.approve(ENGINE.address, max_value(uint256))
+    assert success, FLASH_LIQUIDATOR_APPROVE_FAILED
+    success = extcall DSC.approve(DSC.address, max_value(uint256))
+    assert success, FLASH_LIQUIDATOR_APPROVE_FAILED
+
+
+@external
+def liquidate(
+    liquidations: DynArray[i_dsc_engine.Liquidation, dsc_engine.MAX_LIQUIDATIONS],
+    router: i_swap_router,
+    max_slippage_bps: uint256,
+    min_profit: uint256,
+) -> uint256:
+    """
+    @dev Owner only. The whole debt of the batch is flash-minted, entries
+        the engine skips leave their share unused and burnt back.
+
+    @param liquidations DynArray[Liquidation] (user, collateral, debt_to_cover) entries
+    @param router i_swap_router Market selling the seized collateral for DSC
+    @param max_slippage_bps uint256 Most each swap may return under the
+        engine value of the collateral sold, in basis points
+    @param min_profit uint256 DSC the owner gets at least, reverts otherwise
+    @return uint256 DSC sent to the owner
+    """
+    ow._check_owner()
+    assert max_slippage_bps <= MAX_BPS, FLASH_LIQUIDATOR_INVALID_SLIPPAGE
+    debt: uint256 = 0
+    for liquidation: i_dsc_engine.Liquidation in liquidations:
+        debt += liquidation.debt_to_cover
+    self.pending_liquidations = liquidations
+    self.pending_router = router
+    self.pending_max_slippage_bps = max_slippage_bps
+
+    extcall i_erc3156_flash_lender(DSC.address).flashLoan(
+        i_erc3156_flash_borrower(self), DSC.address, debt, b""
+    )
+    self.pending_liquidations = []
+    self.pending_router = empty(i_swap_router)
+    self.pending_max_slippage_bps = 0
+
+    profit: uint256 = staticcall DSC.balanceOf(self)
+    assert profit >= min_profit, FLASH_LIQUIDATOR_NOT_PROFITABLE
+    if profit > 0:
+        success: bool = extcall DSC.transfer(ow.owner, profit)
+        assert success, FLASH_LIQUIDATOR_TRANSFER_FAILED
+    return profit
+
+
+@external
+def onFlashLoan(
+    initiator: address,
+    token: address,
+    amount: uint256,
+    fee: uint256,
+    data: Bytes[4096],
+) -> bytes32:
+    """@dev Only loans this contract asked DSC for, from `liquidate`"""
+    assert msg.sender == DSC.address, FLASH_LIQUIDATOR_UNTRUSTED_LOAN
+    assert initiator == self, FLASH_LIQUIDATOR_UNTRUSTED_LOAN
+    extcall ENGINE.liquidate_many(self.pending_liquidations)
+
+    router: i_swap_router = self.pending_router
+    max_slippage_bps: uint256 = self.pending_max_slippage_bps
+    tokens: DynArray[address, dsc_engine.MAX_COLLATERAL_TOKENS] = (
+        staticcall ENGINE.get_collateral_tokens()
+    )
+    for collateral: address in tokens:
+        seized: uint256 = staticcall IERC20(collateral).balanceOf(self)
+        if seized == 0:
+            continue
+        # @dev the bound follows the feed the engine priced the seizure at
+        min_amount_out: uint256 = (
+            staticcall ENGINE.get_usd_value(collateral, seized)
+            * (MAX_BPS - max_slippage_bps)
+            // MAX_BPS
+        )
+        success: bool = extcall IERC20(collateral).approve(router.address, seized)
+        assert success, FLASH_LIQUIDATOR_APPROVE_FAILED
+        amount_out: uint256 = extcall router.swap(
+            collateral, DSC.address, seized, min_amount_out, self
+        )
+        assert amount_out >= min_amount_out, FLASH_LIQUIDATOR_SLIPPAGE
+    return FLASH_LOAN_CALLBACK_SUCCESS
@@ -14,7 +14,6 @@ getTimestamp: public(HashMap[uint256, uint256])
 getStartedAt: public(HashMap[uint256, uint256])
 
 supply: uint256
-decimals: uint256
 
 version: public(constant(uint256)) = 2
 
@@ -25,6 +24,12 @@ def __init__(_decimals: uint8, _initialAnswer: int256):
     self._updateAnswer(_initialAnswer)
 
 
+@external
+@view
+def decimals() -> uint8:
+    return DECIMALS
+
+
 @external
 def updateAnswer(_answer: int256):
     self._updateAnswer(_answer)
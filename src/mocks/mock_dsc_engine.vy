@@ -16,8 +16,8 @@ exports: (dsc_engine.DSC_ENGINE_TRANSFER_FAILED, dsc_engine.deposit_and_mint)
 
 @deploy
 def __init__(
-    token_addresses: address[2],
-    price_feeds_addresses: address[2],
+    token_addresses: DynArray[address, dsc_engine.MAX_COLLATERAL_TOKENS],
+    price_feeds_addresses: DynArray[address, dsc_engine.MAX_COLLATERAL_TOKENS],
     dsc_address: address,
 ):
     dsc_engine.__init__(token_addresses, price_feeds_addresses, dsc_address)
@@ -0,0 +1,48 @@
+# pragma version 0.4.0
+"""
+@title mock_swap_router
+@license MIT
+@notice Buys collateral for DSC at the engine price, one DSC for one USD,
+    less `fee_bps`, out of the DSC it holds. Stands for a DEX in the flash
+    liquidation tests.
+"""
+from ethereum.ercs import IERC20
+from interfaces import i_dsc_engine
+from interfaces import i_swap_router
+
+implements: i_swap_router
+
+ENGINE: public(immutable(i_dsc_engine))
+DSC: public(immutable(IERC20))
+fee_bps: public(uint256)
+
+
+@deploy
+def __init__(engine: address, dsc: address):
+    ENGINE = i_dsc_engine(engine)
+    DSC = IERC20(dsc)
+
+
+@external
+def set_fee_bps(fee_bps: uint256):
+    self.fee_bps = fee_bps
+
+
+@external
+def swap(
+    token_in: address,
+    token_out: address,
+    amount_in: uint256,
+    min_amount_out: uint256,
+    recipient: address,
+) -> uint256:
+    assert token_out == DSC.address, "mock_swap_router: only buys collateral"
+    amount_out: uint256 = (
+        staticcall ENGINE.get_usd_value(token_in, amount_in)
+        * (10_000 - self.fee_bps)
+        // 10_000
+    )
+    assert amount_out >= min_amount_out, "mock_swap_router: slippage"
+    assert extcall IERC20(token_in).transferFrom(msg.sender, self, amount_in)
+    assert extcall DSC.transfer(recipient, amount_out)
+    return amount_out
@@ -0,0 +1,66 @@
+# pragma version 0.4.0
+"""
+@license MIT
+@author s3bc40
+@title Oracle Lib
+@notice
+    Checks Chainlink price feeds for stale and invalid answers.
+    If a feed fails a check, every function pricing it reverts: the engine
+    is frozen for that collateral until the feed recovers. This is on purpose.
+"""
+# ------------------------------------------------------------------
+#                             IMPORTS
+# ------------------------------------------------------------------
+from interfaces import AggregatorV3Interface
+
+# ------------------------------------------------------------------
+#                              ERRORS
+# ------------------------------------------------------------------
+ORACLE_LIB_STALE_PRICE: public(constant(String[23])) = "oracle_lib: stale price"
+ORACLE_LIB_INVALID_PRICE: public(
+    constant(String[25])
+) = "oracle_lib: invalid price"
+
+# ------------------------------------------------------------------
+#                         STATE VARIABLES
+# ------------------------------------------------------------------
+# @dev heartbeats are at most 24 hours, leave room for a few missed rounds
+TIMEOUT: public(constant(uint256)) = 72 * 3600
+
+
+# ------------------------------------------------------------------
+#                        INTERNAL FUNCTIONS
+# ------------------------------------------------------------------
+@view
+@internal
+def _stale_check_latest_round_data(price_feed: address) -> uint256:
+    """
+    @dev Latest answer of `price_feed`, reverts if it is stale or not positive
+
+    @param price_feed address Chainlink aggregator
+    @return uint256 The answer, in the decimals of the feed
+    """
+    round_id: uint80 = 0
+    answer: int256 = 0
+    started_at: uint256 = 0
+    updated_at: uint256 = 0
+    answered_in_round: uint80 = 0
+    (
+        round_id, answer, started_at, updated_at, answered_in_round
+    ) = staticcall AggregatorV3Interface(price_feed).latestRoundData()
+
+    assert updated_at != 0, ORACLE_LIB_STALE_PRICE
+    assert answered_in_round >= round_id, ORACLE_LIB_STALE_PRICE
+    # @dev a feed timestamped in the future is as untrusted as a stale one
+    assert updated_at <= block.timestamp, ORACLE_LIB_STALE_PRICE
+    assert block.timestamp - updated_at <= TIMEOUT, ORACLE_LIB_STALE_PRICE
+    assert answer > 0, ORACLE_LIB_INVALID_PRICE
+    return convert(answer, uint256)
+
+
+@view
+@internal
+def _feed_decimals(price_feed: address) -> uint256:
+    return convert(
+        staticcall AggregatorV3Interface(price_feed).decimals(), uint256
+    )
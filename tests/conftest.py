@@ -1,10 +1,19 @@
+import contextlib
+
 import boa
 import pytest
 
+from typing import Callable, Collection, Sequence
+
 from eth_account import Account
+from eth_account.signers.local import LocalAccount
+from eth_utils import keccak
 from moccasin.boa_tools import VyperContract
 from moccasin.config import MoccasinAccount, get_active_network, Network
 from script.deploy_dsc_engine import deploy_dsc_engine
+from script.artifacts import load_deployer
+from script.deploy_dsc_lens import deploy_dsc_lens
+from script.deploy_flash_liquidator import deploy_flash_liquidator
 from script.mocks.deploy_mock_dsc_engine import deploy_mock_dsc_engine
 from tests.constants import (
     BALANCE,
@@ -15,6 +24,99 @@ from tests.constants import (
 )
 
 
+# ------------------------------------------------------------------
+#                           CHECKPOINTS
+# ------------------------------------------------------------------
+class Checkpoints:
+    """
+    Named EVM states, built once and kept while later tests reuse them.
+
+    @dev Every test starts from the session deployments and walks the chain
+        of state fixtures it requests. Each built step is held open as a
+        `boa.env.anchor()` entered right after it, so a later test walking the
+        same chain reuses it, whatever the number of calls it replays. A test
+        leaving the chain unwinds the anchors past the shared prefix, and the
+        steps after it are built again. Building a step also drops what ran
+        since the previous one, so a test requests its state fixtures before
+        any fixture changing state outside them.
+    @dev Moving between states discards boa's own anchors opened above them,
+        so tests using checkpoints run with `ignore_isolation`.
+    @dev moccasin checks a named contract against boa's contract registry,
+        which anchors leave alone. The session contracts are registered again
+        on each rewind, or a test registering another object at their address
+        (e.g. with `.at()`) would make `manifest_named` redeploy them.
+    """
+
+    def __init__(self, session_contracts: Sequence[VyperContract]):
+        self._session_contracts = session_contracts
+        self._steps: list[tuple[str, object]] = []
+        # @dev `_anchors[k]` is entered in the state after the first k steps
+        self._anchors: list[contextlib.AbstractContextManager] = []
+        self._depth = 0
+        self._enter()
+
+    def rewind(self, keep: Collection[str] = ()):
+        """
+        Back to the session deployments, then forward along the kept steps.
+
+        @param keep Names of the steps the next walk may reuse, e.g. the
+            fixtures of the next test; the leading kept steps stay built
+        """
+        depth = 0
+        while depth < len(self._steps) and self._steps[depth][0] in keep:
+            depth += 1
+        self._unwind(depth)
+        self._depth = 0
+        for contract in self._session_contracts:
+            boa.env.register_contract(contract.address, contract)
+
+    def step(self, name: str, build: Callable[[], object]) -> object:
+        if self._depth < len(self._steps) and self._steps[self._depth][0] == name:
+            value = self._steps[self._depth][1]
+        else:
+            self._unwind(self._depth)
+            value = build()
+            self._steps.append((name, value))
+            self._enter()
+        self._depth += 1
+        return value
+
+    def close(self):
+        while self._anchors:
+            self._anchors.pop().__exit__(None, None, None)
+
+    def _enter(self):
+        anchor = boa.env.anchor()
+        anchor.__enter__()
+        self._anchors.append(anchor)
+
+    def _unwind(self, depth: int):
+        # @dev leaving an anchor reverts to the state it was entered in, the
+        # anchor after the kept steps is left and entered again to drop what
+        # ran on top of it
+        while len(self._anchors) > depth:
+            self._anchors.pop().__exit__(None, None, None)
+        del self._steps[depth:]
+        self._enter()
+
+
+CHECKPOINTS = pytest.StashKey[Checkpoints]()
+
+
+def pytest_collection_modifyitems(session, config, items):
+    for item in items:
+        if "checkpoints" in item.fixturenames:
+            item.add_marker("ignore_isolation")
+
+
+def pytest_runtest_setup(item):
+    # @dev runs before the fixtures of the test, so an isolated test starts
+    # from the session deployments before boa anchors its fixtures
+    checkpoints = item.config.stash.get(CHECKPOINTS, None)
+    if checkpoints is not None:
+        checkpoints.rewind(item.fixturenames)
+
+
 # ------------------------------------------------------------------
 #                          SESSION SCOPED
 # ------------------------------------------------------------------
@@ -43,6 +145,19 @@ def eth_usd(active_network: Network) -> VyperContract:
     return active_network.manifest_named("eth_usd_price_feed")
 
 
+@pytest.fixture(scope="session")
+def checkpoints(
+    request, tmp_path_factory, weth, wbtc, btc_usd, eth_usd
+) -> Checkpoints:
+    # @dev boa anchors a session fixture when it is set up, one set up after
+    # the checkpoints would be discarded by the first rewind
+    checkpoints = Checkpoints([weth, wbtc, btc_usd, eth_usd])
+    request.config.stash[CHECKPOINTS] = checkpoints
+    yield checkpoints
+    del request.config.stash[CHECKPOINTS]
+    checkpoints.close()
+
+
 # ------------------------------------------------------------------
 #                         FUNCTION SCOPED
 # ------------------------------------------------------------------
@@ -52,86 +167,162 @@ def default_account(active_network: Network) -> MoccasinAccount:
 
 
 @pytest.fixture(scope="function")
-def dsc(active_network: Network) -> VyperContract:
-    return active_network.manifest_named("decentralized_stable_coin")
+def dsc(active_network: Network, checkpoints: Checkpoints) -> VyperContract:
+    return checkpoints.step(
+        "dsc", lambda: active_network.manifest_named("decentralized_stable_coin")
+    )
+
+
+@pytest.fixture(scope="function")
+def dsce(dsc, checkpoints: Checkpoints) -> VyperContract:
+    return checkpoints.step("dsce", lambda: deploy_dsc_engine(dsc))
+
+
+@pytest.fixture(scope="function")
+def dsc_lens(dsce, checkpoints: Checkpoints) -> VyperContract:
+    def _deploy_dsc_lens() -> VyperContract:
+        # @dev own deployer, the lens address is not taken by any other step
+        with boa.env.prank(boa.env.generate_address("dsc_lens_deployer")):
+            return deploy_dsc_lens(dsce)
+
+    return checkpoints.step("dsc_lens", _deploy_dsc_lens)
+
+
+@pytest.fixture(scope="function")
+def flash_liquidator(dsce, checkpoints: Checkpoints) -> VyperContract:
+    def _deploy_flash_liquidator() -> VyperContract:
+        # @dev the keeper deploys and owns it, it holds no DSC nor collateral
+        with boa.env.prank(boa.env.generate_address("keeper")):
+            return deploy_flash_liquidator(dsce)
+
+    return checkpoints.step("flash_liquidator", _deploy_flash_liquidator)
 
 
 @pytest.fixture(scope="function")
-def dsce(dsc) -> VyperContract:
-    return deploy_dsc_engine(dsc)
+def swap_router(dsce, dsc, checkpoints: Checkpoints) -> VyperContract:
+    def _deploy_swap_router() -> VyperContract:
+        with boa.env.prank(boa.env.generate_address("swap_router_deployer")):
+            return load_deployer("src/mocks/mock_swap_router.vy").deploy(
+                dsce.address, dsc.address
+            )
+
+    return checkpoints.step("swap_router", _deploy_swap_router)
 
 
 @pytest.fixture(scope="function")
-def mock_dsce(dsc) -> VyperContract:
-    return deploy_mock_dsc_engine(dsc)
+def mock_dsce(dsc, checkpoints: Checkpoints) -> VyperContract:
+    return checkpoints.step("mock_dsce", lambda: deploy_mock_dsc_engine(dsc))
 
 
 @pytest.fixture(scope="function")
-def some_user(weth, wbtc) -> str:
-    entropy = 13
-    # @dev https://eth-account.readthedocs.io/en/stable/eth_account.html#eth-account
-    account = Account.create(entropy)
-    boa.env.set_balance(account.address, BALANCE)
-    with boa.env.prank(account.address):
-        weth.mock_mint()
-        wbtc.mock_mint()
-    return account.address
+def some_user(weth, wbtc, checkpoints: Checkpoints) -> str:
+    def _some_user() -> str:
+        entropy = 13
+        # @dev https://eth-account.readthedocs.io/en/stable/eth_account.html#eth-account
+        account = Account.create(entropy)
+        boa.env.set_balance(account.address, BALANCE)
+        with boa.env.prank(account.address):
+            weth.mock_mint()
+            wbtc.mock_mint()
+        return account.address
+
+    return checkpoints.step("some_user", _some_user)
 
 
 @pytest.fixture(scope="function")
-def liquidator(weth, wbtc, dsc, dsce) -> str:
-    entropy = 7
-    # @dev https://eth-account.readthedocs.io/en/stable/eth_account.html#eth-account
-    account = Account.create(entropy)
-    boa.env.set_balance(account.address, BALANCE)
-    with boa.env.prank(account.address):
-        weth.mock_mint()
-        wbtc.mock_mint()
+def liquidator(weth, wbtc, dsc, dsce, checkpoints: Checkpoints) -> str:
+    def _liquidator() -> str:
+        entropy = 7
+        # @dev https://eth-account.readthedocs.io/en/stable/eth_account.html#eth-account
+        account = Account.create(entropy)
+        boa.env.set_balance(account.address, BALANCE)
+        with boa.env.prank(account.address):
+            weth.mock_mint()
+            wbtc.mock_mint()
 
-        weth.approve(dsce, COLLATERAL_AMOUNT)
-        wbtc.approve(dsce, COLLATERAL_AMOUNT)
+            weth.approve(dsce, COLLATERAL_AMOUNT)
+            wbtc.approve(dsce, COLLATERAL_AMOUNT)
 
-        dsce.deposit_and_mint(weth, COLLATERAL_AMOUNT, MINT_AMOUNT)
-        dsce.deposit_and_mint(wbtc, COLLATERAL_AMOUNT, MINT_AMOUNT)
+            dsce.deposit_many_and_mint(
+                [(weth.address, COLLATERAL_AMOUNT), (wbtc.address, COLLATERAL_AMOUNT)],
+                MINT_AMOUNT * 2,
+            )
 
-        dsc.approve(dsce, MINT_AMOUNT)
-        dsce.mint_dsc(MINT_AMOUNT)
-    return account.address
+            dsc.approve(dsce, MINT_AMOUNT)
+            dsce.mint_dsc(MINT_AMOUNT)
+        return account.address
+
+    return checkpoints.step("liquidator", _liquidator)
 
 
 @pytest.fixture(scope="function")
-def dsce_with_minted_dsc_collateral(dsce, some_user, weth, wbtc) -> VyperContract:
-    with boa.env.prank(some_user):
-        weth.approve(dsce, COLLATERAL_AMOUNT)
-        wbtc.approve(dsce, COLLATERAL_AMOUNT)
+def permit_user(weth, wbtc, checkpoints: Checkpoints) -> LocalAccount:
+    """User with a known key, to sign permits, and no allowance set."""
 
-        dsce.deposit_and_mint(weth, COLLATERAL_AMOUNT, MINT_AMOUNT)
-        dsce.deposit_and_mint(wbtc, COLLATERAL_AMOUNT, MINT_AMOUNT)
+    def _permit_user() -> LocalAccount:
+        account = Account.from_key(keccak(text="permit_user"))
+        boa.env.set_balance(account.address, BALANCE)
+        with boa.env.prank(account.address):
+            weth.mock_mint()
+            wbtc.mock_mint()
+        return account
 
-    return dsce
+    return checkpoints.step("permit_user", _permit_user)
 
 
 @pytest.fixture(scope="function")
-def mock_dsce_with_minted_dsc_collateral(
-    mock_dsce, some_user, weth, wbtc
+def dsce_with_minted_dsc_collateral(
+    dsce, some_user, weth, wbtc, checkpoints: Checkpoints
 ) -> VyperContract:
-    with boa.env.prank(some_user):
-        weth.approve(mock_dsce, COLLATERAL_AMOUNT)
-        wbtc.approve(mock_dsce, COLLATERAL_AMOUNT)
+    def _deposit_and_mint() -> VyperContract:
+        with boa.env.prank(some_user):
+            weth.approve(dsce, COLLATERAL_AMOUNT)
+            wbtc.approve(dsce, COLLATERAL_AMOUNT)
 
-        mock_dsce.deposit_and_mint(weth, COLLATERAL_AMOUNT, MINT_AMOUNT)
-        mock_dsce.deposit_and_mint(wbtc, COLLATERAL_AMOUNT, MINT_AMOUNT)
+            dsce.deposit_many_and_mint(
+                [(weth.address, COLLATERAL_AMOUNT), (wbtc.address, COLLATERAL_AMOUNT)],
+                MINT_AMOUNT * 2,
+            )
 
-    return mock_dsce
+        return dsce
+
+    return checkpoints.step("dsce_with_minted_dsc_collateral", _deposit_and_mint)
 
 
 @pytest.fixture(scope="function")
-def dsce_with_minted_dsc_for_liquidation(dsce, some_user, weth, wbtc) -> VyperContract:
-    with boa.env.prank(some_user):
-        weth.approve(dsce, LIQUIDATION_COLLATERAL)
-        wbtc.approve(dsce, LIQUIDATION_COLLATERAL)
+def mock_dsce_with_minted_dsc_collateral(
+    mock_dsce, some_user, weth, wbtc, checkpoints: Checkpoints
+) -> VyperContract:
+    def _deposit_and_mint() -> VyperContract:
+        with boa.env.prank(some_user):
+            weth.approve(mock_dsce, COLLATERAL_AMOUNT)
+            wbtc.approve(mock_dsce, COLLATERAL_AMOUNT)
+
+            mock_dsce.deposit_and_mint(weth, COLLATERAL_AMOUNT, MINT_AMOUNT)
+            mock_dsce.deposit_and_mint(wbtc, COLLATERAL_AMOUNT, MINT_AMOUNT)
 
-        dsce.deposit_and_mint(weth, LIQUIDATION_COLLATERAL, LIQUIDATION_MINT)
-        dsce.deposit_and_mint(wbtc, LIQUIDATION_COLLATERAL, LIQUIDATION_MINT)
+        return mock_dsce
 
-    return dsce
+    return checkpoints.step("mock_dsce_with_minted_dsc_collateral", _deposit_and_mint)
+
+
+@pytest.fixture(scope="function")
+def dsce_with_minted_dsc_for_liquidation(
+    dsce, some_user, weth, wbtc, checkpoints: Checkpoints
+) -> VyperContract:
+    def _deposit_and_mint() -> VyperContract:
+        with boa.env.prank(some_user):
+            weth.approve(dsce, LIQUIDATION_COLLATERAL)
+            wbtc.approve(dsce, LIQUIDATION_COLLATERAL)
+
+            dsce.deposit_many_and_mint(
+                [
+                    (weth.address, LIQUIDATION_COLLATERAL),
+                    (wbtc.address, LIQUIDATION_COLLATERAL),
+                ],
+                LIQUIDATION_MINT * 2,
+            )
+
+        return dsce
+
+    return checkpoints.step("dsce_with_minted_dsc_for_liquidation", _deposit_and_mint)
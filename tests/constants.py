@@ -31,3 +31,4 @@ RANDOM_TOKEN_ADDRESS = boa.env.generate_address("random_token")
 PRICE_FEED_UNDER_VALUE_PRICE = 10_000_000_000
 PRICE_FEED_VALUE_NO_IMPROVEMENT = 10_000
 PRICE_FEED_VALUE_WITH_IMPROVEMENT = 15_000_000_000
+ORACLE_TIMEOUT = 72 * 3600
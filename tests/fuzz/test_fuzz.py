@@ -1,49 +1,115 @@
+import os
+
 import boa
+import pytest
 
 from boa.util.abi import Address
 from boa.test.strategies import strategy
 from hypothesis import settings, strategies as st, assume
-from hypothesis.stateful import RuleBasedStateMachine, initialize, invariant, rule
+from hypothesis.database import DirectoryBasedExampleDatabase
+from hypothesis.stateful import (
+    RuleBasedStateMachine,
+    invariant,
+    rule,
+    run_state_machine_as_test,
+)
+from keeper.engine_math import PRECISION
+from keeper.engine_model import EngineModel, EngineRevert
 from moccasin.config import Network, get_active_network
 from eth.constants import ZERO_ADDRESS
 from eth_utils import to_wei
 from script.deploy_dsc import deploy_dsc
 from script.deploy_dsc_engine import deploy_dsc_engine
-from src.mocks import MockV3Aggregator
 
 
 USER_SIZE = 10
 MAX_DEPOSIT_SIZE = to_wei(1000, "ether")
 LIQUIDATOR = boa.env.generate_address()
 LIQUIDATOR_DSC_AMOUNT = to_wei(100, "ether")
+# @dev steps between two comparisons of the reference model with the engine
+MODEL_CHECKPOINT_INTERVAL = int(os.environ.get("FUZZ_MODEL_CHECKPOINT_INTERVAL", 16))
+
+# ------------------------------------------------------------------
+#                           CAMPAIGN
+# ------------------------------------------------------------------
+# @dev every shard runs `max_examples` examples, shards are spread over the
+# pytest-xdist workers (`mox test tests/fuzz -n auto`), one per worker by default
+FUZZ_SHARDS = int(
+    os.environ.get("FUZZ_SHARDS", os.environ.get("PYTEST_XDIST_WORKER_COUNT", 1))
+)
+# @dev shared by all workers, a failure found by one shard is replayed by all
+FUZZ_DATABASE = DirectoryBasedExampleDatabase(
+    os.environ.get("FUZZ_DATABASE", ".hypothesis/fuzz")
+)
+
+settings.register_profile(
+    "fuzz-default",
+    max_examples=64,
+    stateful_step_count=64,
+    deadline=None,
+    database=FUZZ_DATABASE,
+)
+settings.register_profile(
+    "fuzz-campaign",
+    max_examples=6400,
+    stateful_step_count=64,
+    deadline=None,
+    database=FUZZ_DATABASE,
+)
+FUZZ_SETTINGS = settings.get_profile(
+    "fuzz-" + os.environ.get("FUZZ_PROFILE", "default")
+)
 
 
 class StableCoinFuzzer(RuleBasedStateMachine):
+    """
+    @dev Contracts are deployed once by `deploy`, every example then starts
+    from the same state: boa anchors each Hypothesis example and rolls the
+    chain back when it ends.
+
+    @dev Every engine call is mirrored on a `EngineModel`, reads and
+    invariants run against the model and the engine is only compared with it
+    every MODEL_CHECKPOINT_INTERVAL steps and at the end of each example.
+    """
+
     def __init__(self):
         super().__init__()
+        self.model = EngineModel(
+            [self.weth.address, self.wbtc.address], self.initial_prices
+        )
+        self.steps = 0
 
-    @initialize()
-    def setup(self):
+    @classmethod
+    def deploy(cls):
         print("Setup")
-        self.dsc = deploy_dsc()
-        self.dsce = deploy_dsc_engine(self.dsc)
+        cls.dsc = deploy_dsc()
+        cls.dsce = deploy_dsc_engine(cls.dsc)
 
         active_network: Network = get_active_network()
-        self.weth = active_network.manifest_named("weth")
-        self.wbtc = active_network.manifest_named("wbtc")
-        self.btc_usd = active_network.manifest_named("btc_usd_price_feed")
-        self.eth_usd = active_network.manifest_named("eth_usd_price_feed")
+        cls.weth = active_network.manifest_named("weth")
+        cls.wbtc = active_network.manifest_named("wbtc")
+        cls.btc_usd = active_network.manifest_named("btc_usd_price_feed")
+        cls.eth_usd = active_network.manifest_named("eth_usd_price_feed")
+        # @dev the session feeds themselves, another object registered at
+        # their address would make moccasin redeploy them for later tests
+        cls.price_feeds = {cls.weth.address: cls.eth_usd, cls.wbtc.address: cls.btc_usd}
+        for token, feed in cls.price_feeds.items():
+            assert cls.dsce.token_to_price_feed(token) == feed.address
+        cls.initial_prices = [
+            cls.price_feeds[token.address].latestAnswer()
+            for token in (cls.weth, cls.wbtc)
+        ]
 
-        self.users = [Address("0x" + ZERO_ADDRESS.hex())]
-        while Address("0x" + ZERO_ADDRESS.hex()) in self.users:
-            self.users = [boa.env.generate_address() for _ in range(USER_SIZE)]
+        cls.users = [Address("0x" + ZERO_ADDRESS.hex())]
+        while Address("0x" + ZERO_ADDRESS.hex()) in cls.users:
+            cls.users = [boa.env.generate_address() for _ in range(USER_SIZE)]
 
         # Set Liquidator balance of DSC and collateral
         with boa.env.prank(LIQUIDATOR):
-            self.weth.mint_amount(MAX_DEPOSIT_SIZE)
-            self.wbtc.mint_amount(MAX_DEPOSIT_SIZE)
+            cls.weth.mint_amount(MAX_DEPOSIT_SIZE)
+            cls.wbtc.mint_amount(MAX_DEPOSIT_SIZE)
         # with boa.env.prank(self.dsce.address):
-        #     self.dsc.mint(LIQUIDATOR, LIQUIDATOR_DSC_AMOUNT)
+        #     cls.dsc.mint(LIQUIDATOR, LIQUIDATOR_DSC_AMOUNT)
 
     @rule(
         collateral_seed=st.integers(min_value=0, max_value=1),
@@ -63,6 +129,7 @@ class StableCoinFuzzer(RuleBasedStateMachine):
             collateral.mint_amount(amount)
             collateral.approve(self.dsce, amount)
             self.dsce.deposit_collateral(collateral, amount)
+        self._mirror("deposit_collateral", user, collateral.address, amount)
 
     @rule(
         collateral_seed=st.integers(min_value=0, max_value=1),
@@ -73,12 +140,15 @@ class StableCoinFuzzer(RuleBasedStateMachine):
         print("Redeeming collateral...")
         user = self.users[user_seed]
         collateral = self._get_collateral_from_seed(collateral_seed)
-        max_redeemable = self.dsce.get_collateral_balance_of_user(user, collateral)
+        max_redeemable = self.model.get_collateral_balance_of_user(
+            user, collateral.address
+        )
         to_redeem = (max_redeemable * percentage) // 100
         assume(to_redeem > 0)
 
         with boa.env.prank(user):
             self.dsce.redeem_collateral(collateral, to_redeem)
+        self._mirror("redeem_collateral", user, collateral.address, to_redeem)
 
     @rule(
         collateral_seed=st.integers(min_value=0, max_value=1),
@@ -88,6 +158,7 @@ class StableCoinFuzzer(RuleBasedStateMachine):
     def mint_dsc(self, collateral_seed: int, user_seed: int, amount: int):
         print("Minting DSC...")
         user = self.users[user_seed]
+        self._mirror("mint_dsc", user, amount)
         with boa.env.prank(user):
             try:
                 self.dsce.mint_dsc(amount)
@@ -97,16 +168,16 @@ class StableCoinFuzzer(RuleBasedStateMachine):
                 ):
                     print("Minting DSC failed - health factor broken")
                     total_dsc_minted, total_value_collateral_usd = (
-                        self.dsce.get_account_information(user)
+                        self.model.get_account_information(user)
                     )
                     collateral = self._get_collateral_from_seed(collateral_seed)
                     collateral_user_deposited = (
-                        self.dsce.get_collateral_balance_of_user(
+                        self.model.get_collateral_balance_of_user(
                             user, collateral.address
                         )
                     )
-                    collateral_amount_in_usd = self.dsce.get_usd_value(
-                        self.weth, collateral_user_deposited
+                    collateral_amount_in_usd = self.model.get_usd_value(
+                        self.weth.address, collateral_user_deposited
                     )
 
                     assume(collateral_amount_in_usd > 0)
@@ -114,16 +185,17 @@ class StableCoinFuzzer(RuleBasedStateMachine):
                     health_factor_pre_mint = 0
                     while health_factor_pre_mint < int(1e18):
                         collateral_amount_in_usd *= 2
-                        health_factor_pre_mint = self.dsce.calculate_health_factor(
+                        health_factor_pre_mint = self.model.calculate_health_factor(
                             total_dsc_minted + amount,
                             total_value_collateral_usd + collateral_amount_in_usd,
                         )
-                    collateral_amount = self.dsce.get_token_amount_from_usd(
+                    collateral_amount = self.model.get_token_amount_from_usd(
                         collateral.address, collateral_amount_in_usd
                     )
 
                     self.mint_and_deposit(collateral_seed, user_seed, collateral_amount)
                     self.dsce.mint_dsc(amount)
+                    self._mirror("mint_dsc", user, amount)
 
     @rule(
         percentage_new_price=st.floats(min_value=0.85, max_value=1.15),
@@ -134,12 +206,12 @@ class StableCoinFuzzer(RuleBasedStateMachine):
     ):
         print("Updating collateral price...")
         collateral = self._get_collateral_from_seed(collateral_seed)
-        price_feed = MockV3Aggregator.at(
-            self.dsce.token_to_price_feed(collateral.address)
-        )
+        price_feed = self.price_feeds[collateral.address]
         current_price = price_feed.latestAnswer()
-        new_price = int(current_price * percentage_new_price)
+        # @dev oracle_lib rejects answers <= 0, a real feed never reports them
+        new_price = max(int(current_price * percentage_new_price), 1)
         price_feed.updateAnswer(new_price)
+        self.model.set_price(collateral.address, new_price)
 
         # @dev workshop own solution fails
 
@@ -189,24 +261,18 @@ class StableCoinFuzzer(RuleBasedStateMachine):
     @invariant()
     def liquidate(self):
         for user in self.users:
-            if self.dsce.get_health_factor(user) < int(1e18):
+            for collateral in (self.weth, self.wbtc):
+                # @dev the largest liquidation the engine takes, it must not revert
+                debt_to_cover = self.model.max_liquidatable(user, collateral.address)
+                if debt_to_cover == 0:
+                    continue
                 print("Liquidating...")
-                total_dsc_minted, total_value_collateral_usd = (
-                    self.dsce.get_account_information(user)
-                )
-                debt_to_cover = total_dsc_minted - total_value_collateral_usd
-                assume(debt_to_cover > 0)
-                token_amount = self.dsce.get_token_amount_from_usd(
-                    self.weth.address, debt_to_cover
-                )
-
-                if token_amount == 0:
-                    token_amount = 1
-
+                self._fund_liquidator(debt_to_cover)
                 with boa.env.prank(LIQUIDATOR):
-                    # collateral_seed: int, user_seed: int, amount: int
-                    self.mint_and_deposit(0, 0, token_amount, user=user)
-                    self.dsce.liquidate(self.weth.address, user, debt_to_cover)
+                    self.dsce.liquidate(collateral, user, debt_to_cover)
+                self.model.liquidate(
+                    LIQUIDATOR, collateral.address, user, debt_to_cover
+                )
 
     # invariant: Protocol must have more value in collateral than total supply
     # Price feed changes?
@@ -214,14 +280,66 @@ class StableCoinFuzzer(RuleBasedStateMachine):
     @invariant()
     def protocol_must_have_more_value_in_collateral_than_total_supply(self):
         print("Checking protocol value...")
-        total_supply = self.dsc.totalSupply()
-        weth_deposited = self.weth.balanceOf(self.dsce)
-        wbtc_deposited = self.wbtc.balanceOf(self.dsce)
+        # @dev from the running totals, O(tokens) whatever the number of users
+        assert self.model.get_collateralization_ratio() >= PRECISION
+
+    @invariant()
+    def model_matches_engine(self):
+        self.steps += 1
+        if self.steps % MODEL_CHECKPOINT_INTERVAL == 0:
+            self._assert_model_matches_engine()
 
-        weth_value = self.dsce.get_usd_value(self.weth, weth_deposited)
-        wbtc_value = self.dsce.get_usd_value(self.wbtc, wbtc_deposited)
+    def teardown(self):
+        self._assert_model_matches_engine()
 
-        assert weth_value + wbtc_value >= total_supply
+    def _fund_liquidator(self, amount: int):
+        """Mints `amount` DSC to LIQUIDATOR, backed by weth at a health factor of 2."""
+        dsc_minted, collateral_value = self.model.get_account_information(LIQUIDATOR)
+        missing_usd = max(4 * (dsc_minted + amount) - collateral_value, 0)
+        deposit = (
+            self.model.get_token_amount_from_usd(self.weth.address, missing_usd) + 1
+        )
+        with boa.env.prank(LIQUIDATOR):
+            self.weth.mint_amount(deposit)
+            self.weth.approve(self.dsce, deposit)
+            self.dsce.deposit_and_mint(self.weth, deposit, amount)
+            self.dsc.approve(self.dsce, amount)
+        self.model.deposit_and_mint(LIQUIDATOR, self.weth.address, deposit, amount)
+
+    def _mirror(self, fn_name: str, sender: str, *args):
+        """Replay an engine call on the model, a revert leaves it untouched."""
+        try:
+            getattr(self.model, fn_name)(sender, *args)
+        except EngineRevert:
+            pass
+
+    def _assert_model_matches_engine(self):
+        for user in [*self.users, LIQUIDATOR]:
+            assert self.model.user_to_dsc_minted(user) == self.dsce.user_to_dsc_minted(
+                user
+            )
+            for token in (self.weth, self.wbtc):
+                assert self.model.get_collateral_balance_of_user(
+                    user, token.address
+                ) == self.dsce.get_collateral_balance_of_user(user, token)
+                assert self.model.max_liquidatable(
+                    user, token.address
+                ) == self.dsce.max_liquidatable(user, token)
+        assert self.model.collateral_held == [
+            self.weth.balanceOf(self.dsce),
+            self.wbtc.balanceOf(self.dsce),
+        ]
+        assert self.model.dsc_total_supply == self.dsc.totalSupply()
+        # @dev the engine counters agree with the token balances they summarize
+        assert self.dsce.total_dsc_minted() == self.model.total_dsc_minted()
+        for token in (self.weth, self.wbtc):
+            assert self.dsce.get_total_collateral(
+                token
+            ) == self.model.get_total_collateral(token.address)
+        assert (
+            self.dsce.get_collateralization_ratio()
+            == self.model.get_collateralization_ratio()
+        )
 
     def _get_collateral_from_seed(self, seed):
         if seed == 0:
@@ -230,5 +348,11 @@ class StableCoinFuzzer(RuleBasedStateMachine):
             return self.wbtc
 
 
-stablecoin_fuzzer = StableCoinFuzzer.TestCase
-stablecoin_fuzzer.settings = settings(max_examples=64, stateful_step_count=64)
+@pytest.fixture(scope="function")
+def fuzz_deployment(checkpoints):
+    checkpoints.step("fuzz_deployment", StableCoinFuzzer.deploy)
+
+
+@pytest.mark.parametrize("shard", range(FUZZ_SHARDS))
+def test_stablecoin_fuzzer(fuzz_deployment, shard):
+    run_state_machine_as_test(StableCoinFuzzer, settings=FUZZ_SETTINGS)
@@ -0,0 +1,76 @@
+import json
+import os
+from contextlib import nullcontext
+from pathlib import Path
+
+import boa
+import pytest
+
+from keeper.gas_profile import GasProfile, gas_profiling
+
+GAS_BASELINE_PATH = Path(__file__).parent / "gas_baseline.json"
+# @dev allowed increase over the baseline, in percent
+GAS_REGRESSION_THRESHOLD = float(os.environ.get("GAS_REGRESSION_THRESHOLD", "1"))
+UPDATE_GAS_BASELINE = os.environ.get("UPDATE_GAS_BASELINE") == "1"
+# @dev when set, the folded stacks of every measured call are written there
+GAS_PROFILE_DIR = os.environ.get("GAS_PROFILE_DIR")
+
+
+class GasTracker:
+    def __init__(self, baseline: dict[str, int]):
+        self.baseline = baseline
+        self.measured: dict[str, int] = {}
+
+    def measure(self, name: str, contract, fn_name: str, *args, sender) -> int:
+        """Run `contract.fn_name(*args)` as its own transaction and check its gas."""
+        _reset_access_lists()
+        with gas_profiling() if GAS_PROFILE_DIR else nullcontext():
+            with boa.env.prank(sender):
+                getattr(contract, fn_name)(*args)
+        gas_used = contract._computation.get_gas_used()
+        if GAS_PROFILE_DIR:
+            profile_dir = Path(GAS_PROFILE_DIR)
+            profile_dir.mkdir(parents=True, exist_ok=True)
+            GasProfile.of(contract._computation).write_folded(
+                profile_dir / f"{name}.folded"
+            )
+        self.measured[name] = gas_used
+        self._check(name, gas_used)
+        return gas_used
+
+    def _check(self, name: str, gas_used: int):
+        if UPDATE_GAS_BASELINE:
+            return
+        assert name in self.baseline, (
+            f"no gas baseline for {name}, run with UPDATE_GAS_BASELINE=1"
+        )
+        allowed = self.baseline[name] * (1 + GAS_REGRESSION_THRESHOLD / 100)
+        assert gas_used <= allowed, (
+            f"{name}: {gas_used} gas, baseline {self.baseline[name]} "
+            f"(+{GAS_REGRESSION_THRESHOLD}% allowed)"
+        )
+
+
+def _reset_access_lists():
+    """
+    @dev Cold accounts and slots, as for a fresh transaction. Unlike
+        `boa.env._reset_access_counters`, the journaled clear is undone by
+        `boa.env.anchor`, so test isolation keeps working.
+    """
+    boa.env.evm.vm.state._account_db._journal_accessed_state.clear()
+
+
+# @dev module scoped, boa anchors a session fixture even in modules using
+# checkpoints, see Checkpoints in tests/conftest.py
+@pytest.fixture(scope="module")
+def gas_tracker() -> GasTracker:
+    baseline = {}
+    if GAS_BASELINE_PATH.exists():
+        baseline = json.loads(GAS_BASELINE_PATH.read_text())
+    tracker = GasTracker(baseline)
+    yield tracker
+    if UPDATE_GAS_BASELINE:
+        GAS_BASELINE_PATH.write_text(
+            json.dumps({**baseline, **tracker.measured}, indent=2, sort_keys=True)
+            + "\n"
+        )
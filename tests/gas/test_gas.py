@@ -0,0 +1,473 @@
+import boa
+import pytest
+from eth_account import Account
+from eth_account.signers.local import LocalAccount
+from eth_utils import keccak
+
+from keeper.permit import sign_permit
+from tests.constants import (
+    COLLATERAL_AMOUNT,
+    DEBT_TO_COVER_SUCCESS,
+    LIQUIDATION_COLLATERAL,
+    LIQUIDATION_MINT,
+    MINT_AMOUNT,
+    PRICE_FEED_VALUE_WITH_IMPROVEMENT,
+    REDEEM_AMOUNT,
+)
+
+MAX_APPROVAL = 2**256 - 1
+PERMIT_VALIDITY = 3600
+
+# @dev every test builds on checkpoints, so does the module scoped gas_tracker
+pytestmark = pytest.mark.ignore_isolation
+
+
+@pytest.fixture(scope="function")
+def new_user(dsce, dsc, weth, wbtc):
+    """Factory of users holding collateral, with every allowance of the engine set."""
+
+    def _new_user(alias: str) -> str:
+        user = boa.env.generate_address(alias)
+        with boa.env.prank(user):
+            weth.mint_amount(COLLATERAL_AMOUNT * 10)
+            wbtc.mint_amount(COLLATERAL_AMOUNT * 10)
+            weth.approve(dsce, MAX_APPROVAL)
+            wbtc.approve(dsce, MAX_APPROVAL)
+            dsc.approve(dsce, MAX_APPROVAL)
+        return user
+
+    return _new_user
+
+
+@pytest.fixture(scope="function")
+def new_permit_user(weth, wbtc):
+    """Factory of users with a known key, to sign permits, and no allowance set."""
+
+    def _new_permit_user(alias: str) -> LocalAccount:
+        account = Account.from_key(keccak(text=alias))
+        with boa.env.prank(account.address):
+            weth.mint_amount(COLLATERAL_AMOUNT * 10)
+            wbtc.mint_amount(COLLATERAL_AMOUNT * 10)
+        return account
+
+    return _new_permit_user
+
+
+@pytest.fixture(scope="function")
+def one_collateral_user(new_user, dsce, weth) -> str:
+    user = new_user("one_collateral_user")
+    with boa.env.prank(user):
+        dsce.deposit_and_mint(weth, COLLATERAL_AMOUNT, MINT_AMOUNT)
+    return user
+
+
+@pytest.fixture(scope="function")
+def two_collaterals_user(new_user, dsce, weth, wbtc) -> str:
+    user = new_user("two_collaterals_user")
+    with boa.env.prank(user):
+        dsce.deposit_many_and_mint(
+            [(weth.address, COLLATERAL_AMOUNT), (wbtc.address, COLLATERAL_AMOUNT)],
+            MINT_AMOUNT,
+        )
+    return user
+
+
+# ------------------------------------------------------------------
+#                          DEPOSIT & MINT
+# ------------------------------------------------------------------
+def test_gas_deposit(gas_tracker, new_user, one_collateral_user, dsce, weth, wbtc):
+    cold_user = new_user("cold_user")
+    gas_tracker.measure(
+        "dsce.deposit_collateral[cold_user]",
+        dsce,
+        "deposit_collateral",
+        weth,
+        COLLATERAL_AMOUNT,
+        sender=cold_user,
+    )
+    gas_tracker.measure(
+        "dsce.deposit_collateral[warm_user]",
+        dsce,
+        "deposit_collateral",
+        weth,
+        COLLATERAL_AMOUNT,
+        sender=one_collateral_user,
+    )
+    gas_tracker.measure(
+        "dsce.deposit_collateral[second_collateral]",
+        dsce,
+        "deposit_collateral",
+        wbtc,
+        COLLATERAL_AMOUNT,
+        sender=one_collateral_user,
+    )
+
+
+def test_gas_deposit_and_mint(gas_tracker, new_user, one_collateral_user, dsce, weth, wbtc):
+    gas_tracker.measure(
+        "dsce.deposit_and_mint[cold_user]",
+        dsce,
+        "deposit_and_mint",
+        weth,
+        COLLATERAL_AMOUNT,
+        MINT_AMOUNT,
+        sender=new_user("cold_user"),
+    )
+    gas_tracker.measure(
+        "dsce.deposit_and_mint[warm_user]",
+        dsce,
+        "deposit_and_mint",
+        wbtc,
+        COLLATERAL_AMOUNT,
+        MINT_AMOUNT,
+        sender=one_collateral_user,
+    )
+    gas_tracker.measure(
+        "dsce.deposit_many_and_mint[one_collateral]",
+        dsce,
+        "deposit_many_and_mint",
+        [(weth.address, COLLATERAL_AMOUNT)],
+        MINT_AMOUNT,
+        sender=new_user("cold_user_one_collateral"),
+    )
+    gas_tracker.measure(
+        "dsce.deposit_many_and_mint[two_collaterals]",
+        dsce,
+        "deposit_many_and_mint",
+        [(weth.address, COLLATERAL_AMOUNT), (wbtc.address, COLLATERAL_AMOUNT)],
+        MINT_AMOUNT,
+        sender=new_user("cold_user_two_collaterals"),
+    )
+
+
+def test_gas_mint_dsc(gas_tracker, one_collateral_user, two_collaterals_user, dsce):
+    gas_tracker.measure(
+        "dsce.mint_dsc[one_collateral]",
+        dsce,
+        "mint_dsc",
+        MINT_AMOUNT,
+        sender=one_collateral_user,
+    )
+    gas_tracker.measure(
+        "dsce.mint_dsc[two_collaterals]",
+        dsce,
+        "mint_dsc",
+        MINT_AMOUNT,
+        sender=two_collaterals_user,
+    )
+
+
+# ------------------------------------------------------------------
+#                          REDEEM & BURN
+# ------------------------------------------------------------------
+def test_gas_redeem(gas_tracker, one_collateral_user, two_collaterals_user, dsce, weth):
+    for scenario, user in (
+        ("one_collateral", one_collateral_user),
+        ("two_collaterals", two_collaterals_user),
+    ):
+        gas_tracker.measure(
+            f"dsce.redeem_collateral[{scenario}]",
+            dsce,
+            "redeem_collateral",
+            weth,
+            LIQUIDATION_COLLATERAL,
+            sender=user,
+        )
+        gas_tracker.measure(
+            f"dsce.redeem_for_dsc[{scenario}]",
+            dsce,
+            "redeem_for_dsc",
+            weth,
+            LIQUIDATION_COLLATERAL,
+            LIQUIDATION_MINT,
+            sender=user,
+        )
+        gas_tracker.measure(
+            f"dsce.burn_dsc[{scenario}]",
+            dsce,
+            "burn_dsc",
+            LIQUIDATION_MINT,
+            sender=user,
+        )
+
+
+def test_gas_redeem_without_debt(gas_tracker, new_user, dsce, weth):
+    user = new_user("no_debt_user")
+    with boa.env.prank(user):
+        dsce.deposit_collateral(weth, COLLATERAL_AMOUNT)
+    gas_tracker.measure(
+        "dsce.redeem_collateral[no_debt]",
+        dsce,
+        "redeem_collateral",
+        weth,
+        REDEEM_AMOUNT,
+        sender=user,
+    )
+
+
+# ------------------------------------------------------------------
+#                           LIQUIDATION
+# ------------------------------------------------------------------
+def test_gas_liquidate(
+    gas_tracker, new_user, two_collaterals_user, dsce, weth, wbtc, eth_usd, btc_usd
+):
+    underwater_users = []
+    for i in range(3):
+        user = new_user(f"underwater_user_{i}")
+        with boa.env.prank(user):
+            dsce.deposit_many_and_mint(
+                [
+                    (weth.address, LIQUIDATION_COLLATERAL),
+                    (wbtc.address, LIQUIDATION_COLLATERAL),
+                ],
+                LIQUIDATION_MINT * 2,
+            )
+        underwater_users.append(user)
+    eth_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+    btc_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+
+    gas_tracker.measure(
+        "dsce.liquidate[bonus]",
+        dsce,
+        "liquidate",
+        weth,
+        underwater_users[0],
+        DEBT_TO_COVER_SUCCESS,
+        sender=two_collaterals_user,
+    )
+    gas_tracker.measure(
+        "dsce.liquidate_many[two_users]",
+        dsce,
+        "liquidate_many",
+        [
+            (underwater_users[1], weth.address, DEBT_TO_COVER_SUCCESS),
+            (underwater_users[2], wbtc.address, DEBT_TO_COVER_SUCCESS),
+        ],
+        sender=two_collaterals_user,
+    )
+
+
+def test_gas_flash_liquidate(
+    gas_tracker,
+    flash_liquidator,
+    swap_router,
+    new_user,
+    two_collaterals_user,
+    dsce,
+    dsc,
+    weth,
+    wbtc,
+    eth_usd,
+    btc_usd,
+):
+    underwater_users = []
+    for i in range(2):
+        user = new_user(f"flash_underwater_user_{i}")
+        with boa.env.prank(user):
+            dsce.deposit_many_and_mint(
+                [
+                    (weth.address, LIQUIDATION_COLLATERAL),
+                    (wbtc.address, LIQUIDATION_COLLATERAL),
+                ],
+                LIQUIDATION_MINT * 2,
+            )
+        underwater_users.append(user)
+    with boa.env.prank(two_collaterals_user):
+        dsc.transfer(swap_router, MINT_AMOUNT)
+    eth_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+    btc_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+
+    gas_tracker.measure(
+        "flash_liquidator.liquidate[two_users]",
+        flash_liquidator,
+        "liquidate",
+        [
+            (underwater_users[0], weth.address, DEBT_TO_COVER_SUCCESS),
+            (underwater_users[1], wbtc.address, DEBT_TO_COVER_SUCCESS),
+        ],
+        swap_router,
+        0,
+        0,
+        sender=flash_liquidator.owner(),
+    )
+
+
+# ------------------------------------------------------------------
+#                              VIEWS
+# ------------------------------------------------------------------
+def test_gas_views(gas_tracker, new_user, two_collaterals_user, dsce, weth):
+    for scenario, user in (
+        ("empty_user", new_user("empty_user")),
+        ("two_collaterals", two_collaterals_user),
+    ):
+        gas_tracker.measure(
+            f"dsce.get_health_factor[{scenario}]",
+            dsce,
+            "get_health_factor",
+            user,
+            sender=user,
+        )
+        gas_tracker.measure(
+            f"dsce.get_account_information[{scenario}]",
+            dsce,
+            "get_account_information",
+            user,
+            sender=user,
+        )
+    gas_tracker.measure(
+        "dsce.get_collateral_balance_of_user",
+        dsce,
+        "get_collateral_balance_of_user",
+        two_collaterals_user,
+        weth,
+        sender=two_collaterals_user,
+    )
+    gas_tracker.measure(
+        "dsce.get_usd_value", dsce, "get_usd_value", weth, REDEEM_AMOUNT, sender=weth.address
+    )
+
+
+# ------------------------------------------------------------------
+#                               DSC
+# ------------------------------------------------------------------
+def test_gas_dsc(gas_tracker, new_user, two_collaterals_user, dsc, dsce):
+    receiver = new_user("dsc_receiver")
+    gas_tracker.measure(
+        "dsc.mint[cold_user]", dsc, "mint", receiver, MINT_AMOUNT, sender=dsce.address
+    )
+    gas_tracker.measure(
+        "dsc.mint[warm_user]", dsc, "mint", receiver, MINT_AMOUNT, sender=dsce.address
+    )
+    gas_tracker.measure(
+        "dsc.transfer[cold_receiver]",
+        dsc,
+        "transfer",
+        new_user("dsc_cold_receiver"),
+        LIQUIDATION_MINT,
+        sender=two_collaterals_user,
+    )
+    gas_tracker.measure(
+        "dsc.transfer[warm_receiver]",
+        dsc,
+        "transfer",
+        receiver,
+        LIQUIDATION_MINT,
+        sender=two_collaterals_user,
+    )
+    gas_tracker.measure(
+        "dsc.approve",
+        dsc,
+        "approve",
+        dsce.address,
+        MINT_AMOUNT,
+        sender=receiver,
+    )
+    gas_tracker.measure(
+        "dsc.burn_from",
+        dsc,
+        "burn_from",
+        receiver,
+        LIQUIDATION_MINT,
+        sender=dsce.address,
+    )
+
+
+# ------------------------------------------------------------------
+#                              PERMIT
+# ------------------------------------------------------------------
+def _deadline() -> int:
+    return boa.env.evm.patch.timestamp + PERMIT_VALIDITY
+
+
+def test_gas_deposit_with_permit(gas_tracker, dsce, weth, new_permit_user):
+    user = new_permit_user("deposit_permit_user")
+    # @dev the warm user already holds a position and signed a permit before
+    for scenario in ("cold_user", "warm_user"):
+        gas_tracker.measure(
+            f"dsce.deposit_collateral_with_permit[{scenario}]",
+            dsce,
+            "deposit_collateral_with_permit",
+            weth,
+            COLLATERAL_AMOUNT,
+            sign_permit(weth, user, dsce.address, COLLATERAL_AMOUNT, _deadline()),
+            sender=user.address,
+        )
+
+
+def test_gas_deposit_and_mint_with_permit(gas_tracker, dsce, weth, new_permit_user):
+    user = new_permit_user("deposit_and_mint_permit_user")
+    for scenario in ("cold_user", "warm_user"):
+        gas_tracker.measure(
+            f"dsce.deposit_and_mint_with_permit[{scenario}]",
+            dsce,
+            "deposit_and_mint_with_permit",
+            weth,
+            COLLATERAL_AMOUNT,
+            MINT_AMOUNT,
+            sign_permit(weth, user, dsce.address, COLLATERAL_AMOUNT, _deadline()),
+            sender=user.address,
+        )
+
+
+def test_gas_redeem_with_permit(gas_tracker, dsce, dsc, weth, new_permit_user):
+    user = new_permit_user("one_collateral_permit_user")
+    with boa.env.prank(user.address):
+        dsce.deposit_and_mint_with_permit(
+            weth,
+            COLLATERAL_AMOUNT,
+            MINT_AMOUNT,
+            sign_permit(weth, user, dsce.address, COLLATERAL_AMOUNT, _deadline()),
+        )
+    gas_tracker.measure(
+        "dsce.redeem_for_dsc_with_permit[one_collateral]",
+        dsce,
+        "redeem_for_dsc_with_permit",
+        weth,
+        LIQUIDATION_COLLATERAL,
+        LIQUIDATION_MINT,
+        sign_permit(dsc, user, dsce.address, LIQUIDATION_MINT, _deadline()),
+        sender=user.address,
+    )
+    gas_tracker.measure(
+        "dsce.burn_dsc_with_permit[one_collateral]",
+        dsce,
+        "burn_dsc_with_permit",
+        LIQUIDATION_MINT,
+        sign_permit(dsc, user, dsce.address, LIQUIDATION_MINT, _deadline()),
+        sender=user.address,
+    )
+
+
+def test_gas_liquidate_with_permit(
+    gas_tracker, new_user, new_permit_user, dsce, dsc, weth, wbtc, eth_usd, btc_usd
+):
+    underwater_user = new_user("permit_underwater_user")
+    with boa.env.prank(underwater_user):
+        dsce.deposit_many_and_mint(
+            [
+                (weth.address, LIQUIDATION_COLLATERAL),
+                (wbtc.address, LIQUIDATION_COLLATERAL),
+            ],
+            LIQUIDATION_MINT * 2,
+        )
+    liquidator = new_permit_user("permit_liquidator")
+    with boa.env.prank(liquidator.address):
+        weth.approve(dsce, COLLATERAL_AMOUNT)
+        wbtc.approve(dsce, COLLATERAL_AMOUNT)
+        dsce.deposit_many_and_mint(
+            [(weth.address, COLLATERAL_AMOUNT), (wbtc.address, COLLATERAL_AMOUNT)],
+            MINT_AMOUNT,
+        )
+    eth_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+    btc_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+
+    gas_tracker.measure(
+        "dsce.liquidate_with_permit[bonus]",
+        dsce,
+        "liquidate_with_permit",
+        weth,
+        underwater_user,
+        DEBT_TO_COVER_SUCCESS,
+        sign_permit(dsc, liquidator, dsce.address, DEBT_TO_COVER_SUCCESS, _deadline()),
+        sender=liquidator.address,
+    )
@@ -0,0 +1,30 @@
+import boa
+
+from tests.constants import COLLATERAL_AMOUNT
+
+
+def test_checkpoints_restore_saved_state_without_rebuilding(checkpoints, weth):
+    # Arrange
+    user = boa.env.generate_address("checkpoint_user")
+    builds = []
+
+    def _mint() -> str:
+        builds.append(user)
+        with boa.env.prank(user):
+            weth.mint_amount(COLLATERAL_AMOUNT)
+        return user
+
+    checkpoints.step("checkpoint_user", _mint)
+    with boa.env.prank(user):
+        weth.mint_amount(COLLATERAL_AMOUNT)
+
+    # Act
+    checkpoints.rewind(["checkpoint_user"])
+    restored_user = checkpoints.step("checkpoint_user", _mint)
+
+    # Assert
+    assert restored_user == user
+    assert builds == [user]
+    assert weth.balanceOf(user) == COLLATERAL_AMOUNT
+    checkpoints.rewind()
+    assert weth.balanceOf(user) == 0
@@ -0,0 +1,57 @@
+import boa
+
+from script.artifacts import load_deployer, source_key
+from script.deploy_dsc import FLASH_MINT_CEILING
+from script.deploy_stack import deploy_stack, predict_stack_addresses
+
+
+def test_deploy_stack_wires_dsc_and_engine_at_predicted_addresses(
+    weth, wbtc, eth_usd, btc_usd
+):
+    # Arrange
+    deployer = boa.env.generate_address("stack_deployer")
+
+    # Act
+    with boa.env.prank(deployer):
+        stack = deploy_stack()
+
+    # Assert
+    tokens = [weth.address, wbtc.address]
+    assert (stack.dsc.address, stack.dsce.address) == predict_stack_addresses(
+        stack.factory.address, deployer, tokens, [eth_usd.address, btc_usd.address]
+    )
+    assert stack.dsc.owner() == stack.dsce.address
+    assert stack.dsc.is_minter(stack.dsce.address)
+    assert stack.dsc.FLASH_MINT_CEILING() == FLASH_MINT_CEILING
+    assert stack.dsce.DSC() == stack.dsc.address
+    assert stack.dsce.get_collateral_tokens() == tokens
+    assert stack.dsce.token_to_price_feed(weth) == eth_usd.address
+
+
+def test_source_key_follows_imported_sources_only(tmp_path):
+    # Arrange
+    contract = tmp_path / "contract.vy"
+    contract.write_text("import library\nfrom interfaces import i_thing\n")
+    (tmp_path / "library.vy").write_text("X: constant(uint256) = 1\n")
+    (tmp_path / "interfaces").mkdir()
+    (tmp_path / "interfaces" / "i_thing.vyi").write_text("")
+    (tmp_path / "unrelated.vy").write_text("")
+    key = source_key(contract)
+
+    # Act/Assert
+    (tmp_path / "unrelated.vy").write_text("Y: constant(uint256) = 2\n")
+    assert source_key(contract) == key
+    (tmp_path / "interfaces" / "i_thing.vyi").write_text("# changed\n")
+    assert source_key(contract) != key
+
+
+def test_cached_artifact_matches_boa_compilation():
+    # Arrange/Act
+    cached = load_deployer("src/dsc_engine.vy")
+    compiled = boa.load_partial("src/dsc_engine.vy")
+
+    # Assert
+    for output in ("bytecode", "bytecode_runtime", "storage_layout"):
+        assert getattr(cached.compiler_data, output) == getattr(
+            compiled.compiler_data, output
+        )
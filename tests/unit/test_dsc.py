@@ -1,4 +1,7 @@
-from tests.constants import NAME, SYMBOL
+import boa
+
+from script.deploy_dsc import FLASH_MINT_CEILING, deploy_dsc
+from tests.constants import MINT_AMOUNT, NAME, SYMBOL
 
 
 def test_init_dsc(dsc, default_account):
@@ -7,3 +10,35 @@ def test_init_dsc(dsc, default_account):
     assert dsc.NAME() == NAME
     assert dsc.SYMBOL() == SYMBOL
     assert dsc.is_minter(default_account.address)
+
+
+def test_flash_mint_is_free_up_to_the_ceiling(dsc, weth):
+    # Arrange/Act/Assert
+    assert dsc.FLASH_MINT_CEILING() == FLASH_MINT_CEILING
+    assert dsc.flashFee(dsc, MINT_AMOUNT) == 0
+    assert dsc.maxFlashLoan(dsc) == FLASH_MINT_CEILING
+    assert dsc.maxFlashLoan(weth) == 0
+    with boa.reverts(dsc.DSC_FLASH_LOAN_EXCEEDS_CEILING()):
+        dsc.flashLoan(weth, dsc, FLASH_MINT_CEILING + 1, b"")
+    with boa.reverts(dsc.DSC_UNSUPPORTED_FLASH_LOAN_TOKEN()):
+        dsc.flashFee(weth, MINT_AMOUNT)
+    with boa.reverts(dsc.DSC_UNSUPPORTED_FLASH_LOAN_TOKEN()):
+        dsc.flashLoan(weth, weth, MINT_AMOUNT, b"")
+
+
+def test_flash_mint_ceiling_of_zero_disables_flash_mints(weth):
+    # Arrange
+    dsc = deploy_dsc(0)
+
+    # Act/Assert
+    assert dsc.maxFlashLoan(dsc) == 0
+    with boa.reverts(dsc.DSC_FLASH_LOAN_EXCEEDS_CEILING()):
+        dsc.flashLoan(weth, dsc, 1, b"")
+
+
+def test_flash_loan_reverts_if_receiver_cannot_take_it(dsc, weth):
+    # Act/Assert
+    # @dev no onFlashLoan at all
+    with boa.reverts():
+        dsc.flashLoan(weth, dsc, MINT_AMOUNT, b"")
+    assert dsc.totalSupply() == 0
@@ -1,15 +1,21 @@
 import boa
 import pytest
 
-from eth.codecs.abi.exceptions import EncodeError
-from src import dsc_engine
+from keeper import engine_math
+from keeper.permit import sign_permit
+from script.artifacts import load_deployer
+from script.mocks.deploy_collateral import deploy_collateral
+from script.mocks.deploy_price_feed import deploy_price_feed
 from tests.constants import (
     BURN_DSC_AMOUNT,
     COLLATERAL_AMOUNT,
     DEBT_TO_COVER_BREAKS_HEALTH_FACTOR,
     DEBT_TO_COVER_NO_IMPROVEMENT,
     DEBT_TO_COVER_SUCCESS,
+    LIQUIDATION_COLLATERAL,
+    LIQUIDATION_MINT,
     MINT_AMOUNT,
+    ORACLE_TIMEOUT,
     PRICE_FEED_UNDER_VALUE_PRICE,
     PRICE_FEED_VALUE_NO_IMPROVEMENT,
     PRICE_FEED_VALUE_WITH_IMPROVEMENT,
@@ -22,10 +28,10 @@ from tests.constants import (
 #                            DSCE INIT
 # ------------------------------------------------------------------
 def test_reverts_if_token_lengths_differ(dsc, eth_usd, btc_usd, weth, wbtc):
-    with pytest.raises(EncodeError):
-        dsc_engine.deploy(
+    with boa.reverts("dsce_engine: tokens and feeds length mismatch"):
+        load_deployer("src/dsc_engine.vy").deploy(
             [weth.address, wbtc.address, weth.address],
-            [eth_usd.address, btc_usd.address, eth_usd.address],
+            [eth_usd.address, btc_usd.address],
             dsc.address,
         )
 
@@ -36,6 +42,7 @@ def test_init_dsce(dsce, dsc, weth, wbtc, eth_usd, btc_usd):
     assert dsc.owner() == dsce.address
     assert dsce.COLLATERAL_TOKENS(0) == weth.address
     assert dsce.COLLATERAL_TOKENS(1) == wbtc.address
+    assert dsce.get_collateral_tokens() == [weth.address, wbtc.address]
     assert dsce.token_to_price_feed(weth.address) == eth_usd.address
     assert dsce.token_to_price_feed(wbtc.address) == btc_usd.address
     assert dsc.is_minter(dsce.address)
@@ -86,6 +93,96 @@ def test_deposit_collateral_success(some_user, weth, dsce):
     assert log_deposit_amount == COLLATERAL_AMOUNT
 
 
+def test_deposit_collateral_keeps_tokens_in_separate_lanes(some_user, weth, wbtc, dsce):
+    # Arrange
+    with boa.env.prank(some_user):
+        weth.approve(dsce, COLLATERAL_AMOUNT)
+        wbtc.approve(dsce, COLLATERAL_AMOUNT)
+        # Act
+        dsce.deposit_collateral(weth, COLLATERAL_AMOUNT)
+        dsce.deposit_collateral(wbtc, REDEEM_AMOUNT)
+        dsce.redeem_collateral(weth, REDEEM_AMOUNT)
+
+    # Assert
+    assert (
+        dsce.get_collateral_balance_of_user(some_user, weth)
+        == COLLATERAL_AMOUNT - REDEEM_AMOUNT
+    )
+    assert dsce.get_collateral_balance_of_user(some_user, wbtc) == REDEEM_AMOUNT
+    assert dsce.get_collateral_balance_of_user(some_user, RANDOM_TOKEN_ADDRESS) == 0
+
+
+def test_deposit_and_redeem_keep_held_bitmap_in_sync(some_user, weth, wbtc, dsce):
+    # Arrange
+    with boa.env.prank(some_user):
+        weth.approve(dsce, COLLATERAL_AMOUNT)
+        wbtc.approve(dsce, COLLATERAL_AMOUNT)
+        # Act/Assert
+        dsce.deposit_collateral(wbtc, COLLATERAL_AMOUNT)
+        assert dsce.get_held_collateral(some_user) == 0b10
+        dsce.deposit_collateral(weth, COLLATERAL_AMOUNT)
+        assert dsce.get_held_collateral(some_user) == 0b11
+        dsce.redeem_collateral(wbtc, COLLATERAL_AMOUNT)
+        assert dsce.get_held_collateral(some_user) == 0b01
+
+
+def test_health_check_only_prices_held_collateral(some_user, dsc, weth, wbtc):
+    # Arrange
+    # @dev a fresh deployer keeps these addresses out of the fixture chain ones
+    with boa.env.prank(boa.env.generate_address("third_collateral_deployer")):
+        feeds = [deploy_price_feed() for _ in range(3)]
+        third_token = deploy_collateral()
+        engine = load_deployer("src/dsc_engine.vy").deploy(
+            [weth.address, wbtc.address, third_token.address],
+            [feed.address for feed in feeds],
+            dsc.address,
+        )
+    dsc.set_minter(engine.address, True)
+    with boa.env.prank(some_user):
+        third_token.mock_mint()
+        third_token.approve(engine, COLLATERAL_AMOUNT)
+        # Act
+        engine.deposit_and_mint(third_token, COLLATERAL_AMOUNT, MINT_AMOUNT)
+
+    # Assert
+    trace = engine.call_trace()
+    assert _count_calls_to(trace, {feed.address for feed in feeds}) == 1
+    assert _count_calls_to(trace, {feeds[2].address}) == 1
+    assert engine.get_held_collateral(some_user) == 0b100
+    assert engine.get_account_information(some_user) == (
+        MINT_AMOUNT,
+        engine.get_usd_value(third_token, COLLATERAL_AMOUNT),
+    )
+
+
+def test_redeem_without_debt_reads_no_price_feed(
+    some_user, weth, dsce, eth_usd, btc_usd
+):
+    # Arrange
+    with boa.env.prank(some_user):
+        weth.approve(dsce, COLLATERAL_AMOUNT)
+        dsce.deposit_collateral(weth, COLLATERAL_AMOUNT)
+        # Act
+        dsce.redeem_collateral(weth, REDEEM_AMOUNT)
+
+    # Assert
+    feeds = {eth_usd.address, btc_usd.address}
+    assert _count_calls_to(dsce.call_trace(), feeds) == 0
+    assert dsce.get_health_factor(some_user) == 2**256 - 1
+    assert _count_calls_to(dsce.call_trace(), feeds) == 0
+
+
+def test_deposit_collateral_reverts_if_lane_overflows(some_user, weth, dsce):
+    # Arrange
+    amount = 2**112
+    with boa.env.prank(some_user):
+        weth.mint_amount(amount)
+        weth.approve(dsce, amount)
+        # Act/Assert
+        with boa.reverts():
+            dsce.deposit_collateral(weth, amount)
+
+
 # ------------------------------------------------------------------
 #                             MINT DSC
 # ------------------------------------------------------------------
@@ -147,6 +244,51 @@ def test_deposit_and_mint(dsce, weth, wbtc, some_user):
     )
 
 
+def test_deposit_many_and_mint(dsce, weth, wbtc, eth_usd, btc_usd, some_user):
+    # Arrange
+    starting_weth_collateral_balance = weth.balanceOf(some_user)
+    starting_wbtc_collateral_balance = wbtc.balanceOf(some_user)
+
+    # Act
+    with boa.env.prank(some_user):
+        weth.approve(dsce, COLLATERAL_AMOUNT)
+        wbtc.approve(dsce, COLLATERAL_AMOUNT)
+        dsce.deposit_many_and_mint(
+            [(weth.address, COLLATERAL_AMOUNT), (wbtc.address, COLLATERAL_AMOUNT)],
+            MINT_AMOUNT * 2,
+        )
+    trace = dsce.call_trace()
+
+    # Assert
+    assert _count_calls_to(trace, {eth_usd.address, btc_usd.address}) == 2
+    assert dsce.user_to_dsc_minted(some_user) == MINT_AMOUNT * 2
+    assert dsce.get_collateral_balance_of_user(some_user, weth) == COLLATERAL_AMOUNT
+    assert dsce.get_collateral_balance_of_user(some_user, wbtc) == COLLATERAL_AMOUNT
+    assert (
+        weth.balanceOf(some_user)
+        == starting_weth_collateral_balance - COLLATERAL_AMOUNT
+    )
+    assert (
+        wbtc.balanceOf(some_user)
+        == starting_wbtc_collateral_balance - COLLATERAL_AMOUNT
+    )
+
+
+def test_deposit_many_and_mint_reverts_if_health_factor_broken(
+    dsce, weth, wbtc, some_user
+):
+    # Arrange
+    with boa.env.prank(some_user):
+        weth.approve(dsce, COLLATERAL_AMOUNT)
+        wbtc.approve(dsce, COLLATERAL_AMOUNT)
+        # Act/Assert
+        with boa.reverts(dsce.DSC_ENGINE_HEALTH_FACTOR_BROKEN()):
+            dsce.deposit_many_and_mint(
+                [(weth.address, REDEEM_AMOUNT), (wbtc.address, REDEEM_AMOUNT)],
+                MINT_AMOUNT * 20,
+            )
+
+
 # ------------------------------------------------------------------
 #                        REDEEM COLLATERAL
 # ------------------------------------------------------------------
@@ -422,6 +564,299 @@ def test_liquidate_success(
     )
 
 
+def test_liquidate_reads_each_price_feed_once(
+    some_user,
+    dsce_with_minted_dsc_for_liquidation,
+    liquidator,
+    weth,
+    wbtc,
+    eth_usd,
+    btc_usd,
+):
+    # Arrange
+    with boa.env.prank(liquidator):
+        weth.mock_mint()
+        wbtc.mock_mint()
+        weth.approve(dsce_with_minted_dsc_for_liquidation, COLLATERAL_AMOUNT)
+        wbtc.approve(dsce_with_minted_dsc_for_liquidation, COLLATERAL_AMOUNT)
+        dsce_with_minted_dsc_for_liquidation.deposit_collateral(weth, COLLATERAL_AMOUNT)
+        dsce_with_minted_dsc_for_liquidation.deposit_collateral(wbtc, COLLATERAL_AMOUNT)
+    eth_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+    btc_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+
+    # Act
+    with boa.env.prank(liquidator):
+        dsce_with_minted_dsc_for_liquidation.liquidate(
+            weth, some_user, DEBT_TO_COVER_SUCCESS
+        )
+
+    # Assert
+    feed_calls = _count_calls_to(
+        dsce_with_minted_dsc_for_liquidation.call_trace(),
+        {eth_usd.address, btc_usd.address},
+    )
+    assert feed_calls == 2
+
+
+def test_max_liquidatable_is_the_largest_debt_liquidate_takes(
+    some_user,
+    dsce_with_minted_dsc_for_liquidation,
+    dsc,
+    liquidator,
+    weth,
+    wbtc,
+    eth_usd,
+    btc_usd,
+):
+    # Arrange
+    dsce = dsce_with_minted_dsc_for_liquidation
+    with boa.env.prank(liquidator):
+        # @dev pumping up the collateral to avoid health factor broken
+        # for the liquidator
+        weth.mock_mint()
+        wbtc.mock_mint()
+        weth.approve(dsce, COLLATERAL_AMOUNT)
+        wbtc.approve(dsce, COLLATERAL_AMOUNT)
+        dsce.deposit_collateral(weth, COLLATERAL_AMOUNT)
+        dsce.deposit_collateral(wbtc, COLLATERAL_AMOUNT)
+    eth_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+    btc_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+
+    # Act
+    debt_to_cover = dsce.max_liquidatable(some_user, weth)
+
+    # Assert
+    assert 0 < debt_to_cover <= dsc.balanceOf(liquidator)
+    assert debt_to_cover == engine_math.max_liquidatable(
+        dsce.user_to_dsc_minted(some_user),
+        [PRICE_FEED_VALUE_WITH_IMPROVEMENT] * 2,
+        [dsce.get_collateral_balance_of_user(some_user, token) for token in (weth, wbtc)],
+        0,
+    )
+    with boa.env.anchor(), boa.env.prank(liquidator):
+        with boa.reverts():
+            dsce.liquidate(weth, some_user, debt_to_cover + 1)
+    with boa.env.prank(liquidator):
+        dsce.liquidate(weth, some_user, debt_to_cover)
+    # @dev bounded by the weth deposit here, seized but for the rounding dust
+    assert dsce.user_to_dsc_minted(some_user) > 0
+    assert dsce.get_collateral_balance_of_user(some_user, weth) < 10
+
+
+def test_max_liquidatable_is_zero_when_liquidate_takes_nothing(
+    some_user, dsce_with_minted_dsc_for_liquidation, weth, eth_usd, btc_usd
+):
+    # Arrange
+    dsce = dsce_with_minted_dsc_for_liquidation
+    healthy = dsce.max_liquidatable(some_user, weth)
+    not_allowed = dsce.max_liquidatable(some_user, RANDOM_TOKEN_ADDRESS)
+    # @dev collateral worth less than the debt plus the bonus
+    eth_usd.updateAnswer(PRICE_FEED_UNDER_VALUE_PRICE)
+    btc_usd.updateAnswer(PRICE_FEED_VALUE_NO_IMPROVEMENT)
+
+    # Act
+    underwater = dsce.max_liquidatable(some_user, weth)
+
+    # Assert
+    assert healthy == not_allowed == underwater == 0
+
+
+def test_liquidate_many_skips_healthy_and_invalid_entries(
+    some_user,
+    dsce_with_minted_dsc_for_liquidation,
+    dsc,
+    liquidator,
+    weth,
+    wbtc,
+    eth_usd,
+    btc_usd,
+):
+    # Arrange
+    dsce = dsce_with_minted_dsc_for_liquidation
+    other_user = boa.env.generate_address("other_user")
+    healthy_user = boa.env.generate_address("healthy_user")
+    with boa.env.prank(other_user):
+        weth.mock_mint()
+        weth.approve(dsce, LIQUIDATION_COLLATERAL)
+        dsce.deposit_and_mint(weth, LIQUIDATION_COLLATERAL, LIQUIDATION_MINT)
+    with boa.env.prank(healthy_user):
+        weth.mock_mint()
+        weth.approve(dsce, COLLATERAL_AMOUNT)
+        dsce.deposit_and_mint(weth, COLLATERAL_AMOUNT, LIQUIDATION_MINT)
+    with boa.env.prank(liquidator):
+        weth.mock_mint()
+        wbtc.mock_mint()
+        weth.approve(dsce, COLLATERAL_AMOUNT)
+        wbtc.approve(dsce, COLLATERAL_AMOUNT)
+        dsce.deposit_collateral(weth, COLLATERAL_AMOUNT)
+        dsce.deposit_collateral(wbtc, COLLATERAL_AMOUNT)
+    eth_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+    btc_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+
+    starting_liquidator_dsc_balance = dsc.balanceOf(liquidator)
+    starting_liquidator_weth_balance = weth.balanceOf(liquidator)
+    token_amount = dsce.get_token_amount_from_usd(weth, DEBT_TO_COVER_SUCCESS)
+    seized_per_liquidation = token_amount + (
+        token_amount * dsce.LIQUIDATION_BONUS()
+    ) // dsce.LIQUIDATION_PRECISION()
+
+    # Act
+    with boa.env.prank(liquidator):
+        liquidated = dsce.liquidate_many(
+            [
+                (some_user, weth.address, DEBT_TO_COVER_SUCCESS),
+                (healthy_user, weth.address, DEBT_TO_COVER_SUCCESS),
+                (other_user, RANDOM_TOKEN_ADDRESS, DEBT_TO_COVER_SUCCESS),
+                (other_user, wbtc.address, DEBT_TO_COVER_SUCCESS),
+                (other_user, weth.address, DEBT_TO_COVER_SUCCESS),
+            ]
+        )
+
+    # Assert
+    assert liquidated == 2
+    assert (
+        dsce.user_to_dsc_minted(some_user)
+        == LIQUIDATION_MINT * 2 - DEBT_TO_COVER_SUCCESS
+    )
+    assert (
+        dsce.user_to_dsc_minted(other_user) == LIQUIDATION_MINT - DEBT_TO_COVER_SUCCESS
+    )
+    assert dsce.user_to_dsc_minted(healthy_user) == LIQUIDATION_MINT
+    assert (
+        dsc.balanceOf(liquidator)
+        == starting_liquidator_dsc_balance - DEBT_TO_COVER_SUCCESS * 2
+    )
+    assert (
+        weth.balanceOf(liquidator)
+        == starting_liquidator_weth_balance + seized_per_liquidation * 2
+    )
+
+
+# ------------------------------------------------------------------
+#                              PERMIT
+# ------------------------------------------------------------------
+def _deadline() -> int:
+    return boa.env.evm.patch.timestamp + 3600
+
+
+def test_deposit_and_mint_with_permit_needs_no_approve(permit_user, dsce, weth):
+    # Arrange
+    user = permit_user.address
+    permit = sign_permit(weth, permit_user, dsce.address, COLLATERAL_AMOUNT, _deadline())
+
+    # Act
+    with boa.env.prank(user):
+        dsce.deposit_and_mint_with_permit(weth, COLLATERAL_AMOUNT, MINT_AMOUNT, permit)
+
+    # Assert
+    assert dsce.get_collateral_balance_of_user(user, weth) == COLLATERAL_AMOUNT
+    assert dsce.user_to_dsc_minted(user) == MINT_AMOUNT
+    assert weth.allowance(user, dsce) == 0
+    assert weth.nonces(user) == 1
+
+
+def test_redeem_for_dsc_and_burn_with_permit(permit_user, dsce, dsc, weth):
+    # Arrange
+    user = permit_user.address
+    with boa.env.prank(user):
+        dsce.deposit_and_mint_with_permit(
+            weth,
+            COLLATERAL_AMOUNT,
+            MINT_AMOUNT,
+            sign_permit(weth, permit_user, dsce.address, COLLATERAL_AMOUNT, _deadline()),
+        )
+
+    # Act
+    with boa.env.prank(user):
+        dsce.redeem_for_dsc_with_permit(
+            weth,
+            REDEEM_AMOUNT,
+            BURN_DSC_AMOUNT,
+            sign_permit(dsc, permit_user, dsce.address, BURN_DSC_AMOUNT, _deadline()),
+        )
+        dsce.burn_dsc_with_permit(
+            BURN_DSC_AMOUNT,
+            sign_permit(dsc, permit_user, dsce.address, BURN_DSC_AMOUNT, _deadline()),
+        )
+
+    # Assert
+    assert dsce.user_to_dsc_minted(user) == MINT_AMOUNT - BURN_DSC_AMOUNT * 2
+    assert dsc.balanceOf(user) == MINT_AMOUNT - BURN_DSC_AMOUNT * 2
+    assert dsce.get_collateral_balance_of_user(user, weth) == (
+        COLLATERAL_AMOUNT - REDEEM_AMOUNT
+    )
+    assert dsc.nonces(user) == 2
+
+
+def test_liquidate_with_permit(
+    permit_user,
+    some_user,
+    dsce_with_minted_dsc_for_liquidation,
+    dsc,
+    weth,
+    wbtc,
+    eth_usd,
+    btc_usd,
+):
+    # Arrange
+    dsce = dsce_with_minted_dsc_for_liquidation
+    liquidator = permit_user.address
+    with boa.env.prank(liquidator):
+        for token in (weth, wbtc):
+            dsce.deposit_collateral_with_permit(
+                token,
+                COLLATERAL_AMOUNT,
+                sign_permit(token, permit_user, dsce.address, COLLATERAL_AMOUNT, _deadline()),
+            )
+        dsce.mint_dsc(MINT_AMOUNT)
+    eth_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+    btc_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+    starting_user_dsc_minted = dsce.user_to_dsc_minted(some_user)
+
+    # Act
+    with boa.env.prank(liquidator):
+        dsce.liquidate_with_permit(
+            weth,
+            some_user,
+            DEBT_TO_COVER_SUCCESS,
+            sign_permit(dsc, permit_user, dsce.address, DEBT_TO_COVER_SUCCESS, _deadline()),
+        )
+
+    # Assert
+    assert dsce.user_to_dsc_minted(some_user) == (
+        starting_user_dsc_minted - DEBT_TO_COVER_SUCCESS
+    )
+    assert dsc.balanceOf(liquidator) == MINT_AMOUNT - DEBT_TO_COVER_SUCCESS
+
+
+def test_front_run_permit_does_not_block_deposit(permit_user, dsce, weth):
+    # Arrange
+    user = permit_user.address
+    permit = sign_permit(weth, permit_user, dsce.address, COLLATERAL_AMOUNT, _deadline())
+    # @dev anyone can submit the signature seen in the mempool first
+    with boa.env.prank(boa.env.generate_address("front_runner")):
+        weth.permit(user, dsce, COLLATERAL_AMOUNT, *permit)
+
+    # Act
+    with boa.env.prank(user):
+        dsce.deposit_collateral_with_permit(weth, COLLATERAL_AMOUNT, permit)
+
+    # Assert
+    assert dsce.get_collateral_balance_of_user(user, weth) == COLLATERAL_AMOUNT
+
+
+def test_deposit_with_permit_reverts_if_signature_does_not_cover_amount(
+    permit_user, dsce, weth
+):
+    # Arrange
+    permit = sign_permit(weth, permit_user, dsce.address, REDEEM_AMOUNT, _deadline())
+
+    # Act/Assert
+    with boa.env.prank(permit_user.address):
+        with boa.reverts("erc20: insufficient allowance"):
+            dsce.deposit_collateral_with_permit(weth, COLLATERAL_AMOUNT, permit)
+
+
 # ------------------------------------------------------------------
 #                             GETTERS
 # ------------------------------------------------------------------
@@ -437,3 +872,135 @@ def test_get_usd_value_success(dsce_with_minted_dsc_collateral, weth):
         dsce_with_minted_dsc_collateral.get_usd_value(weth, weth_deposited)
         == expected_value
     )
+
+
+# ------------------------------------------------------------------
+#                          PROTOCOL TOTALS
+# ------------------------------------------------------------------
+def test_protocol_totals_follow_deposits_redeems_and_liquidations(
+    some_user,
+    dsce_with_minted_dsc_for_liquidation,
+    dsc,
+    liquidator,
+    weth,
+    wbtc,
+    eth_usd,
+    btc_usd,
+):
+    # Arrange
+    dsce = dsce_with_minted_dsc_for_liquidation
+    with boa.env.prank(liquidator):
+        # @dev pumping up the collateral to avoid health factor broken
+        # for the liquidator
+        weth.mock_mint()
+        wbtc.mock_mint()
+        weth.approve(dsce, COLLATERAL_AMOUNT)
+        wbtc.approve(dsce, COLLATERAL_AMOUNT)
+        dsce.deposit_collateral(weth, COLLATERAL_AMOUNT)
+        dsce.deposit_collateral(wbtc, COLLATERAL_AMOUNT)
+    eth_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+    btc_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+
+    # Act
+    with boa.env.prank(liquidator):
+        dsce.liquidate(weth, some_user, DEBT_TO_COVER_SUCCESS)
+        dsce.liquidate_many([(some_user, wbtc.address, DEBT_TO_COVER_SUCCESS)])
+
+    # Assert
+    assert dsce.total_dsc_minted() == dsc.totalSupply()
+    assert dsce.total_dsc_minted() == dsce.user_to_dsc_minted(
+        some_user
+    ) + dsce.user_to_dsc_minted(liquidator)
+    for token in (weth, wbtc):
+        assert dsce.get_total_collateral(token) == token.balanceOf(dsce)
+    assert dsce.get_total_collateral(RANDOM_TOKEN_ADDRESS) == 0
+
+
+def test_collateralization_ratio(dsce, dsce_with_minted_dsc_collateral, weth, wbtc):
+    # Arrange
+    expected_value = dsce.get_usd_value(weth, COLLATERAL_AMOUNT) + dsce.get_usd_value(
+        wbtc, COLLATERAL_AMOUNT
+    )
+
+    # Act/Assert
+    assert (
+        dsce.get_collateralization_ratio()
+        == expected_value * dsce.PRECISION() // (MINT_AMOUNT * 2)
+    )
+
+
+def test_collateralization_ratio_without_debt_reads_no_feed(dsce, eth_usd, btc_usd):
+    # Arrange
+    eth_usd.updateAnswer(0)
+    btc_usd.updateAnswer(0)
+
+    # Act/Assert
+    assert dsce.get_collateralization_ratio() == 2**256 - 1
+
+
+# ------------------------------------------------------------------
+#                             ORACLE
+# ------------------------------------------------------------------
+def _deploy_engine_with_feed(dsc, weth, feed_decimals, answer):
+    with boa.env.prank(boa.env.generate_address("oracle_deployer")):
+        feed = load_deployer("src/mocks/MockV3Aggregator.vy").deploy(
+            feed_decimals, answer
+        )
+        return load_deployer("src/dsc_engine.vy").deploy(
+            [weth.address], [feed.address], dsc.address
+        )
+
+
+def test_get_usd_value_reverts_if_price_stale(dsce, weth):
+    # Arrange
+    boa.env.time_travel(seconds=ORACLE_TIMEOUT + 1)
+
+    # Act/Assert
+    with boa.reverts("oracle_lib: stale price"):
+        dsce.get_usd_value(weth, COLLATERAL_AMOUNT)
+
+
+def test_get_usd_value_reverts_if_price_from_the_future(dsce, weth, eth_usd):
+    # Arrange
+    now = boa.env.evm.patch.timestamp
+    eth_usd.updateRoundData(
+        eth_usd.latestRound() + 1, eth_usd.latestAnswer(), now + 1, now
+    )
+
+    # Act/Assert
+    with boa.reverts("oracle_lib: stale price"):
+        dsce.get_usd_value(weth, COLLATERAL_AMOUNT)
+
+
+def test_health_factor_reverts_if_price_not_positive(
+    some_user, dsce_with_minted_dsc_collateral, eth_usd
+):
+    # Arrange
+    eth_usd.updateAnswer(0)
+
+    # Act/Assert
+    with boa.reverts("oracle_lib: invalid price"):
+        dsce_with_minted_dsc_collateral.get_health_factor(some_user)
+
+
+def test_feeds_are_scaled_by_their_decimals(dsce, dsc, weth, eth_usd):
+    # Arrange
+    engine = _deploy_engine_with_feed(dsc, weth, 6, eth_usd.latestAnswer() // 100)
+
+    # Act/Assert
+    assert engine.get_usd_value(weth, COLLATERAL_AMOUNT) == dsce.get_usd_value(
+        weth, COLLATERAL_AMOUNT
+    )
+    assert engine.get_token_amount_from_usd(
+        weth, MINT_AMOUNT
+    ) == dsce.get_token_amount_from_usd(weth, MINT_AMOUNT)
+
+
+def test_reverts_if_feed_decimals_unsupported(dsc, weth):
+    with boa.reverts("dsce_engine: unsupported feed decimals"):
+        _deploy_engine_with_feed(dsc, weth, 17, 1)
+
+
+def _count_calls_to(frame, addresses) -> int:
+    own = 1 if frame.address in addresses else 0
+    return own + sum(_count_calls_to(child, addresses) for child in frame.children)
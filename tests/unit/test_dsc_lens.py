@@ -0,0 +1,89 @@
+import boa
+
+from keeper.lens import get_accounts
+from tests.constants import COLLATERAL_AMOUNT
+
+
+def _account(dsc_lens, user):
+    (account,) = get_accounts(dsc_lens, [user])
+    return account
+
+
+def test_get_accounts_matches_engine(
+    dsc_lens, dsce_with_minted_dsc_collateral, some_user, weth, wbtc
+):
+    # Arrange
+    dsce = dsce_with_minted_dsc_collateral
+    empty_user = boa.env.generate_address("empty_user")
+
+    # Act
+    account, empty_account = get_accounts(dsc_lens, [some_user, empty_user])
+
+    # Assert
+    dsc_minted, collateral_value_usd = dsce.get_account_information(some_user)
+    assert account.user == some_user
+    assert account.deposits == [
+        dsce.get_collateral_balance_of_user(some_user, token) for token in (weth, wbtc)
+    ]
+    assert account.deposits_usd == [
+        dsce.get_usd_value(token, COLLATERAL_AMOUNT) for token in (weth, wbtc)
+    ]
+    assert account.collateral_value_usd == collateral_value_usd
+    assert account.dsc_minted == dsc_minted
+    assert account.health_factor == dsce.get_health_factor(some_user)
+    assert empty_account.deposits == [0, 0]
+    assert empty_account.health_factor == 2**256 - 1
+    assert empty_account.max_mintable_dsc == 0
+    assert empty_account.max_redeemable == [0, 0]
+
+
+def test_get_accounts_reads_each_feed_once(
+    dsc_lens, dsce_with_minted_dsc_collateral, some_user, liquidator, eth_usd, btc_usd
+):
+    # Arrange/Act
+    dsc_lens.get_accounts([some_user, liquidator])
+
+    # Assert
+    feeds = {eth_usd.address, btc_usd.address}
+    assert _count_calls_to(dsc_lens.call_trace(), feeds) == 2
+
+
+def test_max_mintable_dsc_is_exact(
+    dsc_lens, dsce_with_minted_dsc_collateral, some_user
+):
+    # Arrange
+    max_mintable_dsc = _account(dsc_lens, some_user).max_mintable_dsc
+    assert max_mintable_dsc > 0
+
+    # Act
+    with boa.env.prank(some_user):
+        dsce_with_minted_dsc_collateral.mint_dsc(max_mintable_dsc)
+
+        # Assert
+        assert _account(dsc_lens, some_user).max_mintable_dsc == 0
+        with boa.reverts("dsce_engine: health factor broken"):
+            dsce_with_minted_dsc_collateral.mint_dsc(1)
+
+
+def test_max_redeemable_is_exact(
+    dsc_lens, dsce_with_minted_dsc_collateral, some_user, weth
+):
+    # Arrange
+    dsce = dsce_with_minted_dsc_collateral
+    # @dev enough debt that the wbtc alone no longer covers it
+    with boa.env.prank(some_user):
+        dsce.mint_dsc(_account(dsc_lens, some_user).max_mintable_dsc // 2)
+    max_redeemable = _account(dsc_lens, some_user).max_redeemable[0]
+    assert 0 < max_redeemable < COLLATERAL_AMOUNT
+
+    # Act/Assert
+    with boa.env.prank(some_user):
+        with boa.reverts("dsce_engine: health factor broken"):
+            dsce.redeem_collateral(weth, max_redeemable + 1)
+        dsce.redeem_collateral(weth, max_redeemable)
+    assert _account(dsc_lens, some_user).max_redeemable[0] == 0
+
+
+def _count_calls_to(frame, addresses) -> int:
+    own = 1 if frame.address in addresses else 0
+    return own + sum(_count_calls_to(child, addresses) for child in frame.children)
@@ -0,0 +1,204 @@
+import boa
+
+from eth_utils import to_wei
+from keeper.engine_model import EngineModel, EngineRevert
+from tests.constants import RANDOM_TOKEN_ADDRESS
+
+MAX_APPROVAL = 2**256 - 1
+# @dev a permit that fails, the engine goes on with the allowance already set
+UNSIGNED_PERMIT = (0, 0, b"\x00" * 32, b"\x00" * 32)
+
+
+def _funded_user(alias, dsce, dsc, weth, wbtc) -> str:
+    user = boa.env.generate_address(alias)
+    with boa.env.prank(user):
+        for token in (weth, wbtc):
+            token.mint_amount(to_wei(1000, "ether"))
+            token.approve(dsce, MAX_APPROVAL)
+        dsc.approve(dsce, MAX_APPROVAL)
+    return user
+
+
+def _call_both(model, dsce, sender, fn_name, *args):
+    """Run the same call on the model and the engine, they must agree."""
+    try:
+        expected = getattr(model, fn_name)(sender, *args)
+    except EngineRevert as revert:
+        reverts = boa.reverts(revert.reason) if revert.reason else boa.reverts()
+        with reverts, boa.env.prank(sender):
+            getattr(dsce, fn_name)(*args)
+        return
+    with boa.env.prank(sender):
+        assert getattr(dsce, fn_name)(*args) == expected
+
+
+def _view_both(model, dsce, fn_name, *args):
+    """Same as `_call_both` for a view, no sender."""
+    try:
+        expected = getattr(model, fn_name)(*args)
+    except EngineRevert:
+        with boa.reverts():
+            getattr(dsce, fn_name)(*args)
+        return
+    assert getattr(dsce, fn_name)(*args) == expected
+
+
+def _assert_same_state(model, dsce, dsc, weth, wbtc, users):
+    for user in users:
+        assert model.user_to_dsc_minted(user) == dsce.user_to_dsc_minted(user)
+        for token in (weth, wbtc):
+            assert model.get_collateral_balance_of_user(
+                user, token.address
+            ) == dsce.get_collateral_balance_of_user(user, token)
+        assert model.get_health_factor(user) == dsce.get_health_factor(user)
+        assert model.get_held_collateral(user) == dsce.get_held_collateral(user)
+        assert model.user_to_token_to_amount_deposited(
+            user, wbtc.address
+        ) == dsce.user_to_token_to_amount_deposited(user, wbtc)
+        for token in (weth.address, wbtc.address):
+            _view_both(model, dsce, "max_liquidatable", user, token)
+    assert model.collateral_held == [weth.balanceOf(dsce), wbtc.balanceOf(dsce)]
+    assert model.dsc_total_supply == dsc.totalSupply()
+    assert model.total_dsc_minted() == dsce.total_dsc_minted()
+    for token in (weth.address, wbtc.address, RANDOM_TOKEN_ADDRESS):
+        assert model.get_total_collateral(token) == dsce.get_total_collateral(token)
+    _view_both(model, dsce, "get_collateralization_ratio")
+
+
+def test_engine_model_matches_engine(dsce, dsc, weth, wbtc, eth_usd, btc_usd):
+    # Arrange
+    model = EngineModel(
+        [weth.address, wbtc.address], [eth_usd.latestAnswer(), btc_usd.latestAnswer()]
+    )
+    safe, risky, liquidator = (
+        _funded_user(alias, dsce, dsc, weth, wbtc)
+        for alias in ("safe", "risky", "model_liquidator")
+    )
+    ten, debt = to_wei(10, "ether"), to_wei(90, "ether")
+
+    # Act
+    _call_both(model, dsce, safe, "deposit_collateral", weth.address, 0)
+    _call_both(model, dsce, safe, "deposit_collateral", RANDOM_TOKEN_ADDRESS, ten)
+    _call_both(model, dsce, safe, "deposit_collateral", weth.address, 2**112)
+    _call_both(model, dsce, safe, "deposit_and_mint", weth.address, ten, debt * 2)
+    _call_both(model, dsce, safe, "deposit_and_mint", weth.address, ten, debt // 2)
+    _call_both(model, dsce, risky, "deposit_and_mint", weth.address, ten, debt)
+    _call_both(
+        model,
+        dsce,
+        liquidator,
+        "deposit_many_and_mint",
+        [(weth.address, ten * 50), (wbtc.address, ten * 50)],
+        debt * 2,
+    )
+    _call_both(model, dsce, safe, "redeem_collateral", weth.address, ten * 2)
+    _call_both(model, dsce, safe, "redeem_for_dsc", weth.address, ten // 10, ten)
+    _call_both(model, dsce, safe, "burn_dsc", debt)
+    _call_both(model, dsce, safe, "burn_dsc", ten)
+    _call_both(
+        model,
+        dsce,
+        safe,
+        "deposit_collateral_with_permit",
+        wbtc.address,
+        ten,
+        UNSIGNED_PERMIT,
+    )
+    _call_both(
+        model,
+        dsce,
+        safe,
+        "deposit_and_mint_with_permit",
+        wbtc.address,
+        ten,
+        ten,
+        UNSIGNED_PERMIT,
+    )
+    _call_both(
+        model,
+        dsce,
+        safe,
+        "redeem_for_dsc_with_permit",
+        wbtc.address,
+        ten // 10,
+        ten // 2,
+        UNSIGNED_PERMIT,
+    )
+    _call_both(model, dsce, safe, "burn_dsc_with_permit", ten // 4, UNSIGNED_PERMIT)
+    _call_both(model, dsce, liquidator, "liquidate", weth.address, risky, ten)
+
+    model.set_price(weth.address, eth_usd.latestAnswer() // 2)
+    eth_usd.updateAnswer(eth_usd.latestAnswer() // 2)
+
+    _call_both(model, dsce, liquidator, "liquidate", weth.address, risky, 0)
+    _call_both(model, dsce, liquidator, "liquidate", weth.address, safe, ten)
+    _call_both(model, dsce, liquidator, "liquidate", weth.address, risky, to_wei(1, "wei"))
+    _call_both(
+        model,
+        dsce,
+        liquidator,
+        "liquidate_with_permit",
+        weth.address,
+        risky,
+        ten // 10,
+        UNSIGNED_PERMIT,
+    )
+    _call_both(model, dsce, liquidator, "liquidate", weth.address, risky, ten)
+    _call_both(
+        model,
+        dsce,
+        liquidator,
+        "liquidate_many",
+        [
+            (safe, weth.address, ten),
+            (risky, RANDOM_TOKEN_ADDRESS, ten),
+            (risky, weth.address, debt * 2),
+            (risky, wbtc.address, ten),
+            (risky, weth.address, ten),
+            (risky, weth.address, ten),
+        ],
+    )
+
+    # Assert
+    _assert_same_state(model, dsce, dsc, weth, wbtc, [safe, risky, liquidator])
+
+
+def test_engine_model_only_reads_feeds_of_held_collateral(
+    dsce, dsc, weth, wbtc, eth_usd, btc_usd
+):
+    # Arrange
+    model = EngineModel(
+        [weth.address, wbtc.address], [eth_usd.latestAnswer(), btc_usd.latestAnswer()]
+    )
+    weth_only, both, no_debt = (
+        _funded_user(alias, dsce, dsc, weth, wbtc)
+        for alias in ("weth_only", "both", "no_debt")
+    )
+    ten = to_wei(10, "ether")
+    _call_both(model, dsce, no_debt, "deposit_collateral", wbtc.address, ten)
+    _call_both(model, dsce, weth_only, "deposit_and_mint", weth.address, ten, ten)
+    _call_both(
+        model,
+        dsce,
+        both,
+        "deposit_many_and_mint",
+        [(weth.address, ten), (wbtc.address, ten)],
+        ten,
+    )
+
+    # Act
+    # @dev a negative answer fails the uint256 convert, but only if the feed is read
+    model.set_price(wbtc.address, -1)
+    btc_usd.updateAnswer(-1)
+    _call_both(model, dsce, weth_only, "mint_dsc", ten)
+    _call_both(model, dsce, both, "mint_dsc", ten)
+    _call_both(model, dsce, both, "redeem_collateral", wbtc.address, ten)
+    _call_both(model, dsce, both, "mint_dsc", ten)
+    _call_both(model, dsce, no_debt, "redeem_collateral", wbtc.address, ten // 2)
+
+    # Assert
+    assert model.get_held_collateral(weth_only) == 0b01
+    assert model.get_held_collateral(both) == 0b01
+    assert model.user_to_dsc_minted(both) == ten * 2
+    assert model.get_collateral_balance_of_user(no_debt, wbtc.address) == ten // 2
+    _assert_same_state(model, dsce, dsc, weth, wbtc, [weth_only])
@@ -0,0 +1,123 @@
+import boa
+
+from tests.constants import MINT_AMOUNT, PRICE_FEED_VALUE_WITH_IMPROVEMENT
+
+
+def _crash(eth_usd, btc_usd):
+    eth_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+    btc_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+
+
+def test_flash_liquidator_liquidates_without_holding_dsc(
+    some_user,
+    dsce_with_minted_dsc_for_liquidation,
+    dsc,
+    liquidator,
+    flash_liquidator,
+    swap_router,
+    weth,
+    wbtc,
+    eth_usd,
+    btc_usd,
+):
+    # Arrange
+    dsce = dsce_with_minted_dsc_for_liquidation
+    keeper = flash_liquidator.owner()
+    with boa.env.prank(liquidator):
+        dsc.transfer(swap_router, MINT_AMOUNT)
+    _crash(eth_usd, btc_usd)
+    debt = dsce.max_liquidatable(some_user, weth)
+    starting_user_debt = dsce.user_to_dsc_minted(some_user)
+
+    # Act
+    with boa.env.prank(keeper):
+        profit = flash_liquidator.liquidate(
+            [(some_user, weth.address, debt)], swap_router, 0, 1
+        )
+
+    # Assert
+    assert dsce.user_to_dsc_minted(some_user) == starting_user_debt - debt
+    # @dev the bonus, sold at the engine price, minus the rounding
+    assert debt // 11 < profit <= debt // 10
+    assert dsc.balanceOf(keeper) == profit
+    for token in (dsc, weth, wbtc):
+        assert token.balanceOf(flash_liquidator) == 0
+    assert dsc.totalSupply() == dsce.total_dsc_minted()
+
+
+def test_flash_liquidator_reverts_if_not_profitable(
+    some_user,
+    dsce_with_minted_dsc_for_liquidation,
+    dsc,
+    liquidator,
+    flash_liquidator,
+    swap_router,
+    weth,
+    eth_usd,
+    btc_usd,
+):
+    # Arrange
+    dsce = dsce_with_minted_dsc_for_liquidation
+    with boa.env.prank(liquidator):
+        dsc.transfer(swap_router, MINT_AMOUNT)
+    _crash(eth_usd, btc_usd)
+    debt_to_cover = dsce.max_liquidatable(some_user, weth)
+
+    # Act/Assert
+    with boa.env.prank(flash_liquidator.owner()):
+        with boa.reverts(flash_liquidator.FLASH_LIQUIDATOR_NOT_PROFITABLE()):
+            flash_liquidator.liquidate(
+                [(some_user, weth.address, debt_to_cover)],
+                swap_router,
+                0,
+                debt_to_cover,
+            )
+
+
+def test_flash_liquidator_bounds_each_swap_by_the_engine_price(
+    some_user,
+    dsce_with_minted_dsc_for_liquidation,
+    dsc,
+    liquidator,
+    flash_liquidator,
+    swap_router,
+    weth,
+    eth_usd,
+    btc_usd,
+):
+    # Arrange
+    dsce = dsce_with_minted_dsc_for_liquidation
+    with boa.env.prank(liquidator):
+        dsc.transfer(swap_router, MINT_AMOUNT)
+    _crash(eth_usd, btc_usd)
+    swap_router.set_fee_bps(100)
+    liquidations = [(some_user, weth.address, dsce.max_liquidatable(some_user, weth))]
+
+    # Act/Assert
+    with boa.env.prank(flash_liquidator.owner()):
+        with boa.reverts("mock_swap_router: slippage"):
+            flash_liquidator.liquidate(liquidations, swap_router, 99, 0)
+        with boa.reverts(flash_liquidator.FLASH_LIQUIDATOR_INVALID_SLIPPAGE()):
+            flash_liquidator.liquidate(
+                liquidations, swap_router, flash_liquidator.MAX_BPS() + 1, 0
+            )
+        profit = flash_liquidator.liquidate(liquidations, swap_router, 100, 0)
+    assert profit > 0
+
+
+def test_flash_liquidator_only_takes_its_own_loans(
+    some_user, dsc, flash_liquidator, swap_router, weth
+):
+    # Arrange
+    stranger = boa.env.generate_address("stranger")
+
+    # Act/Assert
+    with boa.env.prank(stranger):
+        with boa.reverts("ownable: caller is not the owner"):
+            flash_liquidator.liquidate(
+                [(some_user, weth.address, 1)], swap_router, 0, 0
+            )
+        with boa.reverts(flash_liquidator.FLASH_LIQUIDATOR_UNTRUSTED_LOAN()):
+            dsc.flashLoan(flash_liquidator, dsc, MINT_AMOUNT, b"")
+        with boa.reverts(flash_liquidator.FLASH_LIQUIDATOR_UNTRUSTED_LOAN()):
+            flash_liquidator.onFlashLoan(flash_liquidator, dsc, MINT_AMOUNT, 0, b"")
@@ -0,0 +1,51 @@
+import boa
+
+from keeper.gas_profile import GasProfile, profile_call
+from tests.constants import MINT_AMOUNT, REDEEM_AMOUNT
+
+
+def test_gas_profile_splits_redeem_for_dsc_by_function_and_call(
+    dsce_with_minted_dsc_collateral, dsc, some_user, weth
+):
+    # Arrange
+    dsce = dsce_with_minted_dsc_collateral
+    with boa.env.prank(some_user):
+        dsc.approve(dsce, MINT_AMOUNT)
+
+    # Act
+    profile = profile_call(
+        dsce, "redeem_for_dsc", weth, REDEEM_AMOUNT, MINT_AMOUNT, sender=some_user
+    )
+
+    # Assert
+    assert profile.total == dsce._computation.get_gas_used()
+    functions = profile.functions()
+    assert functions["dsc_engine"][1] == profile.total
+    for frame in ("_redeem_collateral", "_burn_dsc", "erc20._transfer"):
+        assert functions[frame][1] > 0
+    # @dev both feeds are read by the health factor check, nested under it
+    feed_stacks = [stack for stack in profile.stacks if stack[-1] == "latestRoundData"]
+    assert feed_stacks
+    assert all("_revert_if_health_factor_broken" in stack for stack in feed_stacks)
+    assert functions["latestRoundData"][0] == sum(
+        profile.stacks[stack] for stack in feed_stacks
+    )
+
+
+def test_gas_profile_folded_stacks_round_trip():
+    # Arrange
+    profile = GasProfile(
+        {("engine", "liquidate"): 10, ("engine", "liquidate", "feed"): 5}
+    )
+
+    # Act
+    lines = profile.folded().splitlines()
+
+    # Assert
+    assert lines == ["engine;liquidate 10", "engine;liquidate;feed 5"]
+    assert profile.functions() == {
+        "engine": (0, 15),
+        "liquidate": (10, 15),
+        "feed": (5, 5),
+    }
+    assert profile.merge(profile).total == 30
@@ -0,0 +1,94 @@
+import boa
+
+from keeper.indexer import EngineIndexer, PositionStore, RecordedLogSource
+from tests.constants import (
+    BURN_DSC_AMOUNT,
+    COLLATERAL_AMOUNT,
+    DEBT_TO_COVER_SUCCESS,
+    LIQUIDATION_COLLATERAL,
+    LIQUIDATION_MINT,
+    MINT_AMOUNT,
+    PRICE_FEED_VALUE_WITH_IMPROVEMENT,
+    REDEEM_AMOUNT,
+)
+
+
+def _make_indexer(dsce, weth, wbtc, source, store) -> EngineIndexer:
+    return EngineIndexer(source, store, dsce.address, [weth.address, wbtc.address])
+
+
+def test_indexer_matches_engine_positions(
+    some_user, dsce, dsc, weth, wbtc, eth_usd, btc_usd
+):
+    # Arrange
+    liquidator = boa.env.generate_address("indexed_liquidator")
+    source = RecordedLogSource()
+    store = PositionStore()
+    with boa.env.prank(some_user):
+        weth.approve(dsce, LIQUIDATION_COLLATERAL)
+        wbtc.approve(dsce, LIQUIDATION_COLLATERAL)
+        dsce.deposit_many_and_mint(
+            [
+                (wbtc.address, LIQUIDATION_COLLATERAL),
+                (weth.address, LIQUIDATION_COLLATERAL),
+            ],
+            LIQUIDATION_MINT * 2,
+        )
+        source.record(dsce)
+    boa.env.time_travel(blocks=1)
+    with boa.env.prank(liquidator):
+        weth.mint_amount(COLLATERAL_AMOUNT * 4)
+        weth.approve(dsce, COLLATERAL_AMOUNT * 4)
+        dsce.deposit_and_mint(weth, COLLATERAL_AMOUNT * 4, MINT_AMOUNT)
+        source.record(dsce)
+        dsce.redeem_collateral(weth, REDEEM_AMOUNT)
+        source.record(dsce)
+    eth_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+    btc_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+    boa.env.time_travel(blocks=1)
+    with boa.env.prank(liquidator):
+        dsc.approve(dsce, MINT_AMOUNT)
+        dsce.burn_dsc(BURN_DSC_AMOUNT)
+        source.record(dsce)
+        dsce.liquidate(weth, some_user, DEBT_TO_COVER_SUCCESS)
+        source.record(dsce)
+
+    # Act
+    processed = _make_indexer(dsce, weth, wbtc, source, store).sync()
+
+    # Assert
+    assert processed == 9
+    for user in (some_user, liquidator):
+        assert store.dsc_minted(user) == dsce.user_to_dsc_minted(user)
+        for token in (weth, wbtc):
+            assert store.collateral(user, token.address) == (
+                dsce.get_collateral_balance_of_user(user, token)
+            )
+
+
+def test_indexer_resumes_from_checkpoint(some_user, dsce, weth, wbtc):
+    # Arrange
+    source = RecordedLogSource()
+    store = PositionStore()
+    with boa.env.prank(some_user):
+        weth.approve(dsce, COLLATERAL_AMOUNT)
+        wbtc.approve(dsce, COLLATERAL_AMOUNT)
+        dsce.deposit_and_mint(weth, COLLATERAL_AMOUNT, MINT_AMOUNT)
+        source.record(dsce)
+        first_block = boa.env.evm.patch.block_number
+        boa.env.time_travel(blocks=5)
+        dsce.deposit_collateral(wbtc, COLLATERAL_AMOUNT)
+        source.record(dsce)
+
+    # Act
+    _make_indexer(dsce, weth, wbtc, source, store).sync(to_block=first_block)
+    indexed_before_resume = store.collateral(some_user, wbtc.address)
+    processed = _make_indexer(dsce, weth, wbtc, source, store).sync()
+
+    # Assert
+    assert indexed_before_resume == 0
+    assert processed == 1
+    assert store.last_block(dsce.address) == source.latest_block()
+    assert store.collateral(some_user, weth.address) == COLLATERAL_AMOUNT
+    assert store.collateral(some_user, wbtc.address) == COLLATERAL_AMOUNT
+    assert store.dsc_minted(some_user) == MINT_AMOUNT
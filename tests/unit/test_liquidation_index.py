@@ -0,0 +1,121 @@
+import random
+
+import boa
+
+from keeper import engine_math
+from keeper.liquidation_index import LiquidationPriceIndex
+from keeper.scanner import HealthFactorScanner, get_feed_decimals, get_prices
+from script.artifacts import load_deployer
+from tests.constants import LIQUIDATION_COLLATERAL, LIQUIDATION_MINT
+
+TOKENS = ["weth", "wbtc", "link"]
+PRICES = [2_000 * 10**8, 30_000 * 10**8, 15 * 10**8]
+
+
+def test_liquidation_price_matches_engine(some_user, dsce, weth, wbtc, eth_usd):
+    # Arrange
+    tokens = [weth.address, wbtc.address]
+    index = LiquidationPriceIndex(tokens, get_prices(dsce))
+    # @dev both collaterals count, at 90% of the mintable debt
+    dsc_minted = (
+        engine_math.collateral_adjusted_for_threshold(
+            engine_math.get_collateral_value(
+                index.prices, [LIQUIDATION_COLLATERAL, LIQUIDATION_COLLATERAL]
+            )
+        )
+        * 9
+        // 10
+    )
+    with boa.env.prank(some_user):
+        weth.approve(dsce, LIQUIDATION_COLLATERAL)
+        wbtc.approve(dsce, LIQUIDATION_COLLATERAL)
+        dsce.deposit_many_and_mint(
+            [(token, LIQUIDATION_COLLATERAL) for token in tokens], dsc_minted
+        )
+    index.set_position(
+        some_user, [LIQUIDATION_COLLATERAL, LIQUIDATION_COLLATERAL], dsc_minted
+    )
+    liquidation_price = index.liquidation_price(some_user, weth.address)
+
+    # Act
+    eth_usd.updateAnswer(liquidation_price)
+    health_factor_at_price = dsce.get_health_factor(some_user)
+    eth_usd.updateAnswer(liquidation_price - 1)
+    health_factor_below_price = dsce.get_health_factor(some_user)
+
+    # Assert
+    assert 0 < liquidation_price < index.prices[0]
+    assert health_factor_at_price >= engine_math.MIN_HEALTH_FACTOR
+    assert health_factor_below_price < engine_math.MIN_HEALTH_FACTOR
+    assert index.update_price(weth.address, liquidation_price - 1) == [some_user]
+
+
+def test_index_and_scanner_price_feeds_by_their_decimals(some_user, dsc, weth):
+    # Arrange
+    with boa.env.prank(boa.env.generate_address("oracle_deployer")):
+        feed = load_deployer("src/mocks/MockV3Aggregator.vy").deploy(6, 2_000 * 10**6)
+        engine = load_deployer("src/dsc_engine.vy").deploy(
+            [weth.address], [feed.address], dsc.address
+        )
+    dsc.set_minter(engine, True)
+    with boa.env.prank(some_user):
+        weth.approve(engine, LIQUIDATION_COLLATERAL)
+        engine.deposit_and_mint(weth, LIQUIDATION_COLLATERAL, LIQUIDATION_MINT)
+    index = LiquidationPriceIndex(
+        [weth.address], get_prices(engine), get_feed_decimals(engine)
+    )
+    index.set_position(some_user, [LIQUIDATION_COLLATERAL], LIQUIDATION_MINT)
+    liquidation_price = index.liquidation_price(some_user, weth.address)
+
+    # Act
+    feed.updateAnswer(liquidation_price)
+    health_factor_at_price = engine.get_health_factor(some_user)
+    feed.updateAnswer(liquidation_price - 1)
+    scanner = HealthFactorScanner.from_engine(engine, [some_user])
+    prices = get_prices(engine)
+
+    # Assert
+    assert health_factor_at_price >= engine_math.MIN_HEALTH_FACTOR
+    assert prices == [liquidation_price - 1]
+    assert scanner.health_factors(prices) == [engine.get_health_factor(some_user)]
+    assert list(scanner.underwater(prices)) == [0]
+    assert index.update_price(weth.address, liquidation_price - 1) == [some_user]
+
+
+def test_index_matches_scanner_on_random_ticks():
+    # Arrange
+    rng = random.Random(0)
+    scanner = HealthFactorScanner(TOKENS)
+    index = LiquidationPriceIndex(TOKENS, PRICES)
+
+    def random_position():
+        # @dev mostly single collateral, some spread, some without debt or deposit
+        amounts = [0] * len(TOKENS)
+        for i in rng.sample(range(len(TOKENS)), rng.choice([0, 1, 1, 1, 2, 3])):
+            amounts[i] = rng.randrange(1, 10**20)
+        value = engine_math.get_collateral_value(PRICES, amounts)
+        dsc_minted = rng.choice([0, int(value / rng.uniform(2.0, 6.0)) + 1])
+        return amounts, dsc_minted
+
+    users = [f"user_{i}" for i in range(300)]
+    positions = [random_position() for _ in users]
+    scanner.set_positions(users, *zip(*positions))
+    index.set_positions(users, *zip(*positions))
+    prices = list(PRICES)
+
+    for _ in range(200):
+        # Act
+        if rng.random() < 0.2:
+            user = rng.choice(users)
+            amounts, dsc_minted = random_position()
+            scanner.set_position(user, amounts, dsc_minted)
+            index.set_position(user, amounts, dsc_minted)
+        before = set(scanner.underwater(prices))
+        token = rng.randrange(len(TOKENS))
+        prices[token] = max(1, int(prices[token] * rng.uniform(0.85, 1.12)))
+        crossed = index.update_price(TOKENS[token], prices[token])
+
+        # Assert
+        after = set(scanner.underwater(prices))
+        assert set(crossed) == {users[i] for i in after - before}
+        assert index.underwater() == sorted(users[i] for i in after)
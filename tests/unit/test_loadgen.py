@@ -0,0 +1,51 @@
+from keeper.loadgen import OPERATIONS, LoadGenerator
+
+
+def test_load_generator_runs_the_mix_and_mirrors_the_engine(
+    dsce, dsc, weth, wbtc, eth_usd, btc_usd
+):
+    # Arrange
+    generator = LoadGenerator(dsce, dsc, [weth, wbtc], [eth_usd, btc_usd], users=20)
+    generator.setup()
+
+    # Act
+    report = generator.run(200)
+
+    # Assert
+    operations = report.operations
+    assert report.transactions == sum(operations[name].sent for name in OPERATIONS)
+    # @dev amounts come from the mirror, nothing it sizes may be refused
+    for name in ("deposit_and_mint", "redeem_for_dsc", "burn_dsc"):
+        assert operations[name].sent > 0
+        assert operations[name].reverted == 0
+        assert operations[name].gas[50] > 0
+    assert report.live_slots[0] == 0 < report.live_slots[1] <= 3 * 20
+    for user in generator.users:
+        assert dsce.user_to_dsc_minted(user) == generator._debt[user]
+
+
+def test_load_generator_liquidates_positions_in_a_crash(
+    dsce, dsc, weth, wbtc, eth_usd, btc_usd
+):
+    # Arrange
+    generator = LoadGenerator(
+        dsce,
+        dsc,
+        [weth, wbtc],
+        [eth_usd, btc_usd],
+        users=20,
+        mix={"deposit_and_mint": 0.5, "liquidate": 0.5},
+        price_drift=-0.1,
+        price_update_interval=20,
+    )
+    generator.setup()
+
+    # Act
+    report = generator.run(200)
+
+    # Assert
+    liquidate = report.operations["liquidate"]
+    # @dev sized with max_liquidatable, no liquidation is wasted
+    assert liquidate.sent > 0
+    assert liquidate.reverted == 0
+    assert report.operations["redeem_for_dsc"].sent == 0
@@ -0,0 +1,174 @@
+import asyncio
+
+import boa
+import pytest
+from aiohttp import web
+
+from keeper.rpc import AsyncJsonRpcClient, BoaRpcServer, EngineReader, JsonRpcError
+from keeper.scanner import get_feed_decimals, get_prices
+from tests.constants import PRICE_FEED_VALUE_WITH_IMPROVEMENT
+
+
+class _GarbledServer(BoaRpcServer):
+    """Replies to every request with a body that is not JSON."""
+
+    async def _serve(self, request):
+        self.http_requests += 1
+        return web.Response(text="<html>bad gateway</html>")
+
+
+class _FlakyServer(BoaRpcServer):
+    """Drops its first `failures` connections without a reply."""
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+
+    async def _serve(self, request):
+        if self.failures:
+            self.failures -= 1
+            request.transport.close()
+            raise web.HTTPServiceUnavailable()
+        return await super()._serve(request)
+
+
+def test_engine_reader_matches_engine_in_one_batch(
+    dsce_with_minted_dsc_collateral, liquidator, some_user, weth, wbtc
+):
+    # Arrange
+    dsce = dsce_with_minted_dsc_collateral
+    users = [some_user, liquidator, boa.env.generate_address("no_position")]
+    tokens = [weth.address, wbtc.address]
+
+    async def read():
+        async with BoaRpcServer() as server, AsyncJsonRpcClient(server.url) as client:
+            reader = EngineReader(client, dsce.address)
+            await reader.refresh()
+            await reader.collateral_tokens()
+            before = server.http_requests
+            results = await asyncio.gather(
+                asyncio.gather(*(reader.account_information(user) for user in users)),
+                asyncio.gather(
+                    *(reader.collateral_balance(u, t) for u in users for t in tokens)
+                ),
+            )
+            return (
+                results,
+                server.http_requests - before,
+                await reader.prices(),
+                await reader.feed_decimals(),
+            )
+
+    # Act
+    (accounts, balances), batches, prices, feed_decimals = asyncio.run(read())
+
+    # Assert
+    assert batches == 1
+    assert accounts == [dsce.get_account_information(user) for user in users]
+    assert balances == [
+        dsce.get_collateral_balance_of_user(user, token)
+        for user in users
+        for token in tokens
+    ]
+    assert prices == get_prices(dsce)
+    assert feed_decimals == get_feed_decimals(dsce)
+
+
+def test_engine_reader_caches_reads_until_the_block_moves(
+    dsce_with_minted_dsc_collateral, some_user, eth_usd
+):
+    # Arrange
+    dsce = dsce_with_minted_dsc_collateral
+
+    async def read():
+        async with BoaRpcServer() as server, AsyncJsonRpcClient(server.url) as client:
+            reader = EngineReader(client, dsce.address)
+            first = await reader.account_information(some_user)
+            calls = server.calls
+            cached = await reader.account_information(some_user)
+            cached_calls = server.calls - calls
+
+            eth_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+            stale = await reader.account_information(some_user)
+            boa.env.time_travel(blocks=1)
+            await reader.refresh()
+            fresh = await reader.account_information(some_user)
+            return first, cached, cached_calls, stale, fresh
+
+    # Act
+    first, cached, cached_calls, stale, fresh = asyncio.run(read())
+
+    # Assert
+    assert cached == first
+    assert cached_calls == 0
+    assert stale == first
+    assert fresh == dsce.get_account_information(some_user)
+    assert fresh != first
+
+
+def test_client_splits_batches_over_pooled_connections():
+    # Arrange
+    async def read():
+        async with BoaRpcServer(latency=0.01) as server:
+            async with AsyncJsonRpcClient(
+                server.url, max_connections=2, max_batch_size=100
+            ) as client:
+                results = await asyncio.gather(
+                    *(client.request("eth_blockNumber", []) for _ in range(250))
+                )
+                return results, server.http_requests, server.connections
+
+    # Act
+    results, http_requests, connections = asyncio.run(read())
+
+    # Assert
+    assert results == [hex(boa.env.evm.patch.block_number)] * 250
+    assert http_requests == 3
+    assert connections == 2
+
+
+def test_client_retries_dropped_connections():
+    # Arrange
+    async def read():
+        async with _FlakyServer(failures=2) as server:
+            async with AsyncJsonRpcClient(server.url, backoff=0) as client:
+                return await client.request("eth_chainId", []), server.connections
+
+    # Act
+    chain_id, connections = asyncio.run(read())
+
+    # Assert
+    assert int(chain_id, 16) == boa.env.evm.patch.chain_id
+    assert connections == 1
+
+
+def test_client_does_not_retry_reverts(dsce):
+    # Arrange
+    async def read():
+        async with BoaRpcServer() as server, AsyncJsonRpcClient(server.url) as client:
+            try:
+                await client.request(
+                    "eth_call", [{"to": dsce.address, "data": "0xdeadbeef"}, "latest"]
+                )
+            finally:
+                assert server.http_requests == 1
+
+    # Act / Assert
+    with pytest.raises(JsonRpcError) as error:
+        asyncio.run(read())
+    assert error.value.code == 3
+
+
+def test_client_does_not_retry_replies_that_are_not_json():
+    # Arrange
+    async def read():
+        async with _GarbledServer() as server:
+            async with AsyncJsonRpcClient(server.url, backoff=0) as client:
+                try:
+                    await client.request("eth_chainId", [])
+                finally:
+                    assert server.http_requests == 1
+
+    # Act / Assert
+    with pytest.raises(ValueError):
+        asyncio.run(read())
@@ -0,0 +1,70 @@
+import random
+
+import boa
+
+from keeper import engine_math
+from keeper.scanner import HealthFactorScanner, get_prices
+from tests.constants import (
+    LIQUIDATION_COLLATERAL,
+    LIQUIDATION_MINT,
+    PRICE_FEED_UNDER_VALUE_PRICE,
+    PRICE_FEED_VALUE_WITH_IMPROVEMENT,
+)
+
+
+def test_scanner_matches_engine_health_factor(
+    some_user, dsce_with_minted_dsc_for_liquidation, weth, eth_usd, btc_usd
+):
+    # Arrange
+    dsce = dsce_with_minted_dsc_for_liquidation
+    other_user = boa.env.generate_address("other_user")
+    with boa.env.prank(other_user):
+        weth.mock_mint()
+        weth.approve(dsce, LIQUIDATION_COLLATERAL)
+        dsce.deposit_and_mint(weth, LIQUIDATION_COLLATERAL, LIQUIDATION_MINT // 3)
+    users = [some_user, other_user, boa.env.generate_address("empty_user")]
+
+    # Act
+    scanner = HealthFactorScanner.from_engine(dsce, users)
+    eth_usd.updateAnswer(PRICE_FEED_VALUE_WITH_IMPROVEMENT)
+    btc_usd.updateAnswer(PRICE_FEED_UNDER_VALUE_PRICE)
+    prices = get_prices(dsce)
+
+    # Assert
+    assert scanner.health_factors(prices) == [
+        dsce.get_health_factor(user) for user in users
+    ]
+    assert list(scanner.underwater(prices)) == [0]
+
+
+def test_scanner_underwater_is_exact_at_the_threshold():
+    # Arrange
+    rng = random.Random(42)
+    prices = [2_000 * 10**8, 30_000 * 10**8]
+    users, amounts, debts = [], [], []
+    for i in range(5_000):
+        collateral = [rng.randrange(0, 10**24), rng.randrange(0, 10**22)]
+        adjusted = engine_math.collateral_adjusted_for_threshold(
+            engine_math.get_collateral_value(prices, collateral)
+        )
+        # @dev half of the positions sit within a few wei of liquidation
+        if i % 2:
+            debt = adjusted + rng.randrange(-3, 4)
+        else:
+            debt = rng.randrange(0, 2 * adjusted + 2)
+        users.append(f"user_{i}")
+        amounts.append(collateral)
+        debts.append(max(debt, 0))
+    scanner = HealthFactorScanner(["weth", "wbtc"])
+    scanner.set_positions(users, amounts, debts)
+
+    # Act
+    underwater = set(scanner.underwater(prices).tolist())
+
+    # Assert
+    expected = {
+        i
+        for i, hf in enumerate(scanner.health_factors(prices))
+        if hf < engine_math.MIN_HEALTH_FACTOR
+    }
+    assert underwater == expected
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from keeper.simulator import (
+    LiquidationSimulator,
+    Population,
+    correlated_price_paths,
+)
+
+ETH_PRICE = 2_000 * 10**8
+BTC_PRICE = 30_000 * 10**8
+ONE = 10**18
+
+
+def _single_position_run(eth_prices: list[int]):
+    # @dev 1 weth is worth $20 at ETH_PRICE, see ADDITIONAL_FEED_PRECISION
+    population = Population(np.array([[1.0 * ONE, 0.0]]), np.array([9.0 * ONE]))
+    path = np.array([[[price, BTC_PRICE] for price in eth_prices]], dtype=np.float64)
+    return LiquidationSimulator(population).run(path)
+
+
+def test_correlated_price_paths_start_at_initial_prices_and_correlate():
+    # Arrange
+    rng = np.random.default_rng(0)
+
+    # Act
+    paths = correlated_price_paths([ETH_PRICE, BTC_PRICE], [0.8, 0.6], 0.7, 4000, 2, rng)
+
+    # Assert
+    assert paths.shape == (4000, 3, 2)
+    assert np.all(paths[:, 0] == [ETH_PRICE, BTC_PRICE])
+    log_returns = np.diff(np.log(paths), axis=1).reshape(-1, 2)
+    assert np.corrcoef(log_returns.T)[0, 1] == pytest.approx(0.7, abs=0.03)
+
+
+def test_simulator_liquidates_back_to_health_factor_one():
+    # Arrange/Act
+    result = _single_position_run([ETH_PRICE, 1_700 * 10**8])
+
+    # Assert
+    # @dev $17 of collateral for $9 of debt: cover (9 - 8.5) / 0.45 to reach hf 1
+    covered = (9 - 8.5) / 0.45 * ONE
+    assert result.liquidations[0] == 1
+    assert result.liquidation_volume[0] == pytest.approx(covered)
+    assert result.bad_debt[0] == 0
+    assert result.collateralization[0] == pytest.approx(200)
+    assert result.min_collateralization[0] == pytest.approx(17 / 9 * 100)
+
+
+def test_simulator_records_bad_debt_when_liquidation_cannot_help():
+    # Arrange/Act
+    result = _single_position_run([ETH_PRICE, 950 * 10**8, 800 * 10**8])
+
+    # Assert
+    # @dev $9.5 then $8 of collateral never cover the $9 debt plus the 10% bonus
+    assert result.liquidations[0] == 0
+    assert result.bad_debt[0] == pytest.approx(1 * ONE)
+    assert result.percentiles((50,))["bad_debt"][50] == pytest.approx(1 * ONE)
@@ -0,0 +1,87 @@
+import boa
+
+from keeper.snapshot import (
+    Account,
+    Snapshot,
+    export_snapshot,
+    restore_snapshot,
+    write_snapshot,
+)
+from script.artifacts import load_deployer
+from script.deploy_dsc import deploy_dsc
+from script.mocks.deploy_price_feed import DECIMALS, INITIAL_VALUE
+from tests.constants import COLLATERAL_AMOUNT, MINT_AMOUNT
+
+
+def _fresh_stack():
+    # @dev own deployer, the addresses are not taken by any other step
+    with boa.env.prank(boa.env.generate_address("snapshot_deployer")):
+        tokens = [load_deployer("src/mocks/mock_token.vy").deploy() for _ in range(2)]
+        feeds = [
+            load_deployer("src/mocks/MockV3Aggregator.vy").deploy(DECIMALS, INITIAL_VALUE)
+            for _ in range(2)
+        ]
+        dsc = deploy_dsc()
+        dsce = load_deployer("src/dsc_engine.vy").deploy(
+            [token.address for token in tokens],
+            [feed.address for feed in feeds],
+            dsc.address,
+        )
+        dsc.set_minter(dsce.address, True)
+        dsc.transfer_ownership(dsce.address)
+    return dsce, dsc, tokens, feeds
+
+
+def test_snapshot_restores_positions_balances_and_prices_into_a_fresh_stack(
+    dsce_with_minted_dsc_collateral, dsc, some_user, liquidator, eth_usd, btc_usd, tmp_path
+):
+    # Arrange
+    dsce = dsce_with_minted_dsc_collateral
+    eth_usd.updateAnswer(1_800 * 10**8)
+    path = tmp_path / "engine.snapshot"
+    users = [some_user, liquidator, boa.env.generate_address("no_position")]
+    written = export_snapshot(path, dsce, dsc, [eth_usd, btc_usd], users)
+
+    # Act
+    fresh_dsce, fresh_dsc, tokens, feeds = _fresh_stack()
+    restored = restore_snapshot(Snapshot.open(path), fresh_dsce, fresh_dsc, tokens, feeds)
+
+    # Assert
+    assert written == restored == 2
+    for user in users:
+        assert fresh_dsce.get_account_information(user) == dsce.get_account_information(
+            user
+        )
+        assert fresh_dsce.get_health_factor(user) == dsce.get_health_factor(user)
+        assert fresh_dsc.balanceOf(user) == dsc.balanceOf(user)
+    assert fresh_dsc.totalSupply() == dsc.totalSupply()
+    assert tokens[1].balanceOf(fresh_dsce) == 2 * COLLATERAL_AMOUNT
+    assert fresh_dsce.get_total_collateral(tokens[1]) == 2 * COLLATERAL_AMOUNT
+    assert fresh_dsce.total_dsc_minted() == dsce.total_dsc_minted()
+    # @dev the restored state is live, not only readable
+    with boa.env.prank(some_user):
+        fresh_dsc.approve(fresh_dsce, MINT_AMOUNT)
+        fresh_dsce.redeem_for_dsc(tokens[0], COLLATERAL_AMOUNT // 2, MINT_AMOUNT)
+    assert tokens[0].balanceOf(some_user) == COLLATERAL_AMOUNT // 2
+    assert fresh_dsce.user_to_dsc_minted(some_user) == MINT_AMOUNT
+
+
+def test_snapshot_file_is_memory_mapped_fixed_size_records(tmp_path):
+    # Arrange
+    path = tmp_path / "engine.snapshot"
+    tokens = [boa.env.generate_address(f"token_{i}") for i in range(3)]
+    feeds = [boa.env.generate_address(f"feed_{i}") for i in range(3)]
+    accounts = [
+        Account(boa.env.generate_address(f"user_{i}"), (i, 0, 2**112 - 1), i * 7, 2**255)
+        for i in range(1, 4)
+    ]
+
+    # Act
+    write_snapshot(path, tokens, feeds, [1, 2, -3], accounts, block=9, timestamp=11)
+    snapshot = Snapshot.open(path)
+
+    # Assert
+    assert list(snapshot) == accounts
+    assert (snapshot.tokens, snapshot.feeds) == (tuple(tokens), tuple(feeds))
+    assert (snapshot.prices, snapshot.block, snapshot.timestamp) == ((1, 2, -3), 9, 11)
+    assert path.stat().st_size == 64 + 3 * 72 + 3 * (20 + 3 * 14 + 64)